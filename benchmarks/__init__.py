@@ -0,0 +1 @@
+"""Micro-benchmarks for the sketchpy Canvas (run as scripts, not collected by pytest)."""
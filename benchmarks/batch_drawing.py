@@ -0,0 +1,72 @@
+"""
+Benchmark: bulk drawing with batch methods vs. per-shape calls in a loop.
+
+Compares can.circle() / can.line() called N times against a single
+can.circles() / can.lines() call with the same data, for plain lists and
+(if installed) NumPy arrays.
+
+Usage:
+    uv run python -m benchmarks.batch_drawing
+"""
+
+import math
+import time
+
+from sketchpy import Canvas
+
+N = 9_000
+
+
+def best_of(fn, repeats: int = 5) -> float:
+    """Best wall time of fn() in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name: str, loop_fn, batch_fn):
+    loop = best_of(loop_fn)
+    batch = best_of(batch_fn)
+    print(f"{name:<22} {N / loop:>12,.0f} {N / batch:>12,.0f} {loop / batch:>8.1f}x")
+
+
+def main():
+    xs = [400 + 300 * math.cos(i * 0.01) for i in range(N)]
+    ys = [300 + 200 * math.sin(i * 0.013) for i in range(N)]
+
+    def circle_loop():
+        can = Canvas(800, 600)
+        for x, y in zip(xs, ys):
+            can.circle(x, y, 4, fill="#FF6B6B", opacity=0.5)
+
+    def circle_batch():
+        Canvas(800, 600).circles(xs, ys, 4, fill="#FF6B6B", opacity=0.5)
+
+    def line_loop():
+        can = Canvas(800, 600)
+        for x, y in zip(xs, ys):
+            can.line(400, 300, x, y, stroke="#4ECDC4", stroke_width=1)
+
+    def line_batch():
+        Canvas(800, 600).lines([400] * N, [300] * N, xs, ys, stroke="#4ECDC4", stroke_width=1)
+
+    print(f"{'':<22} {'loop/s':>12} {'batch/s':>12} {'speedup':>9}")
+    report("circles (lists)", circle_loop, circle_batch)
+    report("lines (lists)", line_loop, line_batch)
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy not installed, skipping array benchmark")
+        return
+
+    ax, ay = np.array(xs), np.array(ys)
+    report("circles (numpy)", circle_loop,
+           lambda: Canvas(800, 600).circles(ax, ay, 4, fill="#FF6B6B", opacity=0.5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: Canvas.dumps()/loads() against SVG and pickle.
+
+Serializes every lesson starter and snippet, then a large drawing of
+curves and circles, and compares size and round-trip time: dumps() plus
+loads(), to_svg() plus parsing the SVG back with ElementTree (the
+cheapest way to get anything out of SVG text), and pickle.
+
+Usage:
+    uv run python -m benchmarks.binary_format
+"""
+
+import pickle
+import random
+import time
+import xml.etree.ElementTree as ET
+
+from benchmarks.style_classes import corpus
+from sketchpy import Canvas
+
+
+def scene() -> Canvas:
+    rng = random.Random(6)
+    can = Canvas(1200, 800)
+    for _ in range(3_000):
+        x, y = rng.uniform(0, 1200), rng.uniform(0, 800)
+        can.curve(x, y, x + rng.uniform(-40, 40), y - 60, x + rng.uniform(-20, 20), y - 90,
+                  stroke="#2E8B57", stroke_width=2)
+    for _ in range(6_000):
+        can.circle(rng.randint(0, 1200), rng.randint(0, 800), rng.randint(2, 9), fill="#FFB6C1")
+    return can
+
+
+def cold_svg(can: Canvas) -> bytes:
+    """to_svg() without reusing markup cached by an earlier render."""
+    can._svg_cache = None
+    can._segment_cache = {}
+    can._subtree_cache = {}
+    return can.to_svg().encode()
+
+
+def best_of(fn, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(label: str, canvases: list):
+    rows = [
+        ("svg", cold_svg, ET.fromstring),
+        ("pickle", pickle.dumps, pickle.loads),
+        ("dumps", Canvas.dumps, Canvas.loads),
+    ]
+    print(f"{label}\n{'':<8} {'bytes':>11} {'encode':>10} {'decode':>10}")
+    for name, encode, decode in rows:
+        blobs = [encode(can) for can in canvases]
+        encode_time = best_of(lambda: [encode(can) for can in canvases])
+        decode_time = best_of(lambda: [decode(data) for data in blobs])
+        print(f"{name:<8} {sum(map(len, blobs)):>11,} {encode_time * 1000:>8.1f}ms "
+              f"{decode_time * 1000:>8.1f}ms")
+
+
+def main():
+    compare("lesson corpus", [can for _, can in corpus()])
+    compare("\n9,000 curves and circles", [scene()])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: curve detail that follows on-screen size.
+
+A deep-sea scene with one large octopus and 150 small background
+jellyfish. For several canvas tolerances, reports the cubic segments in
+tentacle outlines (against the 16 per tentacle of a fixed 8 per side),
+SVG size and drawing time. A second table shows how the outline detail
+of a single tentacle and a pear grows with size at the default
+tolerance.
+
+Usage:
+    uv run python -m benchmarks.curve_detail
+"""
+
+import time
+
+from sketchpy import Canvas
+from sketchpy.helpers import OceanShapes
+
+
+def scene(tolerance: float) -> Canvas:
+    can = Canvas(1200, 800, tolerance=tolerance, seed=8)
+    ocean = OceanShapes(can)
+    ocean.octopus_realistic(600, 300, size=300)
+    for i in range(150):
+        ocean.jellyfish(40 + (i % 15) * 80, 40 + (i // 15) * 75, size=12)
+    return can
+
+
+def outlines(can: Canvas) -> tuple:
+    """(cubic segments, count) of the tentacle outlines in a drawing."""
+    segments = count = 0
+    for record in can.shapes:
+        if record.tag == "path" and "L" in record.extra:  # M C.. L C.. Z
+            segments += record.extra.count("C")
+            count += 1
+    return segments, count
+
+
+def detail(can: Canvas) -> int:
+    """Path segments plus polygon points over the whole drawing."""
+    svg = can.to_svg()
+    paths = sum(d.split('"')[0].count("C") for d in svg.split(' d="')[1:])
+    points = sum(p.split('"')[0].count(" ") // 2 + 1 for p in svg.split(' points="')[1:])
+    return paths + points
+
+
+def main():
+    print(f"{'tolerance':>9} {'segments':>9} {'fixed 8/side':>13} {'svg bytes':>10} {'draw':>8}")
+    for tolerance in (0.1, Canvas.TOLERANCE, 1.0, 4.0):
+        start = time.perf_counter()
+        can = scene(tolerance)
+        elapsed = time.perf_counter() - start
+        segments, count = outlines(can)
+        size = len(can.to_svg().encode("utf-8"))
+        print(f"{tolerance:>9} {segments:>9,} {16 * count:>13,} {size:>10,} {elapsed * 1000:>6.1f}ms")
+
+    print(f"\n{'size':>6} {'tentacle segments':>18} {'pear points':>12}")
+    for size in (5, 20, 80, 320, 1280):
+        tentacle = Canvas(2000, 2000)
+        tentacle.tentacle(0, 0, size, size, curl=0.5, twist=0.5, thickness=size / 5)
+        pear = Canvas(2000, 2000)
+        pear.pear(0, 0, width=size, height=size)
+        print(f"{size:>6} {detail(tentacle):>18} {detail(pear):>12}")
+
+
+if __name__ == "__main__":
+    main()
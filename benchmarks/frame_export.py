@@ -0,0 +1,85 @@
+"""
+Benchmark: exporting an animation frame by frame.
+
+A busy static background (seaweed, bubbles, sand) with one fish swimming
+across it. Compares drawing and rendering the whole scene from scratch
+for every frame against Animation, which draws and renders the static
+layer once, sequentially and in a process pool. Also reports the size of
+the sprite sheet against the sum of the frame files.
+
+Usage:
+    uv run python -m benchmarks.frame_export
+"""
+
+import math
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from sketchpy import Animation, Canvas
+
+FRAMES = 60
+WIDTH, HEIGHT = 800, 600
+
+
+def background(can):
+    """Static layer: about 3,000 shapes."""
+    can.rect(0, 500, WIDTH, 100, fill="#E8D5A0")
+    for i in range(40):
+        x = 20 + i * 19.5
+        can.wave(x, 500, x + 3, 300 + 40 * math.sin(i), height=6, waves=3,
+                 stroke="#2E8B57", stroke_width=3)
+    xs = [(i * 37.3) % WIDTH for i in range(2_900)]
+    ys = [(i * 53.1) % 500 for i in range(2_900)]
+    can.circles(xs, ys, 2, fill="#FFFFFF", stroke="#B0E0E6", stroke_width=0.5, opacity=0.6)
+
+
+def fish(can, t):
+    """The only moving part."""
+    x = -50 + (WIDTH + 100) * t
+    y = 250 + 40 * math.sin(t * 2 * math.pi)
+    can.ellipse(x, y, 40, 18, fill="#FF8C42")
+    can.polygon([(x - 38, y), (x - 60, y - 15), (x - 60, y + 15)], fill="#FF8C42")
+    can.circle(x + 22, y - 4, 3, fill="#000000")
+
+
+def from_scratch(out: Path):
+    for index in range(FRAMES):
+        can = Canvas(WIDTH, HEIGHT)
+        background(can)
+        fish(can, index / FRAMES)
+        (out / f"scratch_{index:03d}.svg").write_text(can.to_svg(), encoding="utf-8")
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    anim = Animation(fish, frames=FRAMES, width=WIDTH, height=HEIGHT, static=background)
+    processes = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        scratch = timed(lambda: from_scratch(out))
+        shared = timed(lambda: anim.save_frames(str(out / "shared_{:03d}.svg")))
+        pool = timed(lambda: anim.save_frames(str(out / "pool_{:03d}.svg"), processes=processes))
+        frame_bytes = sum(p.stat().st_size for p in out.glob("shared_*.svg"))
+
+    sheet_time = timed(lambda: anim.sprite_sheet(columns=10))
+    sheet_bytes = len(anim.sprite_sheet(columns=10).encode("utf-8"))
+
+    print(f"{FRAMES} frames, {WIDTH}x{HEIGHT}")
+    print(f"{'from scratch':<28} {scratch:>7.2f}s")
+    print(f"{'shared static layer':<28} {shared:>7.2f}s {scratch / shared:>6.1f}x")
+    print(f"{f'process pool ({processes})':<28} {pool:>7.2f}s {scratch / pool:>6.1f}x")
+    print(f"{'sprite sheet':<28} {sheet_time:>7.2f}s")
+    print(f"frame files {frame_bytes:>12,} bytes")
+    print(f"sprite sheet {sheet_bytes:>11,} bytes ({sheet_bytes / frame_bytes:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: tentacle outlines with the batched geometry kernel.
+
+An octopus-heavy scene drawn through the OceanShapes helpers, then 2,000
+random tentacles drawn with a tentacle() loop and with one tentacles()
+call. With NumPy installed, also compares the Python and NumPy outline
+kernels directly on the same batch.
+
+Usage:
+    uv run python -m benchmarks.geometry_kernel
+"""
+
+import random
+import time
+
+from sketchpy import Canvas
+from sketchpy import canvas as canvas_module
+from sketchpy.helpers import OceanShapes
+
+COUNT = 2000
+
+
+def octopus_scene() -> Canvas:
+    can = Canvas(1600, 1200, seed=5)
+    ocean = OceanShapes(can)
+    draw = [ocean.octopus, ocean.octopus_realistic, ocean.octopus_cartoon, ocean.jellyfish]
+    for i in range(40):
+        draw[i % 4](100 + (i % 8) * 190, 150 + (i // 8) * 220, size=60)
+    return can
+
+
+def tentacle_args() -> list:
+    rng = random.Random(2)
+    return [(rng.uniform(0, 800), rng.uniform(0, 600), rng.uniform(0, 800), rng.uniform(0, 600),
+             rng.uniform(-0.6, 0.6), rng.choice([0, rng.uniform(0, 1)]), rng.uniform(5, 30))
+            for _ in range(COUNT)]
+
+
+def best_of(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = tentacle_args()
+    columns = list(zip(*args))
+
+    def loop():
+        can = Canvas(800, 600)
+        for x1, y1, x2, y2, curl, twist, thickness in args:
+            can.tentacle(x1, y1, x2, y2, curl=curl, twist=twist, thickness=thickness, taper=0.2)
+
+    def batch():
+        can = Canvas(800, 600)
+        can.tentacles(*columns[:4], curl=columns[4], twist=columns[5],
+                      thickness=columns[6], taper=0.2)
+
+    print(f"geometry backend: {canvas_module._GEOMETRY_BACKEND}")
+    print(f"octopus scene (40 creatures): {best_of(octopus_scene) * 1000:.1f} ms")
+    print(f"{COUNT:,} tentacles, tentacle() loop: {best_of(loop) * 1000:.1f} ms")
+    print(f"{COUNT:,} tentacles, tentacles():     {best_of(batch) * 1000:.1f} ms")
+
+    if canvas_module._np is not None:
+        ctrls = [canvas_module._tentacle_ctrl(*a[:6]) for a in args]
+        widths = list(columns[6])
+        tips = [w * 0.2 for w in widths]
+        for name in ("_offset_outlines_py", "_offset_outlines_np"):
+            kernel = getattr(canvas_module, name)
+            elapsed = best_of(lambda: kernel(ctrls, widths, tips, Canvas.TOLERANCE))
+            print(f"{name}: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: reusing a static background with Canvas.compose().
+
+An ocean background (gradient, seaweed, jellyfish, octopuses) and many
+foreground variants, each a few fish in different places. Compares
+drawing and rendering the whole scene for every variant with drawing
+the background once and composing it with each foreground.
+
+Usage:
+    uv run python -m benchmarks.layer_compose
+"""
+
+import random
+import time
+
+from sketchpy import Canvas
+from sketchpy.helpers import OceanShapes
+
+VARIANTS = 50
+
+
+def background() -> Canvas:
+    can = Canvas(1200, 800)
+    ocean = OceanShapes(can)
+    can.linear_gradient("water", colors=["#1E5A8E", "#0A2E4D"], start=(0, 0), end=(0, 100))
+    can.rect(0, 0, 1200, 800, fill="gradient:water", stroke=None)
+    for i in range(24):
+        ocean.seaweed(30 + i * 50, 800, height=120 + (i % 5) * 30)
+    for i in range(6):
+        ocean.jellyfish(100 + i * 190, 200 + (i % 2) * 120)
+        ocean.octopus(100 + i * 190, 620, size=90)
+    return can
+
+
+def fish(can: Canvas, seed: int) -> Canvas:
+    rng = random.Random(seed)
+    for _ in range(8):
+        x, y = rng.uniform(50, 1150), rng.uniform(50, 750)
+        can.ellipse(x, y, 30, 14, fill="#FFD966", stroke="#000000", stroke_width=1)
+        can.polygon([(x + 28, y), (x + 50, y - 14), (x + 50, y + 14)], fill="#FFD966")
+    return can
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def redraw_all():
+    for seed in range(VARIANTS):
+        fish(background(), seed).to_svg()
+
+
+def compose_all():
+    reef = background()
+    for seed in range(VARIANTS):
+        Canvas.compose(reef, fish(Canvas(1200, 800), seed)).to_svg()
+
+
+def main():
+    reef = background()
+    print(f"background {reef._shape_count:,} shapes, {len(reef.to_svg()):,} bytes; "
+          f"{VARIANTS} foreground variants")
+    full = timed(redraw_all) / VARIANTS
+    composed = timed(compose_all) / VARIANTS
+    print(f"{'redraw everything':<20} {full * 1000:>8.2f}ms per variant")
+    print(f"{'compose()':<20} {composed * 1000:>8.2f}ms per variant {full / composed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
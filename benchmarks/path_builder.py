@@ -0,0 +1,56 @@
+"""
+Benchmark: one path against many line() calls.
+
+A 500-segment zigzag outline drawn with line() per segment and with the
+chainable path builder. Reports shapes used
+against MAX_SHAPES, SVG bytes at full and 1-decimal precision, and time
+to draw and render.
+
+Usage:
+    uv run python -m benchmarks.path_builder
+"""
+
+import math
+import time
+
+from sketchpy import Canvas
+
+SEGMENTS = 500
+
+
+def points() -> list:
+    return [(40 + i * 1.5, 300 + 100 * math.sin(i / 12) + (i % 2) * 8) for i in range(SEGMENTS + 1)]
+
+
+def with_lines(pts) -> Canvas:
+    can = Canvas(800, 600)
+    for (x1, y1), (x2, y2) in zip(pts, pts[1:]):
+        can.line(x1, y1, x2, y2)
+    return can
+
+
+def with_path(pts) -> Canvas:
+    can = Canvas(800, 600)
+    path = can.path().move_to(*pts[0])
+    for x, y in pts[1:]:
+        path.line_to(x, y)
+    return can
+
+
+def main():
+    pts = points()
+    print(f"{'':>10} {'shapes':>7} {'svg bytes':>10} {'precision=1':>12} {'draw+render':>12}")
+    for name, draw in (("line()", with_lines), ("path()", with_path)):
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            can = draw(pts)
+            can.to_svg(precision=1)
+            best = min(best, time.perf_counter() - start)
+        full = len(can.to_svg().encode("utf-8"))
+        short = len(can.to_svg(precision=1).encode("utf-8"))
+        print(f"{name:>10} {can._shape_count:>7} {full:>10,} {short:>12,} {best * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: PNG output against SVG, to pick the backend per canvas.
+
+Renders every lesson starter and snippet with to_svg() and to_png() and
+reports sizes (SVG raw and gzip-compressed, PNG full size and as a
+quarter-size thumbnail) and PNG render time. Then times a large busy
+canvas rendered in one process and in a process pool.
+
+Usage:
+    uv run python -m benchmarks.png_output
+"""
+
+import gzip
+import os
+import random
+import time
+
+from benchmarks.style_classes import corpus
+from sketchpy import Canvas
+
+
+def busy(size: int = 1200) -> Canvas:
+    rng = random.Random(5)
+    can = Canvas(size, size)
+    can.linear_gradient("sky", colors=["#87CEEB", "#FFFFFF"], start=(0, 0), end=(0, 100))
+    can.rect(0, 0, size, size, fill="gradient:sky", stroke="none")
+    for _ in range(1_000):
+        x, y = rng.uniform(0, size), rng.uniform(0, size)
+        can.circle(x, y, rng.uniform(5, 40), fill="#FF8C42", stroke="#000000", stroke_width=2)
+    for i in range(24):
+        y = 50 * i
+        can.wave(0, y, size, y, height=15, waves=12, stroke="#2E8B57", stroke_width=3)
+    return can
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"{'drawing':<34} {'svg':>9} {'svg gz':>8} {'png':>9} {'png 1/4':>8} {'render':>8}  smaller")
+    totals = [0, 0, 0, 0, 0.0]
+    for name, can in corpus():
+        svg = can.to_svg().encode()
+        svg_gz = len(gzip.compress(svg))
+        png, elapsed = timed(can.to_png)
+        thumb = len(can.to_png(scale=0.25))
+        for i, value in enumerate((len(svg), svg_gz, len(png), thumb, elapsed)):
+            totals[i] += value
+        smaller = "svg" if svg_gz <= len(png) else "png"
+        print(f"{name:<34} {len(svg):>9,} {svg_gz:>8,} {len(png):>9,} {thumb:>8,} "
+              f"{elapsed * 1000:>6.0f}ms  {smaller}")
+    print(f"{'total':<34} {totals[0]:>9,} {totals[1]:>8,} {totals[2]:>9,} {totals[3]:>8,} "
+          f"{totals[4] * 1000:>6.0f}ms")
+
+    can = busy()
+    processes = os.cpu_count() or 1
+    svg = len(gzip.compress(can.to_svg().encode()))
+    png, single = timed(can.to_png)
+    _, pooled = timed(lambda: can.to_png(processes=processes))
+    print(f"\nbusy {can.width}x{can.height} canvas, {can._shape_count:,} shapes: "
+          f"svg gz {svg:,} bytes, png {len(png):,} bytes")
+    print(f"{'one process':<22} {single:>7.2f}s")
+    print(f"{f'process pool ({processes})':<22} {pooled:>7.2f}s {single / pooled:>6.1f}x")
+    print(f"thumbnail (scale 0.25) {timed(lambda: can.to_png(scale=0.25))[1]:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
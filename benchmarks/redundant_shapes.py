@@ -0,0 +1,63 @@
+"""
+Benchmark: removing duplicate and hidden shapes with Canvas.optimize().
+
+Runs optimize() over every lesson starter and snippet, then over a
+synthetic overdraw-heavy drawing: a loop that draws each flower twice and
+a background repainted over earlier work. Reports elements and bytes
+before and after, and the time optimize() takes.
+
+Usage:
+    uv run python -m benchmarks.redundant_shapes
+"""
+
+import random
+import time
+
+from benchmarks.style_classes import corpus
+from sketchpy import Canvas
+
+
+def overdraw() -> Canvas:
+    rng = random.Random(4)
+    can = Canvas(800, 600)
+    for layer in range(3):
+        # Each pass repaints the background over the previous one
+        can.rect(0, 0, 800, 600, fill=["#87CEEB", "#A5C8E4", "#BFEFFF"][layer], stroke="none")
+        for _ in range(800):
+            x, y = rng.uniform(0, 800), rng.uniform(0, 600)
+            for _ in range(2):  # Loop bug: every flower drawn twice
+                can.circle(x, y, 8, fill="#FFB6C1", stroke="none")
+                can.circle(x, y, 3, fill="#FFD700", stroke="none")
+    return can
+
+
+def measure(can: Canvas) -> tuple:
+    svg = can.to_svg()
+    return svg.count("<") - 1, len(svg.encode("utf-8"))
+
+
+def main():
+    elements = [0, 0]
+    size = [0, 0]
+    for _, can in corpus():
+        before = measure(can)
+        can.optimize()
+        after = measure(can)
+        for totals, i in ((elements, 0), (size, 1)):
+            totals[0] += before[i]
+            totals[1] += after[i]
+    print(f"lesson corpus: {elements[0]:,} -> {elements[1]:,} elements, "
+          f"{size[0]:,} -> {size[1]:,} bytes")
+
+    can = overdraw()
+    before = measure(can)
+    start = time.perf_counter()
+    removed = can.optimize()
+    elapsed = time.perf_counter() - start
+    after = measure(can)
+    print(f"overdraw scene: {before[0]:,} -> {after[0]:,} elements, "
+          f"{before[1]:,} -> {after[1]:,} bytes, {removed} in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: re-rendering a nested scene after moving groups.
+
+A "traffic" group holding a road and 40 cars, each car its own group.
+Times to_svg() after moving the whole traffic group, after moving
+one car, and a cold render of the same canvas (no cached markup).
+
+Usage:
+    uv run python -m benchmarks.scene_graph
+"""
+
+import time
+
+from sketchpy import Canvas
+from sketchpy.helpers import CarShapes
+
+CARS = 40
+FRAMES = 50
+
+
+def scene() -> Canvas:
+    can = Canvas(1600, 1200)
+    cars = CarShapes(can)
+    with can.group("traffic"):
+        cars.road(600)
+        for i in range(CARS):
+            with can.group(f"car{i}"):
+                cars.sports_car(40 + (i % 8) * 190, 100 + (i // 8) * 220)
+    return can
+
+
+def per_frame(can: Canvas, step) -> float:
+    can.to_svg()
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        step(can, frame)
+        can.to_svg()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main():
+    can = scene()
+    shapes = can._shape_count
+    cold = per_frame(can, lambda c, f: c.to_svg(precision=f % 2 + 3))
+    parent = per_frame(can, lambda c, f: c.move_group("traffic", dx=f))
+    child = per_frame(can, lambda c, f: c.move_group("car7", dx=f))
+    size = len(can.to_svg())
+
+    print(f"{CARS} car groups in one parent, {shapes:,} shapes, {size:,} bytes")
+    print(f"{'full render':<22} {cold * 1000:>8.2f}ms")
+    print(f"{'move the parent':<22} {parent * 1000:>8.2f}ms {cold / parent:>6.0f}x")
+    print(f"{'move one car':<22} {child * 1000:>8.2f}ms {cold / child:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
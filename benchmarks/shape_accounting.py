@@ -0,0 +1,42 @@
+"""
+Benchmark: per-shape drawing cost as the number of groups grows.
+
+The shape limit check runs before every drawn shape. With a running shape
+counter its cost is independent of how many groups exist, so the time per
+shape should stay flat from 1 group to thousands.
+
+Usage:
+    uv run python -m benchmarks.shape_accounting
+"""
+
+import time
+
+from sketchpy import Canvas
+
+TOTAL_SHAPES = 8_000
+
+
+def time_per_shape(num_groups: int, repeats: int = 3) -> float:
+    """Best-of-N microseconds per circle() with shapes spread over num_groups groups."""
+    per_group = TOTAL_SHAPES // num_groups
+    best = float("inf")
+    for _ in range(repeats):
+        can = Canvas(800, 600)
+        start = time.perf_counter()
+        for g in range(num_groups):
+            with can.group(f"g{g}"):
+                for i in range(per_group):
+                    can.circle(i % 800, g % 600, 3)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed / (per_group * num_groups))
+    return best * 1e6
+
+
+def main():
+    print(f"{'groups':>8} {'us/shape':>10}")
+    for num_groups in (1, 10, 100, 1000, 4000):
+        print(f"{num_groups:>8} {time_per_shape(num_groups):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: spatial queries against checking every shape by hand.
+
+Draws N small circles and rectangles, then times shapes_at() and
+shapes_in_rect() per query and overlapping_pairs() for the whole canvas,
+against the O(n) and O(n^2) loops a lesson would otherwise write.
+
+Usage:
+    uv run python -m benchmarks.spatial_queries
+"""
+
+import random
+import time
+
+from sketchpy import Canvas
+
+N = 9_000
+QUERIES = 1_000
+
+
+def scene() -> Canvas:
+    rng = random.Random(1)
+    can = Canvas(2000, 2000)
+    xs = [rng.uniform(0, 2000) for _ in range(N // 2)]
+    ys = [rng.uniform(0, 2000) for _ in range(N // 2)]
+    can.circles(xs, ys, 6, stroke=None)
+    for _ in range(N // 2):
+        can.rect(rng.uniform(0, 2000), rng.uniform(0, 2000), 10, 8, stroke=None)
+    return can
+
+
+def boxes_by_hand(can: Canvas) -> list:
+    """What a lesson would keep itself: one (x0, y0, x1, y1) per shape."""
+    boxes = []
+    for xs, ys, rs in [s.geom for s in can.shapes if s.tag == 'circles']:
+        boxes.extend((x - r, y - r, x + r, y + r) for x, y, r in zip(xs, ys, rs))
+    boxes.extend((s.geom[0], s.geom[1], s.geom[0] + s.geom[2], s.geom[1] + s.geom[3])
+                 for s in can.shapes if s.tag == 'rect')
+    return boxes
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    can = scene()
+    rng = random.Random(2)
+    points = [(rng.uniform(0, 2000), rng.uniform(0, 2000)) for _ in range(QUERIES)]
+    boxes = boxes_by_hand(can)
+
+    build = timed(lambda: can.shapes_at(0, 0))
+    at = timed(lambda: [can.shapes_at(x, y) for x, y in points]) / QUERIES
+    at_loop = timed(lambda: [[i for i, b in enumerate(boxes) if b[0] <= x <= b[2] and b[1] <= y <= b[3]]
+                             for x, y in points]) / QUERIES
+    rect = timed(lambda: [can.shapes_in_rect(x, y, 50, 50) for x, y in points]) / QUERIES
+    rect_loop = timed(lambda: [[i for i, b in enumerate(boxes)
+                                if b[0] <= x + 50 and x <= b[2] and b[1] <= y + 50 and y <= b[3]]
+                               for x, y in points]) / QUERIES
+
+    small = boxes[:2_000]
+    pairs = timed(can.overlapping_pairs)
+    pairs_loop = timed(lambda: [(i, j) for i in range(len(small)) for j in range(i + 1, len(small))
+                                if small[i][0] < small[j][2] and small[j][0] < small[i][2]
+                                and small[i][1] < small[j][3] and small[j][1] < small[i][3]])
+    pairs_loop *= (len(boxes) / len(small)) ** 2  # Quadratic, scaled up to N shapes
+
+    print(f"{N:,} shapes, index built in {build * 1000:.1f} ms")
+    print(f"{'query':<22} {'index':>10} {'by hand':>10} {'speedup':>8}")
+    print(f"{'shapes_at':<22} {at * 1e6:>8.1f}us {at_loop * 1e6:>8.1f}us {at_loop / at:>7.0f}x")
+    print(f"{'shapes_in_rect 50x50':<22} {rect * 1e6:>8.1f}us {rect_loop * 1e6:>8.1f}us {rect_loop / rect:>7.0f}x")
+    print(f"{'overlapping_pairs':<22} {pairs * 1000:>8.1f}ms {pairs_loop * 1000:>8.0f}ms "
+          f"{pairs_loop / pairs:>7.0f}x  (by hand extrapolated from 2,000 shapes)")
+
+
+if __name__ == "__main__":
+    main()
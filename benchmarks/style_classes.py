@@ -0,0 +1,47 @@
+"""
+Benchmark: SVG size with inline style attributes vs. CSS classes.
+
+Renders every lesson starter (themes/*/*/starter.py) and snippet with
+to_svg() and to_svg(css_classes=True) and reports the bytes saved, raw
+and gzip-compressed (what the browser actually transfers).
+
+Usage:
+    uv run python -m benchmarks.style_classes
+"""
+
+import gzip
+import random
+import runpy
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def corpus():
+    """(name, canvas) for every lesson starter and snippet."""
+    for path in sorted(PROJECT_ROOT.glob("themes/*/*/starter.py")):
+        random.seed(0)
+        yield f"{path.parent.parent.name}/{path.parent.name}", runpy.run_path(str(path))["main"]()
+    for path in sorted((PROJECT_ROOT / "snippets").glob("*.py")):
+        random.seed(0)
+        yield f"snippets/{path.stem}", runpy.run_path(str(path))["can"]
+
+
+def main():
+    print(f"{'drawing':<40} {'inline':>9} {'classes':>9} {'saved':>7} {'gz saved':>9}")
+    totals = [0, 0, 0, 0]
+    for name, can in corpus():
+        inline = can.to_svg().encode()
+        classes = can.to_svg(css_classes=True).encode()
+        gz_inline = len(gzip.compress(inline))
+        gz_classes = len(gzip.compress(classes))
+        for i, size in enumerate((len(inline), len(classes), gz_inline, gz_classes)):
+            totals[i] += size
+        print(f"{name:<40} {len(inline):>9,} {len(classes):>9,} "
+              f"{1 - len(classes) / len(inline):>7.1%} {1 - gz_classes / gz_inline:>9.1%}")
+    print(f"{'total':<40} {totals[0]:>9,} {totals[1]:>9,} "
+          f"{1 - totals[1] / totals[0]:>7.1%} {1 - totals[3] / totals[2]:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: SVG size and render time with viewport culling.
+
+A typical overshooting lesson drawing: a background grid drawn with loops
+that run past the edges, plus flowers scattered with random offsets over
+an area three times the canvas size. Compares to_svg() with
+to_svg(cull=True) and prints cull_report().
+
+Usage:
+    uv run python -m benchmarks.viewport_culling
+"""
+
+import random
+import time
+
+from sketchpy import Canvas
+
+WIDTH, HEIGHT = 800, 600
+
+
+def scene() -> Canvas:
+    rng = random.Random(3)
+    can = Canvas(WIDTH, HEIGHT)
+    for x in range(-400, 1600, 20):
+        can.line(x, -300, x, 1200, stroke="#E8E8E8", stroke_width=1)
+    for y in range(-300, 1200, 20):
+        can.line(-400, y, 1600, y, stroke="#E8E8E8", stroke_width=1)
+    for _ in range(600):
+        x = rng.uniform(-WIDTH, 2 * WIDTH)
+        y = rng.uniform(-HEIGHT, 2 * HEIGHT)
+        for i in range(5):
+            can.circle(x + (i - 2) * 6, y - abs(i - 2) * 4, 6, fill="#FFB6C1", stroke=None)
+        can.circle(x, y, 4, fill="#FFD700", stroke=None)
+    return can
+
+
+def best_of(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    plain = best_of(lambda: scene().to_svg())
+    culled = best_of(lambda: scene().to_svg(cull=True))
+    can = scene()
+    full = len(can.to_svg().encode("utf-8"))
+    small = len(can.to_svg(cull=True).encode("utf-8"))
+    report = can.cull_report()
+
+    print(f"{'':<14} {'bytes':>10} {'draw + render':>14}")
+    print(f"{'to_svg()':<14} {full:>10,} {plain * 1000:>12.1f}ms")
+    print(f"{'cull=True':<14} {small:>10,} {culled * 1000:>12.1f}ms")
+    print(f"culled {report['elements']:,} elements, {report['bytes']:,} bytes "
+          f"({1 - small / full:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
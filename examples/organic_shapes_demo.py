@@ -4,13 +4,9 @@ Shows the difference between simple curves and twisted S-curves.
 """
 
 from sketchpy.shapes import Canvas, Color, OceanPalette
-import random
 
-# Seed for reproducibility
-random.seed(123)
-
-# Create canvas
-can = Canvas(900, 700, background=OceanPalette.SHALLOW_WATER)
+# Create canvas (seeded, so the blobs come out the same every run)
+can = Canvas(900, 700, background=OceanPalette.SHALLOW_WATER, seed=123)
 
 # Title
 can.text(280, 30, "Enhanced Organic Shapes", size=24, fill=OceanPalette.DEEP_OCEAN)
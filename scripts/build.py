@@ -58,6 +58,7 @@ def process_shapes_code(sketchpy_dir: Path) -> str:
     Reads from modular structure:
     - palettes.py: Color classes
     - canvas.py: Canvas with all drawing methods
+    - serialize.py: Canvas.dumps()/loads() binary format
     - helpers/ocean.py: OceanShapes class
     - helpers/cars.py: CarShapes class
 
@@ -70,10 +71,15 @@ def process_shapes_code(sketchpy_dir: Path) -> str:
     modules_to_include = [
         sketchpy_dir / 'palettes.py',
         sketchpy_dir / 'canvas.py',
+        sketchpy_dir / 'serialize.py',
         sketchpy_dir / 'helpers' / 'ocean.py',
         sketchpy_dir / 'helpers' / 'cars.py',
     ]
 
+    # Imports of these inside functions are dropped too; the other modules
+    # (optimize, spatial, raster, bake) stay local-only
+    bundled = {module_path.stem for module_path in modules_to_include}
+
     combined_parts = []
 
     for module_path in modules_to_include:
@@ -96,6 +102,9 @@ def process_shapes_code(sketchpy_dir: Path) -> str:
             # Skip internal relative imports (from .palettes, from .utils, etc.)
             if line.startswith('from .'):
                 continue
+            stripped = line.lstrip()
+            if stripped.startswith('from .') and stripped[6:].split()[0] in bundled:
+                continue
 
             # Skip typing imports (type hints removed anyway)
             if line.startswith('from typing import'):
@@ -21,6 +21,7 @@ from .helpers import OceanShapes, CarShapes
 
 # Utility classes and functions (local development only)
 from .utils import Point, quick_draw
+from .animation import Animation
 
 __all__ = [
     # Core
@@ -37,6 +38,7 @@ __all__ = [
     # Utils (local only, not in browser)
     'Point',
     'quick_draw',
+    'Animation',
 ]
 
 __version__ = '0.1.0'
@@ -0,0 +1,290 @@
+"""
+Frame-by-frame animation export (local development only, not included in browser bundle).
+
+An Animation calls a drawing function once per frame with the time t and
+exports the frames as a numbered sequence of SVG files or as a single
+sprite sheet. Shapes drawn by the `static` function are drawn and rendered
+once and shared by every frame.
+"""
+
+import math
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+from .canvas import Canvas, _number_formatter
+from .palettes import Color
+
+
+# Per-process state for parallel export, set up by _init_worker
+_worker: dict = {}
+
+
+def _init_worker(animation: 'Animation'):
+    """Process pool initializer: draw the static layer once per worker."""
+    _worker['animation'] = animation
+    _worker['template'] = animation._template()
+
+
+def _run_task(task: tuple):
+    """Run one frame task (method name, frame index, argument) in a worker."""
+    method, index, arg = task
+    return getattr(_worker['animation'], method)(_worker['template'], index, arg)
+
+
+class Animation:
+    """
+    A sequence of frames drawn by a function of time.
+
+    Example:
+        def background(can):
+            can.rect(0, 0, 400, 300, fill=Color.BLUE)
+
+        def draw(can, t):
+            can.circle(50 + 300 * t, 150, 20, fill=Color.ORANGE)
+
+        anim = Animation(draw, frames=30, width=400, height=300, static=background)
+        anim.save_frames("frames/ball_{:03d}.svg")
+        anim.save_sprite_sheet("ball.svg", columns=6)
+    """
+
+    def __init__(self, draw: Callable, frames: int = 24, width: int = 800, height: int = 600,
+                 background: str = Color.WHITE, static: Optional[Callable] = None,
+                 precision: Optional[int] = None, css_classes: bool = False,
+                 seed: Optional[Union[int, str]] = None):
+        """
+        Create an animation.
+
+        Args:
+            draw: Function draw(canvas, t) drawing one frame. t goes from 0
+                  for the first frame towards 1 (exclusive), so the sequence
+                  loops without repeating a frame.
+            frames: Number of frames
+            width: Frame width in pixels
+            height: Frame height in pixels
+            background: Background color of every frame
+            static: Optional function static(canvas) drawing the parts that
+                    are the same in every frame. It runs once, before draw.
+            precision: Decimal places for coordinates (see Canvas())
+            css_classes: Use CSS classes for styles in frame files (see Canvas())
+            seed: Seed for canvas.random (see Canvas()). Each frame gets
+                  its own random numbers, made from the seed and the frame
+                  number, so a frame draws the same whichever order or
+                  process it is drawn in.
+
+        Raises:
+            ValueError: If frames is less than 1, the size exceeds Canvas
+                        limits or seed is not an int or a str
+
+        For save_frames(processes=...) and sprite_sheet(processes=...), draw
+        and static must be module-level functions so worker processes can
+        import them.
+        """
+        if frames < 1:
+            raise ValueError(f"Animation needs at least 1 frame, got {frames}")
+        Canvas(width, height, seed=seed)  # Validate the size and seed early
+        self.draw = draw
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.background = background
+        self.static = static
+        self.precision = precision
+        self.css_classes = css_classes
+        self.seed = seed
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def __iter__(self):
+        """Yield the canvas of every frame in order."""
+        template = self._template()
+        for index in range(self.frames):
+            yield self._frame_from(template, index)
+
+    def _template(self) -> Canvas:
+        """Canvas with the static layer drawn and rendered once."""
+        can = Canvas(self.width, self.height, self.background,
+                     precision=self.precision, css_classes=self.css_classes, seed=self.seed)
+        if self.static is not None:
+            self.static(can)
+            can.to_svg()  # Fill the segment cache shared by all frames
+        return can
+
+    def _frame_from(self, template: Canvas, index: int) -> Canvas:
+        """Draw frame `index` on a copy of the static template."""
+        can = template.copy()
+        can.random.seed(f"{template.seed}:{index}")
+        self.draw(can, index / self.frames)
+        return can
+
+    def frame(self, index: int) -> Canvas:
+        """
+        Canvas for a single frame.
+
+        Raises:
+            ValueError: If index is outside 0..frames-1
+        """
+        if not 0 <= index < self.frames:
+            raise ValueError(f"Frame {index} out of range (animation has {self.frames} frames)")
+        return self._frame_from(self._template(), index)
+
+    def _map(self, method: str, tasks: List[tuple], processes: Optional[int]) -> list:
+        """Run (index, arg) tasks with the named method, in a process pool if asked."""
+        if not processes or processes <= 1 or len(tasks) < 2:
+            template = self._template()
+            run = getattr(self, method)
+            return [run(template, index, arg) for index, arg in tasks]
+
+        chunksize = max(1, len(tasks) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(self,)) as pool:
+            return list(pool.map(_run_task, [(method, index, arg) for index, arg in tasks],
+                                 chunksize=chunksize))
+
+    def _write_frame(self, template: Canvas, index: int, path: str) -> str:
+        """Render frame `index` to an SVG file."""
+        svg = self._frame_from(template, index).to_svg()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(svg)
+        return path
+
+    def save_frames(self, pattern: str = "frame_{:03d}.svg",
+                    processes: Optional[int] = None) -> List[str]:
+        """
+        Save every frame as its own SVG file.
+
+        Args:
+            pattern: File name with a format field for the frame number,
+                     e.g. "frames/fish_{:03d}.svg". Missing directories are
+                     created.
+            processes: Render frames in this many worker processes (default:
+                       render in this process). Worth it for long sequences
+                       of complex frames.
+
+        Returns:
+            The file names written, in frame order
+        """
+        paths = [pattern.format(index) for index in range(self.frames)]
+        for parent in {Path(path).parent for path in paths}:
+            parent.mkdir(parents=True, exist_ok=True)
+        written = self._map('_write_frame', list(enumerate(paths)), processes)
+        print(f"Saved {len(written)} frames to {pattern}")
+        return written
+
+    def _sprite_cell(self, template: Canvas, index: int, arg=None) -> str:
+        """
+        Markup for one sprite sheet cell.
+
+        Parts of the frame that are unchanged from the static template
+        (the first static ungrouped shapes, and untouched groups with
+        everything nested in them) become <use> references to the copy in
+        the sheet's <defs>.
+        """
+        can = self._frame_from(template, index)
+        fmt = _number_formatter(can.precision)
+        parts = []
+
+        shapes = can.shapes
+        done = len(template.shapes)
+        if done and len(shapes) >= done and shapes[done - 1] is template.shapes[done - 1]:
+            parts.append('<use href="#frame_static"/>')
+            shapes = shapes[done:]
+        parts.extend(can._iter_shapes(shapes, fmt))
+
+        template_segments = template._segments()
+        static_groups = {key: (shapes, opening) for key, shapes, opening, _ in template_segments[1:]}
+        static_children = template._child_segments(template_segments)
+        segments = can._segments()
+        children = can._child_segments(segments)
+        unchanged = set()
+        for key, shapes, opening, _ in reversed(segments[1:]):  # Nested groups first
+            static = static_groups.get(key)
+            nested = [segment[0] for segment in children.get(key, ())]
+            if (static is not None and static[1] == opening and static[0]
+                    and len(static[0]) == len(shapes) and static[0][-1] is shapes[-1]
+                    and nested == [segment[0] for segment in static_children.get(key, ())]
+                    and unchanged.issuperset(nested)):
+                unchanged.add(key)
+
+        depths = []  # Depths of the open <g> elements
+        inside = None  # Depth of the group replaced by <use>, while in it
+        for key, shapes, opening, depth in segments[1:]:
+            if inside is not None and depth > inside:
+                continue
+            inside = None
+            while depths and depths[-1] >= depth:
+                depths.pop()
+                parts.append('</g>')
+            if key in unchanged:
+                parts.append(f'<use href="#frame_static_{key}"/>')
+                inside = depth
+            else:
+                # Drop the id: every cell has its own copy of the group
+                parts.append(opening.replace(f' id="{key}"', '', 1))
+                parts.extend(can._iter_shapes(shapes, fmt))
+                depths.append(depth)
+        parts.append('</g>' * len(depths))
+        return "".join(parts)
+
+    def sprite_sheet(self, columns: Optional[int] = None,
+                     processes: Optional[int] = None) -> str:
+        """
+        All frames tiled into a single SVG, left to right and top to bottom.
+
+        The static layer is written once in <defs> and referenced from
+        every cell, so the sheet grows only by what changes between frames.
+        Styles are always inline attributes here. Gradients and symbols
+        used by the frames should be defined in the static function.
+
+        Args:
+            columns: Frames per row (default: a roughly square grid)
+            processes: Render frames in this many worker processes
+
+        Returns:
+            The sprite sheet SVG string
+        """
+        if columns is None:
+            columns = math.ceil(math.sqrt(self.frames))
+        if columns < 1:
+            raise ValueError(f"Sprite sheet needs at least 1 column, got {columns}")
+        rows = math.ceil(self.frames / columns)
+        cells = self._map('_sprite_cell', [(index, None) for index in range(self.frames)],
+                          processes)
+
+        template = self._template()
+        fmt = _number_formatter(template.precision)
+        defs = list(template.gradients.values())
+        for name, shapes in template.symbols.items():
+            defs.append(f'<g id="sym_{name}">{"".join(template._iter_shapes(shapes, fmt))}</g>')
+        if template.shapes:
+            defs.append(f'<g id="frame_static">{"".join(template._iter_shapes(template.shapes, fmt))}</g>')
+        used = set(re.findall(r'<use href="#frame_static_([^"]+)"/>', "".join(cells)))
+        segments = template._segments()
+        for i, (key, _, _, _) in enumerate(segments):
+            if key not in used:
+                continue
+            # Only the copy in <defs> keeps an id, and it is a new one
+            subtree = [(k, shapes, opening.replace(f' id="{k}"', f' id="frame_static_{k}"' if k == key else '', 1),
+                        depth) for k, shapes, opening, depth in template._subtree_segments(segments, i)]
+            defs.append("".join(template._iter_segments(subtree, fmt, False)))
+
+        w, h = self.width, self.height
+        parts = [f'<svg width="{w * columns}" height="{h * rows}" xmlns="http://www.w3.org/2000/svg">']
+        if defs:
+            parts.append(f"<defs>{''.join(defs)}</defs>")
+        for index, body in enumerate(cells):
+            x, y = (index % columns) * w, (index // columns) * h
+            # A nested <svg> clips each frame to its cell
+            parts.append(f'<svg x="{x}" y="{y}" width="{w}" height="{h}">'
+                         f'<rect width="100%" height="100%" fill="{self.background}"/>{body}</svg>')
+        parts.append('</svg>')
+        return "".join(parts)
+
+    def save_sprite_sheet(self, filename: str, columns: Optional[int] = None,
+                          processes: Optional[int] = None) -> None:
+        """Save the sprite sheet (see sprite_sheet()) to an SVG file."""
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.sprite_sheet(columns, processes))
+        print(f"Saved to {filename}")
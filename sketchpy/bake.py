@@ -0,0 +1,139 @@
+"""
+Transform baking for Canvas.to_svg(bake_transforms=True): group
+transforms written into the shapes' coordinates, so the SVG has no
+transform attributes where the shapes allow it. Not part of the browser
+build.
+"""
+
+import math
+from array import array
+from typing import Dict, List, Tuple
+
+from .canvas import (Canvas, _IDENTITY, _Shape, _Use, _ellipse_path, _flat_records, _mat_mul,
+                     _rounded_rect_path)
+
+
+def _bakeable(m: tuple, records: List[_Shape]) -> bool:
+    """
+    Whether a group's transform can be written into its shapes' coordinates:
+    moves, rotations and uniform scaling (shapes keep their form), and no
+    rotated text (glyphs cannot be rotated without a transform).
+    """
+    a, b, c, d = m[:4]
+    if abs(a - d) > 1e-9 or abs(b + c) > 1e-9 or not (a or b):
+        return False
+    return (abs(b) < 1e-12 and a > 0) or not any(r.tag == 'text' for r in records)
+
+
+def _style_tuple(*style) -> tuple:
+    """Style for a baked record; not interned, so the canvas's styles stay as drawn."""
+    return style
+
+
+def _bake_record(record: _Shape, m: tuple, style_of) -> _Shape:
+    """
+    The record with matrix m applied to its coordinates.
+
+    m must pass _bakeable(). Rectangles and ellipses stay what they are
+    when turned by a multiple of 90 degrees and otherwise become polygons
+    and paths. Results are rounded to 10 decimals, like transform
+    attributes, so a quarter turn does not write 199.99999999999997.
+    style_of(fill, stroke, stroke_width, opacity) returns the style with
+    its stroke scaled.
+    """
+    a, b, c, d, e, f = m
+    scale = math.hypot(a, b)
+    turned = abs(a) < 1e-12  # By 90 or 270 degrees: width and height swap
+    axis_aligned = turned or abs(b) < 1e-12
+    tag = record.tag
+    geom = record.geom
+    unit = abs(scale - 1) < 1e-12
+
+    def scaled(v: float) -> float:
+        return v if unit else round(v * scale, 10)
+
+    fill, stroke, width, opacity = style = record.style
+    if width and not unit:
+        width = scaled(width)
+        # Written as is, unlike coordinates: keep whole widths whole
+        style = style_of(fill, stroke, int(width) if width.is_integer() else width, opacity)
+
+    def points(coords) -> array:
+        out = array('d', coords)
+        for i in range(0, len(out), 2):
+            x, y = out[i], out[i + 1]
+            out[i] = round(a * x + c * y + e, 10)
+            out[i + 1] = round(b * x + d * y + f, 10)
+        return out
+
+    if tag == 'circle':
+        x, y, r = geom
+        x, y = points((x, y))
+        return _Shape('circle', (x, y, scaled(r)), style)
+    if tag == 'line':
+        return _Shape('line', tuple(points(geom)), style)
+    if tag in ('polygon', 'polyline', 'path'):
+        return _Shape(tag, points(geom), style, record.extra)
+    if tag == 'text':
+        x, y, size = geom
+        x, y = points((x, y))
+        return _Shape('text', (x, y, scaled(size)), style, record.extra)
+    if tag == 'use':
+        x, y, angle, size = geom
+        x, y = points((x, y))
+        if b:
+            angle = round(angle + math.degrees(math.atan2(b, a)), 10)
+        return _Use((x, y, angle, scaled(size)),
+                    style, record.extra, record.count)
+    if tag == 'ellipse':
+        cx, cy, rx, ry = geom
+        if axis_aligned:
+            cx, cy = points((cx, cy))
+            if turned:
+                rx, ry = ry, rx
+            return _Shape('ellipse', (cx, cy, scaled(rx), scaled(ry)), style)
+        commands, coords = _ellipse_path(cx, cy, rx, ry)
+        return _Shape('path', points(coords), style, commands)
+    # rect
+    x, y, w, h = geom[:4]
+    if axis_aligned:
+        x0, y0, x1, y1 = points((x, y, x + w, y + h))
+        rounded = tuple(scaled(v) for v in (geom[4:][::-1] if turned else geom[4:]))
+        return _Shape('rect', (min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0)) + rounded, style)
+    if len(geom) == 6:
+        commands, coords = _rounded_rect_path(x, y, w, h, geom[4], geom[5])
+        return _Shape('path', points(coords), style, commands)
+    return _Shape('polygon', points((x, y, x + w, y, x + w, y + h, x, y + h)), style)
+
+
+def bake_plan(canvas: Canvas, segments: List[tuple]) -> Tuple[Dict[str, tuple], Dict[str, str]]:
+    """
+    Transforms to write into shape coordinates: (matrices, openings).
+
+    A group is baked with its transform combined with those of the
+    baked groups around it, if _bakeable allows; its <g> then carries
+    no transform. A group that cannot be baked inside a baked one
+    takes the combined transform as its attribute instead. Animated
+    groups keep their transform, since the animation adds to it.
+    Openings holds the <g> tags that change.
+    """
+    matrices = {}
+    openings = {}
+    for key, shapes, _, _ in segments[1:]:
+        matrix = canvas.group_transforms[key]
+        parent = canvas.group_parents[key]
+        if parent in matrices:
+            matrix = _mat_mul(matrices[parent], matrix)
+        if matrix == _IDENTITY:
+            continue
+        if key not in canvas.group_animations and _bakeable(matrix, _flat_records(shapes)):
+            matrices[key] = matrix
+            openings[key] = f'<g id="{key}">'
+        elif parent in matrices:
+            openings[key] = canvas._group_opening(key, matrix)
+    return matrices, openings
+
+
+def bake_records(records: List[_Shape], m: tuple) -> List[_Shape]:
+    """Records of a group baked by bake_plan(), with its matrix m applied."""
+    return [_bake_record(record, m, _style_tuple) for record in records]
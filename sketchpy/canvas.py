@@ -3,62 +3,1207 @@ Canvas - main drawing surface with SVG rendering.
 """
 
 from typing import List, Tuple, Optional, Dict, Union
+from array import array
+import copy
+import functools
+import importlib
+import io
 import math
 import random
+import re
+import zlib
 
 # Import palettes (will be available when combined for browser)
 from .palettes import Color
 
 
-def _bezier_points(p0: Tuple[float, float], p1: Tuple[float, float],
-                   p2: Tuple[float, float], p3: Optional[Tuple[float, float]] = None,
-                   steps: int = 50) -> List[Tuple[float, float]]:
-    """
-    Generate points along a Bézier curve.
+# Geometry kernel: Bézier sampling and offset outlines for many curves at
+# once, as NumPy array operations when NumPy is installed and in plain
+# Python otherwise. Both do the same arithmetic in the same order, so they
+# produce identical coordinates. The browser worker doesn't load Pyodide's
+# NumPy package, so in the browser the plain-Python path always runs.
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
 
-    Args:
-        p0: Start point (x, y)
-        p1: First control point (x, y)
-        p2: Second control point (x, y) [or end point if quadratic]
-        p3: End point (x, y) [None for quadratic]
-        steps: Number of sample points
+_GEOMETRY_BACKEND = 'python' if _np is None else 'numpy'
 
-    Returns:
-        List of (x, y) tuples along the curve
+# Below this many curves the fixed cost of the array operations outweighs
+# the work they save, so small batches stay in plain Python
+_NUMPY_MIN_CURVES = 12
+
+
+@functools.lru_cache(maxsize=16)
+def _bernstein(steps: int) -> tuple:
+    """
+    Cubic Bernstein basis at t = 0, 1/steps, ..., 1: one row per t of
+    (t, value weights b0-b3, first derivative d0-d3, second s0-s3).
     """
-    points = []
+    rows = []
     for i in range(steps + 1):
         t = i / steps
-        if p3 is None:  # Quadratic
-            x = (1-t)**2 * p0[0] + 2*(1-t)*t * p1[0] + t**2 * p2[0]
-            y = (1-t)**2 * p0[1] + 2*(1-t)*t * p1[1] + t**2 * p2[1]
-        else:  # Cubic
-            x = (1-t)**3 * p0[0] + 3*(1-t)**2*t * p1[0] + 3*(1-t)*t**2 * p2[0] + t**3 * p3[0]
-            y = (1-t)**3 * p0[1] + 3*(1-t)**2*t * p1[1] + 3*(1-t)*t**2 * p2[1] + t**3 * p3[1]
-        points.append((x, y))
+        mt = 1 - t
+        rows.append((t, mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t,
+                     -3 * mt * mt, 3 * mt * (mt - 2 * t), 3 * t * (2 * mt - t), 3 * t * t,
+                     6 * mt, 6 * (t - 2 * mt), 6 * (mt - 2 * t), 6 * t))
+    return tuple(rows)
+
+
+@functools.lru_cache(maxsize=16)
+def _bernstein_columns(steps: int) -> tuple:
+    """The 13 columns of _bernstein(steps) as NumPy arrays."""
+    return tuple(_np.array(column) for column in zip(*_bernstein(steps)))
+
+
+def _cubic(ctrl: Tuple) -> Tuple:
+    """Control points of a quadratic Bézier as the same curve in cubic form."""
+    if len(ctrl) == 4:
+        return ctrl
+    (x0, y0), (x1, y1), (x2, y2) = ctrl
+    return ((x0, y0), (x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3),
+            (x2 + 2 * (x1 - x2) / 3, y2 + 2 * (y1 - y2) / 3), (x2, y2))
+
+
+def _cubic_point(ctrl: Tuple):
+    """Function t -> (x, y) on a quadratic or cubic Bézier curve."""
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = _cubic(ctrl)
+
+    def point(t: float) -> Tuple[float, float]:
+        mt = 1 - t
+        b0, b1, b2, b3 = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        return (b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3, b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3)
+    return point
+
+
+# Most halvings _flatten_curve() makes of one interval (1024 pieces)
+_MAX_FLATTEN_DEPTH = 10
+
+
+def _flatten_curve(point, tolerance: float) -> List[Tuple[float, float, float]]:
+    """
+    Points (t, x, y) along a parametric curve point(t) -> (x, y) for t in
+    [0, 1], such that the polyline through them stays within tolerance
+    of the curve.
+
+    An interval is halved until the curve a quarter, half and three
+    quarters of the way along lies within tolerance of its chord, so
+    straight or small stretches get few points and large bends many.
+    """
+    tolerance_sq = tolerance * tolerance
+    start = (0.0, *point(0.0))
+    points = [start]
+    stack = [(start, (0.5, *point(0.5)), (1.0, *point(1.0)), 0)]
+    while stack:
+        a, m, b, depth = stack.pop()
+        _, ax, ay = a
+        _, bx, by = b
+        q1 = ((a[0] + m[0]) / 2, *point((a[0] + m[0]) / 2))
+        q3 = ((m[0] + b[0]) / 2, *point((m[0] + b[0]) / 2))
+        cx, cy = bx - ax, by - ay
+        chord_sq = cx * cx + cy * cy
+        for _, qx, qy in (q1, m, q3):
+            if chord_sq > 0:
+                cross = cx * (qy - ay) - cy * (qx - ax)
+                off_sq = cross * cross / chord_sq
+            else:
+                off_sq = (qx - ax) ** 2 + (qy - ay) ** 2
+            if off_sq > tolerance_sq and depth < _MAX_FLATTEN_DEPTH:
+                # Right half goes on the stack first so the left is emitted first
+                stack.append((m, q3, b, depth + 1))
+                stack.append((a, q1, m, depth + 1))
+                break
+        else:
+            points.append(b)
     return points
 
 
+def _outline_commands(segments: int) -> str:
+    """Path commands of an offset outline: one side forward, the other back."""
+    return "M" + "C" * segments + "L" + "C" * segments + "Z"
+
+
+# Most cubic segments each side of an offset outline is split into
+_MAX_OUTLINE_SEGMENTS = 16
+
+
+def _offset_outlines_py(ctrls: List[Tuple], start_widths: List[float],
+                        end_widths: List[float], tolerance: float) -> list:
+    """_offset_outlines() in plain Python, one curve and sample at a time."""
+    tolerance_sq = tolerance * tolerance
+    outlines = []
+    for ctrl, start_width, end_width in zip(ctrls, start_widths, end_widths):
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = _cubic(ctrl)
+        dh = (end_width - start_width) / 2
+
+        def sample(row):
+            """Point and derivative on the +normal then -normal side, or None."""
+            t, b0, b1, b2, b3, d0, d1, d2, d3, s0, s1, s2, s3 = row
+            dx = d0 * x0 + d1 * x1 + d2 * x2 + d3 * x3
+            dy = d0 * y0 + d1 * y1 + d2 * y2 + d3 * y3
+            speed_sq = dx * dx + dy * dy
+            if speed_sq < 1e-12:
+                return None
+            speed = math.sqrt(speed_sq)
+            tx, ty = dx / speed, dy / speed
+            h = (start_width * (1 - t) + end_width * t) / 2
+            ddx = s0 * x0 + s1 * x1 + s2 * x2 + s3 * x3
+            ddy = s0 * y0 + s1 * y1 + s2 * y2 + s3 * y3
+            turn = (dx * ddy - dy * ddx) / speed_sq  # curvature * speed
+            if h * abs(turn) >= speed:
+                return None
+            # Offset point C +- h*N with N = (-ty, tx), and its derivative
+            # using dN/dt = -turn * T
+            x = b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3
+            y = b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3
+            hx, hy = h * -ty, h * tx
+            vx = dh * -ty - h * turn * tx
+            vy = dh * tx - h * turn * ty
+            return (x + hx, y + hy, dx + vx, dy + vy, x - hx, y - hy, dx - vx, dy - vy)
+
+        # Halve every segment until each one's midpoint is within tolerance
+        samples = [sample(row) for row in _bernstein(1)]
+        segments = 1
+        while None not in samples and segments < _MAX_OUTLINE_SEGMENTS:
+            mids = [sample(row) for row in _bernstein(2 * segments)[1::2]]
+            if None in mids:
+                samples = mids
+                break
+            eighth = 1 / (8 * segments)
+            if all(((p[o] + q[o]) / 2 + (p[o + 2] - q[o + 2]) * eighth - m[o]) ** 2
+                   + ((p[o + 1] + q[o + 1]) / 2 + (p[o + 3] - q[o + 3]) * eighth - m[o + 1]) ** 2
+                   <= tolerance_sq
+                   for p, q, m in zip(samples, samples[1:], mids) for o in (0, 4)):
+                break
+            merged = [None] * (2 * segments + 1)
+            merged[::2] = samples
+            merged[1::2] = mids
+            samples = merged
+            segments *= 2
+        if None in samples:
+            outlines.append(None)
+            continue
+
+        third = 1 / (3 * segments)
+        coords = [samples[0][0], samples[0][1]]
+        for p, q in zip(samples, samples[1:]):
+            coords += [p[0] + p[2] * third, p[1] + p[3] * third,
+                       q[0] - q[2] * third, q[1] - q[3] * third, q[0], q[1]]
+        coords += [samples[-1][4], samples[-1][5]]
+        for p, q in zip(samples[::-1], samples[-2::-1]):
+            coords += [p[4] - p[6] * third, p[5] - p[7] * third,
+                       q[4] + q[6] * third, q[5] + q[7] * third, q[4], q[5]]
+        outlines.append((_outline_commands(segments), coords))
+    return outlines
+
+
+def _offset_samples_np(coef, start_width, end_width, columns: tuple) -> tuple:
+    """
+    Offset samples of many curves at the t values of some _bernstein()
+    rows: an (8, curves, samples) array of point and derivative on the
+    +normal then -normal side, and a flag per curve that folds or stalls.
+    """
+    t, b0, b1, b2, b3, d0, d1, d2, d3, s0, s1, s2, s3 = columns
+    x0, y0, x1, y1, x2, y2, x3, y3 = coef  # Each (curves, 1)
+    dh = (end_width - start_width) / 2
+
+    dx = d0 * x0 + d1 * x1 + d2 * x2 + d3 * x3
+    dy = d0 * y0 + d1 * y1 + d2 * y2 + d3 * y3
+    speed_sq = dx * dx + dy * dy
+    bad = (speed_sq < 1e-12).any(axis=1)
+    speed_sq[bad] = 1.0  # Keep the arithmetic finite; these curves return None
+    speed = _np.sqrt(speed_sq)
+    tx, ty = dx / speed, dy / speed
+    h = (start_width * (1 - t) + end_width * t) / 2
+    ddx = s0 * x0 + s1 * x1 + s2 * x2 + s3 * x3
+    ddy = s0 * y0 + s1 * y1 + s2 * y2 + s3 * y3
+    turn = (dx * ddy - dy * ddx) / speed_sq
+    bad |= (h * _np.abs(turn) >= speed).any(axis=1)
+    x = b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3
+    y = b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3
+    hx, hy = h * -ty, h * tx
+    vx = dh * -ty - h * turn * tx
+    vy = dh * tx - h * turn * ty
+    return _np.stack((x + hx, y + hy, dx + vx, dy + vy, x - hx, y - hy, dx - vx, dy - vy)), bad
+
+
+def _outline_coords_np(samples, segments: int) -> list:
+    """Outline coordinates for (8, curves, segments + 1) offset samples."""
+    curves = samples.shape[1]
+    third = 1 / (3 * segments)
+    n = 6 * segments
+    coords = _np.empty((curves, 4 + 2 * n))
+    # The -normal side is walked backwards, which flips its tangents
+    sides = (samples[:4], (samples[4][:, ::-1], samples[5][:, ::-1],
+                           -samples[6][:, ::-1], -samples[7][:, ::-1]))
+    for start, (sx, sy, sdx, sdy) in zip((0, 2 + n), sides):
+        coords[:, start] = sx[:, 0]
+        coords[:, start + 1] = sy[:, 0]
+        block = coords[:, start + 2:start + 2 + n].reshape(curves, segments, 6)
+        block[:, :, 0] = sx[:, :-1] + sdx[:, :-1] * third
+        block[:, :, 1] = sy[:, :-1] + sdy[:, :-1] * third
+        block[:, :, 2] = sx[:, 1:] - sdx[:, 1:] * third
+        block[:, :, 3] = sy[:, 1:] - sdy[:, 1:] * third
+        block[:, :, 4] = sx[:, 1:]
+        block[:, :, 5] = sy[:, 1:]
+    return [array('d', row.tobytes()) for row in coords]
+
+
+def _offset_outlines_np(ctrls: List[Tuple], start_widths: List[float],
+                        end_widths: List[float], tolerance: float) -> list:
+    """_offset_outlines() as NumPy operations on (curves, samples) arrays."""
+    tolerance_sq = tolerance * tolerance
+    outlines: list = [None] * len(ctrls)
+    active = _np.arange(len(ctrls))  # Curves still being subdivided
+    coef = _np.array([_cubic(c) for c in ctrls], dtype=float).reshape(len(ctrls), 8, 1)
+    coef = coef.transpose(1, 0, 2)
+    start_width = _np.array(start_widths, dtype=float)[:, None]
+    end_width = _np.array(end_widths, dtype=float)[:, None]
+    samples, bad = _offset_samples_np(coef, start_width, end_width, _bernstein_columns(1))
+    segments = 1
+    while True:
+        keep = ~bad
+        active, samples, coef = active[keep], samples[:, keep], coef[:, keep]
+        start_width, end_width = start_width[keep], end_width[keep]
+        if not len(active):
+            break
+        if segments == _MAX_OUTLINE_SEGMENTS:
+            done = _np.ones(len(active), dtype=bool)
+        else:
+            columns = tuple(column[1::2] for column in _bernstein_columns(2 * segments))
+            mids, bad = _offset_samples_np(coef, start_width, end_width, columns)
+            eighth = 1 / (8 * segments)
+            p, q = samples[:, :, :-1], samples[:, :, 1:]
+            done = ~bad
+            for o in (0, 4):
+                ex = (p[o] + q[o]) / 2 + (p[o + 2] - q[o + 2]) * eighth - mids[o]
+                ey = (p[o + 1] + q[o + 1]) / 2 + (p[o + 3] - q[o + 3]) * eighth - mids[o + 1]
+                done &= (ex ** 2 + ey ** 2 <= tolerance_sq).all(axis=1)
+        if done.any():
+            commands = _outline_commands(segments)
+            for index, coords in zip(active[done].tolist(), _outline_coords_np(samples[:, done], segments)):
+                outlines[index] = (commands, coords)
+        rest = ~done
+        if segments == _MAX_OUTLINE_SEGMENTS or not rest.any():
+            break
+        merged = _np.empty((8, int(rest.sum()), 2 * segments + 1))
+        merged[:, :, ::2] = samples[:, rest]
+        merged[:, :, 1::2] = mids[:, rest]
+        active, samples, bad, coef = active[rest], merged, bad[rest], coef[:, rest]
+        start_width, end_width = start_width[rest], end_width[rest]
+        segments *= 2
+    return outlines
+
+
+def _offset_outlines(ctrls: List[Tuple], start_widths: List[float],
+                     end_widths: List[float], tolerance: float) -> list:
+    """
+    Closed outlines around Bézier centerlines whose width changes linearly,
+    as cubic path segments.
+
+    Each side is the centerline offset along its normal by half the width.
+    Offset points and their exact derivatives are joined with cubic
+    Hermite segments. Segments are halved (up to _MAX_OUTLINE_SEGMENTS
+    per side) until each one passes within tolerance of the true offset
+    curve at its midpoint, so small or gently curved outlines need only
+    one or two.
+
+    Args:
+        ctrls: Control points of each centerline (3 for a quadratic, 4 for a cubic)
+        start_widths, end_widths: Width of each outline at t=0 and t=1
+        tolerance: Largest distance from the true outline, in pixels
+
+    Returns:
+        (commands, coords) for a 'path' record per curve, or None where
+        the offset is ill-behaved (zero-length tangent, or the outline
+        folds over itself where the curve bends tighter than its half
+        width) and the caller should fall back to sampling.
+    """
+    if _np is None or len(ctrls) < _NUMPY_MIN_CURVES:
+        return _offset_outlines_py(ctrls, start_widths, end_widths, tolerance)
+    return _offset_outlines_np(ctrls, start_widths, end_widths, tolerance)
+
+
+@functools.lru_cache(maxsize=16)
+def _unit_circle(points: int) -> Tuple[Tuple[float, float], ...]:
+    """(cos, sin) of points evenly spaced angles, starting at 0."""
+    return tuple((math.cos(i / points * 2 * math.pi), math.sin(i / points * 2 * math.pi))
+                 for i in range(points))
+
+
+@functools.lru_cache(maxsize=16)
+def _wave_table(waves: float) -> Tuple[Tuple[float, float, float], ...]:
+    """(t, sin, d(sin)/dt) at the joints of a wave's quarter-wave segments."""
+    segments = max(1, math.ceil(waves * 4))
+    freq = waves * 2 * math.pi
+    return tuple((i / segments, math.sin(i / segments * freq),
+                  freq * math.cos(i / segments * freq))
+                 for i in range(segments + 1))
+
+
+@functools.lru_cache(maxsize=64)
+def _pear_outline(width: float, height: float, tolerance: float) -> Tuple[Tuple[float, float], ...]:
+    """
+    Pear outline as (dx, dy) offsets from the top center: right side top
+    to bottom, then the left side back up, flattened within tolerance.
+    """
+    # (top, bottom, top width, bottom width) of each section, as fractions
+    sections = (
+        (0.0, 0.3, 0.75, 1.0, lambda t: math.sin(t * math.pi / 2)),  # Rounded top
+        (0.3, 0.6, 1.0, 0.65, lambda t: 1),  # Shoulder to waist
+        (0.6, 1.0, 0.65, 0.62, lambda t: 1 - 0.3 * (1 - (1 - t)**2)),  # Smooth taper to the base
+    )
+    right = [(0.0, 0.0)]
+    for top, bottom, top_width, bottom_width, shape in sections:
+        def point(t, top=top, bottom=bottom, top_width=top_width,
+                  bottom_width=bottom_width, shape=shape):
+            return (width * (top_width + (bottom_width - top_width) * t) / 2 * shape(t),
+                    height * (top + (bottom - top) * t))
+        right += [(x, y) for _, x, y in _flatten_curve(point, tolerance)[1:]]
+    # Mirror for the left side, leaving out the shared top point
+    return tuple(right + [(-x, y) for x, y in right[:0:-1]])
+
+
+def _tentacle_ctrl(x1: float, y1: float, x2: float, y2: float,
+                   curl: float, twist: float) -> Tuple:
+    """Bézier control points of a tentacle's centerline (see Canvas.tentacle)."""
+    # Calculate perpendicular direction for control points
+    dx = x2 - x1
+    dy = y2 - y1
+    distance = math.sqrt(dx**2 + dy**2)
+
+    # Perpendicular vector (rotated 90 degrees)
+    perp_x = -dy
+    perp_y = dx
+    perp_len = math.sqrt(perp_x**2 + perp_y**2)
+    if perp_len > 0:
+        perp_x /= perp_len
+        perp_y /= perp_len
+
+    if twist > 0:
+        # Use cubic Bézier for S-curve (two control points)
+        # First control point: 1/3 along, offset in curl direction
+        curl_distance1 = distance * abs(curl) * 0.4
+        cx1 = x1 + dx * 0.33 + perp_x * curl_distance1 * (1 if curl > 0 else -1)
+        cy1 = y1 + dy * 0.33 + perp_y * curl_distance1 * (1 if curl > 0 else -1)
+
+        # Second control point: 2/3 along, offset in OPPOSITE direction (creates S)
+        curl_distance2 = distance * abs(curl) * 0.4 * twist
+        cx2 = x1 + dx * 0.67 - perp_x * curl_distance2 * (1 if curl > 0 else -1)
+        cy2 = y1 + dy * 0.67 - perp_y * curl_distance2 * (1 if curl > 0 else -1)
+
+        return ((x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2))
+
+    # Use quadratic Bézier for simple curve (one control point)
+    curl_distance = distance * abs(curl) * 0.5
+    cx = (x1 + x2) / 2 + perp_x * curl_distance * (1 if curl > 0 else -1)
+    cy = (y1 + y2) / 2 + perp_y * curl_distance * (1 if curl > 0 else -1)
+    return ((x1, y1), (cx, cy), (x2, y2))
+
+
+# How far a miter join may reach, in half widths; sharper turns get a bevel
+_MITER_LIMIT = 2.0
+
+
+def _polyline_outline(points: List[Tuple[float, float]],
+                      widths: List[float]) -> List[Tuple[float, float]]:
+    """
+    Closed outline polygon around a centerline polyline with a width at
+    each point: the left side forward, then the right side back.
+
+    The direction of every segment is computed once and shared by both
+    sides. At a turn the outer side gets a miter point, or a bevel when
+    the turn is sharper than _MITER_LIMIT allows. The inner side uses
+    its miter point only for gentle turns that stay well within both
+    segments; otherwise it runs through the centerline point. That keeps every overlap
+    wound the same way, so the nonzero fill rule covers sharp corners
+    and tight curls without spikes or holes.
+    """
+    # Repeated points have no direction
+    kept = [0]
+    for i in range(1, len(points)):
+        if points[i] != points[kept[-1]]:
+            kept.append(i)
+    if len(kept) < 2:
+        return []
+    points = [points[i] for i in kept]
+    halves = [max(widths[i], 0) / 2 for i in kept]
+
+    directions = []
+    lengths = []
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        length = math.sqrt((x1 - x0)**2 + (y1 - y0)**2)
+        directions.append(((x1 - x0) / length, (y1 - y0) / length))
+        lengths.append(length)
+
+    left, right = [], []
+    last = len(points) - 1
+    for i, ((x, y), h) in enumerate(zip(points, halves)):
+        ax, ay = directions[max(i - 1, 0)]
+        bx, by = directions[min(i, last - 1)]
+        cos_half = math.sqrt(max(1 + ax * bx + ay * by, 0) / 2)
+        turn = ax * by - ay * bx  # > 0: turning towards the left side
+        # Miter point: along the bisector, far enough to keep the width
+        mx, my = ax + bx, ay + by
+        norm = math.sqrt(mx * mx + my * my)
+        if norm > 1e-12:
+            scale = h / (cos_half * norm)
+            miter_left = (x - my * scale, y + mx * scale)
+            miter_right = (x + my * scale, y - mx * scale)
+        # Outer side: miter, or bevel between the two segment offsets
+        if cos_half * _MITER_LIMIT >= 1:
+            outer = [miter_left if turn <= 0 else miter_right]
+        else:
+            outer = [(x - ay * h, y + ax * h), (x - by * h, y + bx * h)]
+            if turn > 0:
+                outer = [(2 * x - px, 2 * y - py) for px, py in outer]
+        # Inner side: miter for gentle turns that stay well within both
+        # segments, else pivot through the centerline point
+        inset = h * math.sqrt(max(1 - cos_half * cos_half, 0)) / max(cos_half, 1e-12)
+        if 0 < i < last and (inset > h or 2 * inset > min(lengths[i - 1], lengths[i])):
+            inner = [(x - ay * h, y + ax * h), (x, y), (x - by * h, y + bx * h)]
+            if turn <= 0:
+                inner = [(2 * x - px, 2 * y - py) for px, py in inner]
+        else:
+            inner = [miter_right if turn <= 0 else miter_left]
+        if turn > 0:
+            left += inner
+            right += outer
+        else:
+            left += outer
+            right += inner
+    return left + right[::-1]
+
+
+def _sampled_outline(ctrl: Tuple, start_width: float, end_width: float,
+                     tolerance: float) -> List[Tuple[float, float]]:
+    """
+    Outline polygon around a Bézier centerline from its flattened points,
+    for where _offset_outlines() gives up.
+    """
+    centerline = _flatten_curve(_cubic_point(ctrl), tolerance)
+    return _polyline_outline([(x, y) for _, x, y in centerline],
+                             [start_width * (1 - t) + end_width * t for t, _, _ in centerline])
+
+
+def _smooth_curves(points: List[Tuple[float, float]]) -> List[Tuple]:
+    """Cubic Bézier control points of a smooth curve through points (Catmull-Rom)."""
+    ends = [points[0], *points, points[-1]]
+    curves = []
+    for (x0, y0), (x1, y1), (x2, y2), (x3, y3) in zip(ends, ends[1:], ends[2:], ends[3:]):
+        curves.append(((x1, y1), (x1 + (x2 - x0) / 6, y1 + (y2 - y0) / 6),
+                       (x2 - (x3 - x1) / 6, y2 - (y3 - y1) / 6), (x2, y2)))
+    return curves
+
+
+def _local_module(name: str, feature: str):
+    """
+    Import a sketchpy module that the browser build leaves out. The
+    browser bundle is not a package, so there it says what is missing.
+    """
+    if not __package__:
+        raise RuntimeError(f"{feature} is not available in the browser")
+    return importlib.import_module(f'.{name}', __package__)
+
+
+def _check_tolerance(tolerance: float) -> float:
+    """Validate a flattening tolerance (see Canvas.TOLERANCE)."""
+    if isinstance(tolerance, bool) or not isinstance(tolerance, (int, float)) or not tolerance > 0:
+        raise ValueError(f"tolerance must be a positive number of pixels, got {tolerance!r}")
+    return tolerance
+
+
+def _num(value) -> str:
+    """Format a number for SVG exactly, printing integral floats without '.0'."""
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return float.__repr__(value)
+    return str(value)
+
+
+def _number_formatter(precision: Optional[int]):
+    """
+    Return the number formatter used when writing SVG.
+
+    None keeps full precision (_num). Otherwise floats are rounded to
+    `precision` decimals, trailing zeros are dropped and integral values
+    are printed without a decimal part: 123.45678 -> '123.46', 100.0 -> '100'.
+    """
+    if precision is None:
+        return _num
+    if not isinstance(precision, int) or precision < 0:
+        raise ValueError(f"precision must be a non-negative integer or None, got {precision!r}")
+
+    def fmt(value):
+        if isinstance(value, float):
+            value = round(value, precision)
+            if value.is_integer():
+                return str(int(value))
+            return float.__repr__(value)
+        return str(value)
+
+    return fmt
+
+
+def _points_str(coords: array, fmt) -> str:
+    """Format a flat [x0, y0, x1, y1, ...] coordinate array as SVG points."""
+    nums = list(map(fmt, coords))
+    return " ".join([f"{x},{y}" for x, y in zip(nums[0::2], nums[1::2])])
+
+
+class _Shape:
+    """
+    One entry in the canvas display list.
+
+    Shapes are stored as plain data and only turned into SVG in to_svg(),
+    so a large drawing keeps numbers instead of megabytes of markup.
+
+    Attributes:
+        tag: SVG element name ('rect', 'circle', 'polygon', ...)
+        geom: Geometry - a tuple of numbers, or a flat array('d') of
+              x, y pairs for polygons and polylines
+        style: Interned (fill, stroke, stroke_width, opacity) tuple shared
+               by every shape drawn with the same style
+        extra: Tag-specific data, e.g. (font, text) for text or the
+               command letters ('MQQZ') for a path
+        count: Number of drawn shapes the record stands for (1, more for
+               batches and symbol stamps)
+    """
+
+    __slots__ = ('tag', 'geom', 'style', 'extra')
+    count = 1
+
+    def __init__(self, tag: str, geom, style: tuple, extra=None):
+        self.tag = tag
+        self.geom = geom
+        self.style = style
+        self.extra = extra
+
+    def __repr__(self):
+        return f"_Shape({self.tag!r}, {self.geom!r}, {self.style!r})"
+
+
+def _svg_rect(geom, attrs: str, extra, f) -> str:
+    if len(geom) == 6:
+        x, y, w, h, rx, ry = geom
+        return f'<rect x="{f(x)}" y="{f(y)}" width="{f(w)}" height="{f(h)}" rx="{f(rx)}" ry="{f(ry)}" {attrs}/>'
+    x, y, w, h = geom
+    return f'<rect x="{f(x)}" y="{f(y)}" width="{f(w)}" height="{f(h)}" {attrs}/>'
+
+
+def _svg_circle(geom, attrs: str, extra, f) -> str:
+    x, y, r = geom
+    return f'<circle cx="{f(x)}" cy="{f(y)}" r="{f(r)}" {attrs}/>'
+
+
+def _svg_ellipse(geom, attrs: str, extra, f) -> str:
+    x, y, rx, ry = geom
+    return f'<ellipse cx="{f(x)}" cy="{f(y)}" rx="{f(rx)}" ry="{f(ry)}" {attrs}/>'
+
+
+def _svg_line(geom, attrs: str, extra, f) -> str:
+    x1, y1, x2, y2 = geom
+    return f'<line x1="{f(x1)}" y1="{f(y1)}" x2="{f(x2)}" y2="{f(y2)}" {attrs}/>'
+
+
+def _svg_polygon(geom, attrs: str, extra, f) -> str:
+    return f'<polygon points="{_points_str(geom, f)}" {attrs}/>'
+
+
+def _svg_polyline(geom, attrs: str, extra, f) -> str:
+    return f'<polyline points="{_points_str(geom, f)}" {attrs}/>'
+
+
+# Coordinates consumed by each SVG path command
+_PATH_ARITY = {'M': 2, 'L': 2, 'Q': 4, 'C': 6, 'Z': 0}
+
+
+def _path_d(commands: str, coords, f) -> str:
+    """
+    Build a path 'd' string from command letters and their flat coordinates.
+
+    Coordinates are stored absolute. A command with short numbers is
+    written in relative form ('l20-5' for 'L120 95', 'h20' for a level
+    line) when that is shorter and each offset, added to the previous
+    point, gives back the absolute number as written (up to float
+    rounding), so long outlines do not drift. Only short numbers are
+    tried: offsets of full-precision floats are just as long.
+    """
+    nums = list(map(f, coords))
+    values = None  # The written numbers, parsed back when first needed
+    parts = []
+    end = start = 0  # Index after the current point's numbers, and after the subpath start's
+    i = 0
+    for command in commands:
+        n = _PATH_ARITY[command]
+        if not n:
+            parts.append(command)
+            end = start
+            continue
+        absolute = nums[i:i + n]
+        part = None
+        if end and len(absolute[0]) < 8:
+            if values is None:
+                values = list(map(float, nums))
+            x, y = values[end - 2], values[end - 1]
+            relative = []
+            for k in range(i, i + n, 2):
+                rx, ry = f(values[k] - x), f(values[k + 1] - y)
+                if (abs(float(rx) + x - values[k]) > 1e-9 * (1 + abs(x))
+                        or abs(float(ry) + y - values[k + 1]) > 1e-9 * (1 + abs(y))):
+                    break
+                relative += (rx, ry)
+            else:
+                text = " ".join(absolute).replace(" -", "-")
+                shorter = " ".join(relative).replace(" -", "-")
+                part = command.lower() + shorter if len(shorter) < len(text) else command + text
+                if command == 'L' and "0" in relative:  # Level or upright: 'h40', 'v-20'
+                    part = "v" + relative[1] if relative[0] == "0" else "h" + relative[0]
+        parts.append(part or command + " ".join(absolute))
+        i += n
+        end = i
+        if command == 'M':
+            start = i
+    return "".join(parts)
+
+
+def _svg_path(geom, attrs: str, extra, f) -> str:
+    return f'<path d="{_path_d(extra, geom, f)}" {attrs}/>'
+
+
+def _svg_text(geom, attrs: str, extra, f) -> str:
+    x, y, size = geom
+    font, text = extra
+    return f'<text x="{f(x)}" y="{f(y)}" font-size="{size}" {attrs} font-family="{font}">{text}</text>'
+
+
+class _ShapeBatch(_Shape):
+    """
+    Many shapes of one kind and one style from a single batch call
+    (Canvas.circles, rects, lines), stored column-wise.
+
+    The tag is the plural element name ('circles'), geom is a tuple of
+    array('d') columns (e.g. xs, ys, radii) and count is the number of
+    shapes it stands for.
+    """
+
+    __slots__ = ('count',)
+
+    def __init__(self, tag: str, columns: tuple, style: tuple):
+        super().__init__(tag, columns, style)
+        self.count = len(columns[0])
+
+    def expand(self) -> List[_Shape]:
+        """Per-shape records equivalent to this batch."""
+        tag = _BATCH_TAGS[self.tag]
+        style = self.style
+        return [_Shape(tag, geom, style) for geom in zip(*self.geom)]
+
+
+class _Use(_Shape):
+    """
+    A placed copy of a symbol (Canvas.stamp).
+
+    geom is (x, y, angle, scale), extra is the symbol name and count is
+    the number of shapes in the symbol, so stamps count toward the shape
+    limit like the shapes they display.
+    """
+
+    __slots__ = ('count',)
+
+    def __init__(self, geom: tuple, style: tuple, name: str, count: int):
+        super().__init__('use', geom, style, name)
+        self.count = count
+
+
+def _svg_use(geom, attrs: str, extra, f) -> str:
+    x, y, angle, scale = geom
+    parts = []
+    if x or y:
+        parts.append(f"translate({f(x)} {f(y)})")
+    if angle:
+        parts.append(f"rotate({f(angle)})")
+    if scale != 1:
+        parts.append(f"scale({f(scale)})")
+    transform = f' transform="{" ".join(parts)}"' if parts else ""
+    return f'<use href="#sym_{extra}"{transform}/>'
+
+
+def _svg_circles(geom, attrs: str, extra, f) -> str:
+    return "".join([f'<circle cx="{f(x)}" cy="{f(y)}" r="{f(r)}" {attrs}/>'
+                    for x, y, r in zip(*geom)])
+
+
+def _svg_rects(geom, attrs: str, extra, f) -> str:
+    return "".join([f'<rect x="{f(x)}" y="{f(y)}" width="{f(w)}" height="{f(h)}" {attrs}/>'
+                    for x, y, w, h in zip(*geom)])
+
+
+def _svg_lines(geom, attrs: str, extra, f) -> str:
+    return "".join([f'<line x1="{f(x1)}" y1="{f(y1)}" x2="{f(x2)}" y2="{f(y2)}" {attrs}/>'
+                    for x1, y1, x2, y2 in zip(*geom)])
+
+
+# Batch record tag -> tag of the individual shapes it holds
+_BATCH_TAGS = {'circles': 'circle', 'rects': 'rect', 'lines': 'line'}
+
+
+def _column(value, n: int, name: str) -> list:
+    """
+    Turn a batch geometry argument into a list of n numbers.
+
+    Scalars are repeated n times; sequences and NumPy arrays must have
+    exactly n values.
+    """
+    if not hasattr(value, '__len__'):
+        return [value] * n
+    if len(value) != n:
+        raise ValueError(f"{name} has {len(value)} values, expected {n}")
+    tolist = getattr(value, 'tolist', None)  # NumPy arrays
+    return tolist() if tolist is not None else list(value)
+
+
+def _is_per_shape(value) -> bool:
+    """True for a per-shape style sequence (strings count as one value)."""
+    return hasattr(value, '__len__') and not isinstance(value, str)
+
+
+def _style_columns(styles: tuple, n: int) -> list:
+    """Broadcast batch style values to lists of n values each."""
+    columns = []
+    for value in styles:
+        if not _is_per_shape(value):
+            columns.append([value] * n)
+        elif len(value) != n:
+            raise ValueError(f"style has {len(value)} values, expected {n}")
+        else:
+            columns.append(list(value))
+    return columns
+
+
+# Shapes rendered per chunk by Canvas.iter_svg() (bounds peak memory)
+_SVG_CHUNK_SHAPES = 500
+
+# tag -> function(geom, style_attrs, extra, number_formatter) producing the SVG element
+_SVG_WRITERS = {
+    'rect': _svg_rect,
+    'circle': _svg_circle,
+    'ellipse': _svg_ellipse,
+    'line': _svg_line,
+    'polygon': _svg_polygon,
+    'polyline': _svg_polyline,
+    'path': _svg_path,
+    'text': _svg_text,
+    'use': _svg_use,
+    'circles': _svg_circles,
+    'rects': _svg_rects,
+    'lines': _svg_lines,
+}
+
+
+_ATTR_RE = re.compile(r'([\w:-]+)="([^"]*)"')
+
+
+def _element_parts(markup: str) -> tuple:
+    """Split one element's markup into (tag, {attribute: value}, content)."""
+    end = markup.index(">")
+    start_tag = markup[:end]
+    tag = start_tag[1:].split(" ", 1)[0].rstrip("/")
+    return tag, dict(_ATTR_RE.findall(start_tag)), markup[end + 1:]
+
+
+def _attr_delta(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Attributes to set (new value) or remove (None) to turn old into new."""
+    delta = {name: value for name, value in new.items() if old.get(name) != value}
+    delta.update((name, None) for name in old if name not in new)
+    return delta
+
+
+def _flat_records(shapes: List[_Shape]) -> List[_Shape]:
+    """Display-list records with batches expanded, one record per SVG element."""
+    records = []
+    for shape in shapes:
+        if isinstance(shape, _ShapeBatch):
+            records.extend(shape.expand())
+        else:
+            records.append(shape)
+    return records
+
+
+def _diff_elements(segment: Optional[str], old: List[_Shape], new: List[_Shape],
+                   render_old, render_new, ops: list):
+    """
+    Append the ops turning one segment's elements into another's.
+
+    Records are compared as data first; only positions that differ are
+    rendered (render_old/render_new map a record to its markup).
+    """
+    common = min(len(old), len(new))
+    for index in range(common):
+        a = old[index]
+        b = new[index]
+        if a.tag == b.tag and a.style == b.style and a.geom == b.geom and a.extra == b.extra:
+            continue
+        old_markup = render_old(a)
+        new_markup = render_new(b)
+        if old_markup == new_markup:
+            continue
+        old_tag, old_attrs, old_content = _element_parts(old_markup)
+        new_tag, new_attrs, new_content = _element_parts(new_markup)
+        if old_tag != new_tag or old_content != new_content:
+            ops.append(['replace', segment, index, new_markup])
+        else:
+            ops.append(['set', segment, index, _attr_delta(old_attrs, new_attrs)])
+    for index in range(len(old) - 1, common - 1, -1):
+        ops.append(['remove', segment, index])
+    for record in new[common:]:
+        ops.append(['add', segment, render_new(record)])
+
+
+_TRANSFORM_RE = re.compile(r'(\w+)\(([^)]*)\)')
+
+
+def _mat_mul(m: tuple, n: tuple) -> tuple:
+    """Product of two affine matrices (a, b, c, d, e, f), applying n first."""
+    a1, b1, c1, d1, e1, f1 = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a1 * a2 + c1 * b2, b1 * a2 + d1 * b2,
+            a1 * c2 + c1 * d2, b1 * c2 + d1 * d2,
+            a1 * e2 + c1 * f2 + e1, b1 * e2 + d1 * f2 + f1)
+
+
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _rotation(angle: float, cx: float = 0, cy: float = 0) -> tuple:
+    """Matrix rotating by angle degrees around (cx, cy)."""
+    a = math.radians(angle)
+    c, s = math.cos(a), math.sin(a)
+    return (c, s, -s, c, cx - c * cx + s * cy, cy - s * cx - c * cy)
+
+
+def _transform_attr(m: tuple) -> str:
+    """Group transform attribute: translate(dx, dy) for plain moves, else one matrix(...)."""
+    a, b, c, d, e, f = [round(v, 10) + 0.0 for v in m]  # + 0.0 turns -0.0 into 0.0
+    if (a, b, c, d) == (1, 0, 0, 1):
+        return f"translate({_num(e)}, {_num(f)})"
+    return f"matrix({' '.join(_num(v) for v in (a, b, c, d, e, f))})"
+
+
+def _transform_matrix(transform: str) -> Optional[tuple]:
+    """Affine matrix for an SVG transform attribute, None if it is the identity."""
+    m = _IDENTITY
+    for name, args in _TRANSFORM_RE.findall(transform):
+        v = [float(a) for a in re.split(r'[\s,]+', args.strip()) if a]
+        if name == 'translate':
+            step = (1, 0, 0, 1, v[0], v[1] if len(v) > 1 else 0)
+        elif name == 'scale':
+            step = (v[0], 0, 0, v[1] if len(v) > 1 else v[0], 0, 0)
+        elif name == 'rotate':
+            step = _rotation(*v[:3])
+        elif name == 'matrix':
+            step = tuple(v)
+        else:
+            continue
+        m = _mat_mul(m, step)
+    return None if m == _IDENTITY else m
+
+
+def _box_transform(box: tuple, m: Optional[tuple]) -> tuple:
+    """Bounding box of a box's four corners after an affine transform."""
+    if m is None:
+        return box
+    a, b, c, d, e, f = m
+    x0, y0, x1, y1 = box
+    xs = [a * x + c * y + e for x in (x0, x1) for y in (y0, y1)]
+    ys = [b * x + d * y + f for x in (x0, x1) for y in (y0, y1)]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _mat_invert(m: tuple) -> Optional[tuple]:
+    """Inverse of an affine matrix, None if it squashes everything flat."""
+    a, b, c, d, e, f = m
+    det = a * d - b * c
+    if not det:
+        return None
+    return (d / det, -b / det, -c / det, a / det,
+            (c * f - d * e) / det, (b * e - a * f) / det)
+
+
+# Cubic Bézier handle length for a quarter of a unit circle
+_KAPPA = 0.5522847498307936
+
+
+def _ellipse_path(cx: float, cy: float, rx: float, ry: float) -> Tuple[str, list]:
+    """Ellipse as four cubic Bézier quarters (commands, coords)."""
+    kx, ky = _KAPPA * rx, _KAPPA * ry
+    return "MCCCCZ", [cx + rx, cy,
+                      cx + rx, cy + ky, cx + kx, cy + ry, cx, cy + ry,
+                      cx - kx, cy + ry, cx - rx, cy + ky, cx - rx, cy,
+                      cx - rx, cy - ky, cx - kx, cy - ry, cx, cy - ry,
+                      cx + kx, cy - ry, cx + rx, cy - ky, cx + rx, cy]
+
+
+def _rounded_rect_path(x: float, y: float, w: float, h: float,
+                       rx: float, ry: float) -> Tuple[str, list]:
+    """Rounded rectangle as lines and cubic Bézier corners (commands, coords)."""
+    rx = min(rx, w / 2)
+    ry = min(ry, h / 2)
+    kx, ky = _KAPPA * rx, _KAPPA * ry
+    r, b = x + w, y + h
+    return "MLCLCLCLCZ", [x + rx, y,
+                          r - rx, y, r - rx + kx, y, r, y + ry - ky, r, y + ry,
+                          r, b - ry, r, b - ry + ky, r - rx + kx, b, r - rx, b,
+                          x + rx, b, x + rx - kx, b, x, b - ry + ky, x, b - ry,
+                          x, y + ry, x, y + ry - ky, x + rx - kx, y, x + rx, y]
+
+
+def _arc_curves(x0: float, y0: float, x: float, y: float, radius: float,
+                large: bool, clockwise: bool) -> list:
+    """
+    Circular arc from (x0, y0) to (x, y) as cubic Bézier pieces of at most
+    a quarter turn: flat coordinates, 6 per piece.
+
+    Follows SVG arc rules: a radius too small to reach is grown until the
+    arc is a half circle, and a zero radius gives a straight segment.
+    """
+    if (x0, y0) == (x, y):
+        return []
+    hx, hy = (x - x0) / 2, (y - y0) / 2  # Half the chord
+    half = math.sqrt(hx * hx + hy * hy)
+    r = abs(radius)
+    if r == 0:
+        return [x0 + 2 * hx / 3, y0 + 2 * hy / 3, x - 2 * hx / 3, y - 2 * hy / 3, x, y]
+    r = max(r, half)
+    # The center sits off the chord's midpoint; which side picks the arc
+    rise = math.sqrt(max(r * r - half * half, 0)) / half
+    if bool(large) == bool(clockwise):
+        rise = -rise
+    cx, cy = x0 + hx - hy * rise, y0 + hy + hx * rise
+    start = math.atan2(y0 - cy, x0 - cx)
+    sweep = math.atan2(y - cy, x - cx) - start
+    if clockwise and sweep < 0:  # y points down, so clockwise is increasing angle
+        sweep += 2 * math.pi
+    elif not clockwise and sweep > 0:
+        sweep -= 2 * math.pi
+    pieces = max(1, math.ceil(abs(sweep) / (math.pi / 2) - 1e-9))
+    step = sweep / pieces
+    k = 4 / 3 * math.tan(step / 4) * r
+    coords = []
+    for i in range(pieces):
+        a1 = start + i * step
+        a2 = a1 + step
+        cos1, sin1, cos2, sin2 = math.cos(a1), math.sin(a1), math.cos(a2), math.sin(a2)
+        end = (x, y) if i == pieces - 1 else (cx + r * cos2, cy + r * sin2)
+        coords += (cx + r * cos1 - k * sin1, cy + r * sin1 + k * cos1,
+                   cx + r * cos2 + k * sin2, cy + r * sin2 - k * cos2) + end
+    return coords
+
+
+def _stroke_pad(style: tuple) -> float:
+    """How far a style's stroke paints outside the shape's outline."""
+    stroke, width = style[1], style[2]
+    return width / 2 if stroke is not None and stroke != "none" and width else 0
+
+
+def _record_box(record: _Shape, symbols: Dict[str, List[_Shape]]) -> Optional[tuple]:
+    """(x0, y0, x1, y1) painted by a single-element record, stroke included."""
+    tag = record.tag
+    geom = record.geom
+    if tag == 'circle':
+        x, y, r = geom
+        box = (x - r, y - r, x + r, y + r)
+    elif tag == 'ellipse':
+        x, y, rx, ry = geom
+        box = (x - rx, y - ry, x + rx, y + ry)
+    elif tag == 'rect':
+        x, y, w, h = geom[:4]
+        box = (min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h))
+    elif tag == 'line':
+        x1, y1, x2, y2 = geom
+        box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+    elif tag == 'text':
+        x, y, size = geom
+        # Rough extent: average glyph width of 0.6 em, descenders below y
+        box = (x, y - size, x + 0.6 * size * len(record.extra[1]), y + 0.25 * size)
+    elif tag == 'use':
+        x, y, angle, scale = geom
+        boxes = [b for b in (_record_box(r, symbols) for r in _flat_records(symbols[record.extra]))
+                 if b is not None]
+        if not boxes:
+            return None
+        m = _transform_matrix(f"translate({x} {y}) rotate({angle}) scale({scale})")
+        return _box_transform((min(b[0] for b in boxes), min(b[1] for b in boxes),
+                               max(b[2] for b in boxes), max(b[3] for b in boxes)), m)
+    else:
+        # polygon, polyline, path: control points bound the curve
+        if not geom:
+            return None
+        xs = geom[0::2]
+        ys = geom[1::2]
+        box = (min(xs), min(ys), max(xs), max(ys))
+    pad = _stroke_pad(record.style)
+    if pad:
+        box = (box[0] - pad, box[1] - pad, box[2] + pad, box[3] + pad)
+    return box
+
+
+class _SpatialSegment:
+    """
+    Bounding boxes of one display-list segment in the segment's own
+    (untransformed) coordinates and, for a transformed group, in world
+    coordinates as well. Viewport culling and bounds() read the boxes;
+    the spatial queries in sketchpy.spatial grid them.
+
+    Built when first needed and extended with the shapes appended since,
+    like the segment markup cache. Batches are expanded, so an entry's
+    position is the element index used by Canvas.diff().
+    """
+
+    __slots__ = ('count', 'last', 'defs_version', 'records', 'boxes', 'local', 'world')
+
+    def __init__(self, defs_version: int):
+        self.count = 0  # display-list records indexed
+        self.last = None  # last record indexed, to detect rewritten segments
+        self.defs_version = defs_version
+        self.records: List[_Shape] = []
+        self.boxes: List[Optional[tuple]] = []
+        self.local = None  # grid over boxes, see sketchpy.spatial
+        self.world: Optional[tuple] = None  # (matrix, transformed boxes, their grid or None)
+
+    def extend(self, shapes: List[_Shape], symbols: Dict[str, List[_Shape]]):
+        """Index shapes appended to the segment."""
+        for record in _flat_records(shapes):
+            self.records.append(record)
+            self.boxes.append(_record_box(record, symbols))
+        self.count += len(shapes)
+        self.last = shapes[-1]
+        self.world = None
+
+    def world_boxes(self, m: Optional[tuple]) -> List[Optional[tuple]]:
+        """Entry boxes after the segment's transform."""
+        if m is None:
+            return self.boxes
+        if self.world is None or self.world[0] != m:
+            self.world = (m, [None if box is None else _box_transform(box, m) for box in self.boxes],
+                          None)
+        return self.world[1]
+
+
 class GroupContext:
-    """Context manager for adding shapes to a named group."""
+    """
+    Context manager for adding shapes to a named group.
+
+    A group created inside another group's block becomes its child; the
+    outer group is active again when the inner block ends.
+    """
 
     def __init__(self, canvas: 'Canvas', name: str):
         self.canvas = canvas
         self.name = name
+        self.outer: Optional[str] = None
 
     def __enter__(self):
-        if self.name not in self.canvas.groups:
-            self.canvas.groups[self.name] = []
-            self.canvas.group_visibility[self.name] = True
-            self.canvas.group_transforms[self.name] = ""
-        self.canvas.current_group = self.name
-        return self.canvas
+        canvas = self.canvas
+        if canvas._defining_symbol is not None:
+            raise ValueError(f"Symbol '{canvas._defining_symbol}' can't contain groups; "
+                             "draw its shapes directly")
+        self.outer = canvas.current_group
+        if self.name not in canvas.groups:
+            canvas.groups[self.name] = []
+            canvas.group_parents[self.name] = self.outer
+            canvas.group_visibility[self.name] = True
+            canvas.group_transforms[self.name] = _IDENTITY
+            canvas._changed()
+        canvas.current_group = self.name
+        return canvas
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.canvas.current_group = None
+        self.canvas.current_group = self.outer
         return False
 
 
+class PathBuilder:
+    """
+    Chainable builder for one path shape, started with Canvas.path().
+
+    Every segment goes into a single path record, so an outline with
+    hundreds of segments is one shape against MAX_SHAPES and one <path>
+    element in the SVG. The path appears on the canvas with its first
+    move_to() and grows with each call after that. Once the canvas is
+    cleared or the path's group removed, drawing more raises ValueError.
+    """
+
+    def __init__(self, canvas: 'Canvas', style: tuple):
+        self.canvas = canvas
+        self.style = style
+        self._record: Optional[_Shape] = None
+        self._shapes: Optional[List[_Shape]] = None  # Display list the record is in
+        self._key: Optional[str] = None
+        self._x = self._y = self._start_x = self._start_y = 0.0
+
+    def _append(self, command: str, coords) -> 'PathBuilder':
+        canvas = self.canvas
+        record = self._record
+        if record is None:
+            if command != 'M':
+                raise ValueError("Start the path with move_to()")
+            canvas._check_shape_limit()
+            self._record = _Shape('path', array('d', coords), self.style, command)
+            self._key = canvas.current_group
+            canvas._add(self._record)
+            self._shapes = canvas.groups[self._key] if self._key else canvas.shapes
+        else:
+            grown = _Shape('path', record.geom + array('d', coords), self.style,
+                           record.extra + command)
+            canvas._replace(self._shapes, self._key, record, grown)
+            self._record = grown
+        if coords:
+            self._x, self._y = coords[-2], coords[-1]
+        return self
+
+    def move_to(self, x: float, y: float) -> 'PathBuilder':
+        """Start a new outline at (x, y) without drawing."""
+        self._start_x, self._start_y = x, y
+        return self._append('M', (x, y))
+
+    def line_to(self, x: float, y: float) -> 'PathBuilder':
+        """Draw a straight line to (x, y)."""
+        return self._append('L', (x, y))
+
+    def quad_to(self, cx: float, cy: float, x: float, y: float) -> 'PathBuilder':
+        """Draw a quadratic Bézier curve to (x, y), bending toward (cx, cy)."""
+        return self._append('Q', (cx, cy, x, y))
+
+    def cubic_to(self, cx1: float, cy1: float, cx2: float, cy2: float,
+                 x: float, y: float) -> 'PathBuilder':
+        """Draw a cubic Bézier curve to (x, y) with control points (cx1, cy1) and (cx2, cy2)."""
+        return self._append('C', (cx1, cy1, cx2, cy2, x, y))
+
+    def arc_to(self, x: float, y: float, radius: float, large: bool = False,
+               clockwise: bool = True) -> 'PathBuilder':
+        """
+        Draw a circular arc to (x, y).
+
+        Two circles of the radius pass through both ends, and each gives a
+        short and a long way round: large picks the long one, clockwise the
+        direction. A radius too small to reach (x, y) is grown to half the
+        distance. The arc is stored as cubic curves, so it moves, rotates
+        and scales with the rest of the path.
+        """
+        if self._record is None:
+            raise ValueError("Start the path with move_to()")
+        coords = _arc_curves(self._x, self._y, x, y, radius, large, clockwise)
+        return self._append('C' * (len(coords) // 6), coords) if coords else self
+
+    def close(self) -> 'PathBuilder':
+        """Draw a straight line back to where the outline started."""
+        self._append('Z', ())
+        self._x, self._y = self._start_x, self._start_y
+        return self
+
+
 class Canvas:
     """Main drawing canvas that collects shapes and renders to SVG."""
 
@@ -68,7 +1213,18 @@ class Canvas:
     MAX_AREA = 4_000_000  # 2000 * 2000
     MAX_SHAPES = 10_000
 
-    def __init__(self, width: int = 800, height: int = 600, background: str = Color.WHITE):
+    # Default for how far curves built from points (pear, the tentacle
+    # fallback) and tentacle outlines may stray from the true shape, in pixels
+    TOLERANCE = 0.25
+
+    # Default seed for each canvas's random numbers (see canvas.random), so
+    # the same code draws the same picture unless it asks otherwise
+    SEED = 0
+
+    def __init__(self, width: int = 800, height: int = 600, background: str = Color.WHITE,
+                 precision: Optional[int] = None, css_classes: bool = False,
+                 cull: bool = False, tolerance: Optional[float] = None,
+                 seed: Optional[Union[int, str]] = None):
         """
         Create a canvas with specified dimensions.
 
@@ -76,9 +1232,30 @@ class Canvas:
             width: Canvas width in pixels (max 2000)
             height: Canvas height in pixels (max 2000)
             background: Background color (default: white)
+            precision: Decimal places for coordinates in the SVG output.
+                       None (default) writes numbers exactly; 1 or 2 makes
+                       curve-heavy drawings much smaller.
+            css_classes: Write each distinct style once as a CSS class in a
+                         <style> block and reference it with class="s0"
+                         instead of repeating fill/stroke attributes on
+                         every shape. Smaller output for drawings that
+                         reuse a few colors many times.
+            cull: Leave shapes that lie completely outside the canvas out
+                  of the SVG output (see cull_report())
+            tolerance: How far curved outlines may stray from the true
+                       shape, in pixels (default: Canvas.TOLERANCE).
+                       Larger is faster with fewer points; shapes that
+                       take a tolerance argument can override it per call.
+            seed: Seed for the canvas's own random numbers (canvas.random),
+                  which shapes with random variation such as blob() and
+                  the OceanShapes creatures use (default: Canvas.SEED).
+                  The same seed draws the same picture every time; pass
+                  a different one for a different picture. Python's
+                  random module is never used or reseeded.
 
         Raises:
-            ValueError: If dimensions exceed limits
+            ValueError: If dimensions exceed limits, tolerance is not
+                        positive or seed is not an int or a str
         """
         # Security: Enforce size limits
         if width > self.MAX_WIDTH:
@@ -100,25 +1277,199 @@ class Canvas:
         self.width = width
         self.height = height
         self.background = background
-        self.shapes: List[str] = []
+        _number_formatter(precision)  # Validate early
+        self.precision = precision
+        self.css_classes = css_classes
+        self.cull = cull
+        self.tolerance = _check_tolerance(self.TOLERANCE if tolerance is None else tolerance)
+        if seed is None:
+            seed = self.SEED
+        if isinstance(seed, bool) or not isinstance(seed, (int, str)):
+            raise ValueError(f"seed must be an int or a str, got {seed!r}")
+        self.seed = seed
+        self.random = random.Random(seed)  # Restarted by clear(), see seed above
+        self.shapes: List[_Shape] = []
         self.gradients: Dict[str, str] = {}  # gradient_id -> SVG definition
-        self.groups: Dict[str, List[str]] = {}  # group_name -> list of shapes
+        self.groups: Dict[str, List[_Shape]] = {}  # group_name -> list of shapes
         self.current_group: Optional[str] = None  # active group context
-        self.group_transforms: Dict[str, str] = {}  # group_name -> transform attribute
+        self.group_parents: Dict[str, Optional[str]] = {}  # group_name -> enclosing group (None = top level)
+        self.group_transforms: Dict[str, tuple] = {}  # group_name -> affine matrix (a, b, c, d, e, f)
+        self._group_offsets: Dict[str, Tuple[float, float]] = {}  # group_name -> last move_group offset
         self.group_visibility: Dict[str, bool] = {}  # group_name -> visible
+        self.group_animations: Dict[str, List[str]] = {}  # group_name -> SMIL animation elements
+        self.layer_z: Dict[str, float] = {}  # layer name -> stacking position among its sibling groups
+        self.symbols: Dict[str, List[_Shape]] = {}  # symbol_name -> shapes drawn once in <defs>
+        self._defining_symbol: Optional[str] = None  # symbol whose shapes define_symbol() is capturing
+        self._shape_count = 0  # shapes in self.shapes plus all groups
+        self._styles: Dict[tuple, tuple] = {}  # interned style tuples
+        self._style_attrs: Dict[tuple, str] = {}  # style tuple -> SVG attributes
+        self._style_classes: Dict[tuple, str] = {}  # style tuple -> class attribute (css_classes mode)
+        self._style_rules: List[str] = []  # CSS rule for each class, in class order
+
+        # Render cache: bumped on every change, see _changed() and to_svg()
+        self._version = 0
+        self._svg_cache: Optional[tuple] = None  # (cache key, svg)
+        self._defs_cache: Optional[tuple] = None  # ((defs version, options), defs)
+        self._defs_version = 0  # bumped when a gradient or symbol changes
+        self._segment_cache: Dict[Optional[str], tuple] = {}  # group (None = ungrouped) -> (count, last shape, markup)
+        self._subtree_cache: Dict[str, tuple] = {}  # group with child groups -> (parts, markup), see _subtree_svg()
+        self._segment_options = (precision, css_classes)  # options the segment cache was rendered with
+        self._spatial: Dict[Optional[str], _SpatialSegment] = {}  # segment -> spatial index, see shapes_at()
+
+    def _tolerance(self, tolerance: Optional[float]) -> float:
+        """Flattening tolerance for one call: its own if given, else the canvas's."""
+        return self.tolerance if tolerance is None else _check_tolerance(tolerance)
+
+    def _check_shape_limit(self, count: int = 1):
+        """
+        Prevent too many shapes (render bomb protection).
 
-    def _check_shape_limit(self):
-        """Prevent too many shapes (render bomb protection)"""
-        total_shapes = len(self.shapes)
-        for group_shapes in self.groups.values():
-            total_shapes += len(group_shapes)
+        Uses the running shape counter, so the check costs the same no
+        matter how many groups the canvas has.
 
-        if total_shapes >= self.MAX_SHAPES:
+        Args:
+            count: Number of shapes about to be added
+        """
+        if self._shape_count + count > self.MAX_SHAPES:
             raise ValueError(
                 f"Shape limit exceeded ({self.MAX_SHAPES}). "
                 "Too many shapes can crash the browser."
             )
 
+    def _style(self, fill, stroke, stroke_width, opacity=None) -> tuple:
+        """Return the shared style tuple for these values (interned per canvas)."""
+        key = (fill, stroke, stroke_width, opacity)
+        return self._styles.setdefault(key, key)
+
+    def _style_properties(self, style: tuple) -> List[Tuple[str, str]]:
+        """(property, value) pairs for a style tuple, skipping unset values."""
+        fill, stroke, stroke_width, opacity = style
+        props = []
+        if fill is not None:
+            props.append(('fill', self._resolve_fill(fill)))
+        if stroke is not None:
+            props.append(('stroke', stroke))
+        if stroke_width is not None:
+            props.append(('stroke-width', stroke_width))
+        if opacity is not None and opacity < 1.0:
+            props.append(('opacity', opacity))
+        return props
+
+    def _attrs(self, style: tuple) -> str:
+        """Render a style tuple to SVG attributes, once per distinct style."""
+        attrs = self._style_attrs.get(style)
+        if attrs is None:
+            attrs = " ".join(f'{name}="{value}"' for name, value in self._style_properties(style))
+            self._style_attrs[style] = attrs
+        return attrs
+
+    def _class_attrs(self, style: tuple) -> str:
+        """class="sN" for a style in css_classes mode (inline attributes if it has no class)."""
+        attrs = self._style_classes.get(style)
+        if attrs is None:
+            return self._attrs(style)
+        return attrs
+
+    def _style_block(self) -> Tuple[str, str]:
+        """
+        Assign a CSS class to every style not seen yet and return
+        (scope, <style> element).
+
+        Class numbers never change once given, so cached segment markup
+        stays valid. The rules are scoped by a class on the <svg> root,
+        derived from the rules themselves, so two inline SVGs on one page
+        cannot restyle each other's shapes.
+        """
+        classes = self._style_classes
+        rules = self._style_rules
+        for style in self._styles:
+            if style not in classes:
+                props = self._style_properties(style)
+                if props:
+                    name = f"s{len(rules)}"
+                    classes[style] = f'class="{name}"'
+                    rules.append(f".{name}{{{';'.join(f'{k}:{v}' for k, v in props)}}}")
+        body = "".join(rules)
+        scope = f"k{zlib.crc32(body.encode('utf-8')):08x}"
+        return scope, "<style>" + "".join(f".{scope} {rule}" for rule in rules) + "</style>"
+
+    def _changed(self):
+        """Mark the canvas as modified so the cached SVG document is rebuilt."""
+        self._version += 1
+
+    def _add(self, shape: _Shape) -> 'Canvas':
+        """Append a shape to the active group (or the canvas) display list."""
+        self._shape_count += 1
+        self._version += 1
+        if self.current_group:
+            self.groups[self.current_group].append(shape)
+        else:
+            self.shapes.append(shape)
+        return self
+
+    def _add_path(self, commands: str, coords, fill, stroke, stroke_width) -> 'Canvas':
+        """Append a path record; coords is the flat list of command coordinates."""
+        if not isinstance(coords, array):
+            coords = array('d', coords)
+        return self._add(_Shape('path', coords, self._style(fill, stroke, stroke_width),
+                                commands))
+
+    def _replace(self, shapes: List[_Shape], key: Optional[str], old: _Shape,
+                 new: _Shape) -> None:
+        """Swap a drawn record for its updated version (see PathBuilder)."""
+        if shapes is not (self.groups.get(key) if key else self.shapes):
+            index = None  # Cleared, or the group was removed
+        elif shapes and shapes[-1] is old:
+            index = len(shapes) - 1  # The caches see a new last record and redo the segment
+        else:
+            index = next((i for i, shape in enumerate(shapes) if shape is old), None)
+            self._segment_cache.pop(key, None)
+            self._spatial.pop(key, None)
+        if index is None:
+            raise ValueError("The path is no longer on the canvas; start a new one with path()")
+        shapes[index] = new
+        self._changed()
+
+    def _add_batch(self, tag: str, columns: tuple, fill, stroke, stroke_width,
+                   opacity=None) -> 'Canvas':
+        """
+        Add n shapes from geometry columns (lists) with one limit check.
+
+        Scalar styles are shared by the whole batch and stored as a single
+        record of array('d') columns; per-shape style sequences produce one
+        record per shape.
+        """
+        n = len(columns[0])
+        self._check_shape_limit(n)
+        if not n:
+            return self
+
+        styles = (fill, stroke, stroke_width, opacity)
+        if any(_is_per_shape(v) for v in styles):
+            style = self._style
+            single = _BATCH_TAGS[tag]
+            records = [_Shape(single, geom, style(*st))
+                       for geom, st in zip(zip(*columns), zip(*_style_columns(styles, n)))]
+        else:
+            columns = tuple(array('d', column) for column in columns)
+            records = [_ShapeBatch(tag, columns, self._style(*styles))]
+        return self._extend(records, n)
+
+    def _extend(self, records: List[_Shape], count: int) -> 'Canvas':
+        """Append several records standing for count shapes in one go."""
+        target = self.groups[self.current_group] if self.current_group else self.shapes
+        target.extend(records)
+        self._shape_count += count
+        self._changed()
+        return self
+
+    def _iter_shapes(self, shapes: List[_Shape], fmt=_num, css_classes: bool = False):
+        """Yield SVG markup for display-list records, a chunk of shapes at a time."""
+        writers = _SVG_WRITERS
+        attrs = self._class_attrs if css_classes else self._attrs
+        for start in range(0, len(shapes), _SVG_CHUNK_SHAPES):
+            chunk = shapes[start:start + _SVG_CHUNK_SHAPES]
+            yield "".join([writers[s.tag](s.geom, attrs(s.style), s.extra, fmt) for s in chunk])
 
     def linear_gradient(self, name: str,
                        start: Tuple[float, float] = (0, 0),
@@ -158,6 +1509,8 @@ class Canvas:
 </linearGradient>'''
 
         self.gradients[name] = svg_def
+        self._defs_version += 1
+        self._changed()
         return self
 
     def radial_gradient(self, name: str,
@@ -189,6 +1542,8 @@ class Canvas:
 </radialGradient>'''
 
         self.gradients[name] = svg_def
+        self._defs_version += 1
+        self._changed()
         return self
 
     def _resolve_fill(self, fill: str) -> str:
@@ -210,20 +1565,276 @@ class Canvas:
             # Later manipulate as a unit
             canvas.move_group("flower", dx=50, dy=30)
             canvas.hide_group("flower")
+
+        Groups nest: a group started inside another one is its child and
+        moves, rotates and hides with it. A group's own shapes are drawn
+        first, then its child groups in the order they were created.
+
+            cars = CarShapes(canvas)
+            with canvas.group("traffic"):
+                with canvas.group("bus"):
+                    cars.bus(100, 300)
+                with canvas.group("car"):
+                    cars.sports_car(300, 300)
+
+            canvas.move_group("traffic", dx=20)    # Moves bus and car
         """
         return GroupContext(self, name)
 
+    def layer(self, name: str, z: Optional[float] = None) -> GroupContext:
+        """
+        Create a context manager for drawing into a named layer.
+
+        A layer is a top-level group with a stacking position: layers are
+        drawn in z order, lowest first, whatever order they were created
+        in (plain groups count as z=0, ties keep creation order). Shapes
+        drawn outside any layer or group stay under all of them. Each
+        layer's markup is cached on its own, so adding to one layer does
+        not re-render the others, and move_group(), hide_group() and the
+        other group methods work on layers too.
+
+        Args:
+            name: Layer name
+            z: Stacking position (None keeps the current one, 0 for a new layer)
+
+        Raises:
+            ValueError: If called inside a group block, or name is a nested group
+
+        Example:
+            with canvas.layer("labels", z=2):
+                canvas.text(20, 40, "Coral reef")
+            with canvas.layer("sea", z=0):
+                canvas.rect(0, 0, 800, 600, fill=OceanPalette.OCEAN_BLUE)  # Under the labels
+        """
+        if self.current_group is not None:
+            raise ValueError(f"Layer '{name}' must be created outside group blocks")
+        if self.group_parents.get(name) is not None:
+            raise ValueError(f"Group '{name}' is nested in another group and cannot be a layer")
+        if z is None:
+            z = self.layer_z.get(name, 0)
+        if self.layer_z.get(name) != z:
+            self.layer_z[name] = z
+            self._changed()
+        return GroupContext(self, name)
+
+    @classmethod
+    def compose(cls, *canvases: 'Canvas') -> 'Canvas':
+        """
+        Combine finished canvases into a new one, each as a layer on top of
+        the previous one, without running their drawing code again.
+
+        Build a static background once and compose it with every
+        foreground variant: shapes are shared, not copied, and markup
+        already rendered for an input canvas is reused. Each canvas
+        becomes a layer ("layer1", "layer2", ..., skipping names in use)
+        holding its ungrouped shapes, with its groups nested inside. Size, background and output options come
+        from the first canvas; the other backgrounds are left out.
+
+        Raises:
+            ValueError: If no canvas is given, two canvases use the same
+                        group name or define a gradient or symbol
+                        differently, or the shape limit is exceeded
+
+        Example:
+            reef = Canvas(800, 600, background=OceanPalette.DEEP_OCEAN)
+            ...  # Draw the reef once
+            for i, color in enumerate([Color.ORANGE, Color.YELLOW]):
+                fish = Canvas(800, 600)
+                fish.ellipse(400, 300, 60, 30, fill=color)
+                Canvas.compose(reef, fish).save(f"reef{i}.svg")
+        """
+        if not canvases:
+            raise ValueError("compose() needs at least one canvas")
+        first = canvases[0]
+        result = cls(first.width, first.height, first.background, first.precision,
+                     first.css_classes, first.cull, first.tolerance, first.seed)
+        options = result._render_options(None, None)
+        fmt = _number_formatter(options[0])
+        number = 0
+        for can in canvases:
+            number += 1
+            while f"layer{number}" in result.groups or f"layer{number}" in can.groups:
+                number += 1
+            name = f"layer{number}"
+            names = [name, *can.groups]
+            taken = [key for key in names if key in result.groups or names.count(key) > 1]
+            if taken:
+                raise ValueError(f"Group '{taken[0]}' is used by more than one canvas")
+            for key, definition in can.gradients.items():
+                if result.gradients.setdefault(key, definition) != definition:
+                    raise ValueError(f"Gradient '{key}' is defined differently on two canvases")
+            for key, shapes in can.symbols.items():
+                existing = result.symbols.setdefault(key, shapes)
+                if existing is not shapes and "".join(result._iter_shapes(existing)) != \
+                        "".join(result._iter_shapes(shapes)):
+                    raise ValueError(f"Symbol '{key}' is defined differently on two canvases")
+            result._check_shape_limit(can._shape_count)
+            result._shape_count += can._shape_count
+            result._styles.update(can._styles)
+
+            result.groups[name] = list(can.shapes)
+            result.group_parents[name] = None
+            result.group_visibility[name] = True
+            result.group_transforms[name] = _IDENTITY
+            result.layer_z[name] = number
+            for key, shapes in can.groups.items():
+                result.groups[key] = list(shapes)
+                parent = can.group_parents[key]
+                result.group_parents[key] = name if parent is None else parent
+                result.group_visibility[key] = can.group_visibility[key]
+                result.group_transforms[key] = can.group_transforms[key]
+                if key in can._group_offsets:
+                    result._group_offsets[key] = can._group_offsets[key]
+                if key in can.group_animations:
+                    result.group_animations[key] = list(can.group_animations[key])
+            result.layer_z.update(can.layer_z)
+
+            if not options[1] and can._cache_usable(options):
+                # Seed the new canvas's own segment cache with each segment's markup.
+                # The markup comes from the input canvas's cache (rendered and kept
+                # there on a miss), so composing the same input again skips rendering.
+                for key, shapes, _, _ in can._segments(hidden=True):
+                    markup = can._segment_svg(key, shapes, fmt, False)
+                    result._segment_cache[name if key is None else key] = (
+                        len(shapes), shapes[-1] if shapes else None, markup)
+        return result
+
+    def define_symbol(self, name: str, source) -> 'Canvas':
+        """
+        Define a reusable symbol to place many times with stamp().
+
+        The symbol's shapes are written once into <defs>; every stamp is a
+        short <use> element, so repeated cars, fish or petals cost a few
+        bytes each instead of their full geometry.
+
+        Args:
+            name: Symbol name to use with stamp()
+            source: A function that draws the symbol around (0, 0) when
+                    called with the canvas, or the name of an existing
+                    group whose shapes become the symbol (the group itself
+                    stays on the canvas)
+
+        Redefining a symbol changes every stamp of it, and the shapes they
+        count toward the limit.
+
+        Raises:
+            ValueError: If source names a group that does not exist or
+                        has groups inside it, the function opens a group,
+                        or the new definition stamps itself or goes over
+                        the shape limit
+
+        Example:
+            def petal(can):
+                can.ellipse(0, -20, 8, 20, fill=Color.PINK)
+
+            can.define_symbol("petal", petal)
+            for angle in range(0, 360, 45):
+                can.stamp("petal", 200, 200, angle=angle)
+        """
+        if isinstance(source, str):
+            if source not in self.groups:
+                raise ValueError(f"Unknown group '{source}'")
+            if source in self.group_parents.values():
+                raise ValueError(f"Symbol '{name}' can't contain groups, and group '{source}' "
+                                 "has groups inside it")
+            shapes = list(self.groups[source])
+        else:
+            # Capture what source draws instead of adding it to the scene
+            saved = (self.shapes, self.current_group, self._shape_count)
+            self.shapes = []
+            self.current_group = None
+            self._defining_symbol = name
+            try:
+                source(self)
+                shapes = self.shapes
+            finally:
+                self.shapes, self.current_group, self._shape_count = saved
+                self._defining_symbol = None
+
+        old = self.symbols.get(name)
+        self.symbols[name] = shapes
+        if old is not None:
+            try:
+                self._recount_stamps()
+            except ValueError:
+                self.symbols[name] = old
+                raise
+        self._defs_version += 1
+        self._changed()
+        return self
+
+    def _recount_stamps(self) -> None:
+        """
+        Bring the shape count of every stamp up to date after a symbol was
+        redefined, along with the canvas shape count.
+
+        Raises:
+            ValueError: If a symbol now contains itself, or the new counts
+                        exceed the shape limit
+        """
+        sizes: Dict[str, Optional[int]] = {}
+
+        def size(key: str) -> int:
+            if key not in sizes:
+                sizes[key] = None  # Being counted
+                sizes[key] = sum(size(shape.extra) if type(shape) is _Use else shape.count
+                                 for shape in self.symbols[key])
+            elif sizes[key] is None:
+                raise ValueError(f"Symbol '{key}' can't contain a stamp of itself")
+            return sizes[key]
+
+        for key in self.symbols:
+            size(key)
+        total = sum(size(shape.extra) if type(shape) is _Use else shape.count
+                    for shapes in (self.shapes, *self.groups.values()) for shape in shapes)
+        self._check_shape_limit(total - self._shape_count)
+
+        # New records rather than changing count in place, and new symbol
+        # lists, since compose() shares both between canvases. Markup doesn't
+        # depend on the count, and the spatial index is rebuilt for the new
+        # definitions.
+        def restamp(shapes: List[_Shape]) -> List[_Shape]:
+            return [_Use(shape.geom, shape.style, shape.extra, sizes[shape.extra])
+                    if type(shape) is _Use and shape.count != sizes[shape.extra] else shape
+                    for shape in shapes]
+
+        self.shapes[:] = restamp(self.shapes)
+        for shapes in self.groups.values():
+            shapes[:] = restamp(shapes)
+        for key, shapes in self.symbols.items():
+            if any(type(shape) is _Use for shape in shapes):
+                self.symbols[key] = restamp(shapes)
+        self._shape_count = total
+
+    def stamp(self, name: str, x: float = 0, y: float = 0,
+              angle: float = 0, scale: float = 1) -> 'Canvas':
+        """
+        Place a copy of a symbol defined with define_symbol().
+
+        Args:
+            name: Symbol name
+            x, y: Where the symbol's (0, 0) point goes
+            angle: Rotation in degrees around that point
+            scale: Size multiplier (1 = as drawn)
+
+        Raises:
+            ValueError: If the symbol is not defined
+        """
+        shapes = self.symbols.get(name)
+        if shapes is None:
+            raise ValueError(f"Unknown symbol '{name}'. Define it first with define_symbol()")
+        count = sum(shape.count for shape in shapes)
+        self._check_shape_limit(count)
+        return self._extend([_Use((x, y, angle, scale), self._style(None, None, None), name, count)],
+                            count)
+
     def rect(self, x: float = 0, y: float = 0, width: float = 100, height: float = 100,
              fill: str = Color.BLACK, stroke: str = Color.BLACK,
              stroke_width: float = 1) -> 'Canvas':
         """Draw a rectangle. Returns self for chaining."""
         self._check_shape_limit()
-        svg = f'<rect x="{x}" y="{y}" width="{width}" height="{height}" fill="{self._resolve_fill(fill)}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        return self._add(_Shape('rect', (x, y, width, height),
+                                self._style(fill, stroke, stroke_width)))
 
     def circle(self, x: float = 50, y: float = 50, radius: float = 25,
                fill: str = Color.BLACK, stroke: str = Color.BLACK,
@@ -234,43 +1845,23 @@ class Canvas:
             opacity: Transparency from 0.0 (invisible) to 1.0 (solid). Default 1.0.
         """
         self._check_shape_limit()
-        style_parts = [
-            f'fill="{self._resolve_fill(fill)}"',
-            f'stroke="{stroke}"',
-            f'stroke-width="{stroke_width}"'
-        ]
-        if opacity < 1.0:
-            style_parts.append(f'opacity="{opacity}"')
-
-        svg = f'<circle cx="{x}" cy="{y}" r="{radius}" {" ".join(style_parts)}/>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        return self._add(_Shape('circle', (x, y, radius),
+                                self._style(fill, stroke, stroke_width, opacity)))
 
     def ellipse(self, x: float = 50, y: float = 50, rx: float = 40, ry: float = 25,
                 fill: str = Color.BLACK, stroke: str = Color.BLACK,
                 stroke_width: float = 1) -> 'Canvas':
         """Draw an ellipse. rx = horizontal radius, ry = vertical radius."""
         self._check_shape_limit()
-        svg = f'<ellipse cx="{x}" cy="{y}" rx="{rx}" ry="{ry}" fill="{self._resolve_fill(fill)}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        return self._add(_Shape('ellipse', (x, y, rx, ry),
+                                self._style(fill, stroke, stroke_width)))
 
     def line(self, x1: float = 0, y1: float = 0, x2: float = 100, y2: float = 100,
              stroke: str = Color.BLACK, stroke_width: float = 2) -> 'Canvas':
         """Draw a line from (x1, y1) to (x2, y2)."""
         self._check_shape_limit()
-        svg = f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        return self._add(_Shape('line', (x1, y1, x2, y2),
+                                self._style(None, stroke, stroke_width)))
 
     def polygon(self, points: Optional[List[Tuple[float, float]]] = None,
                 fill: str = Color.BLACK, stroke: str = Color.BLACK,
@@ -279,25 +1870,176 @@ class Canvas:
         self._check_shape_limit()
         if points is None:
             points = [(50, 0), (100, 100), (0, 100)]  # Default triangle
-        points_str = " ".join(f"{x},{y}" for x, y in points)
-        svg = f'<polygon points="{points_str}" fill="{self._resolve_fill(fill)}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        coords = array('d', [c for point in points for c in point])
+        return self._add(_Shape('polygon', coords,
+                                self._style(fill, stroke, stroke_width)))
+
+    def circles(self, xs, ys, radii=25, fill=Color.BLACK, stroke=Color.BLACK,
+                stroke_width=1, opacity=1.0) -> 'Canvas':
+        """
+        Draw many circles in one call.
+
+        Coordinates and styles can be lists, tuples or NumPy arrays of equal
+        length, or single values shared by every circle. Much faster than
+        calling circle() in a loop.
+
+        Args:
+            xs, ys: Circle centers
+            radii: Radius of each circle (or one radius for all)
+            fill, stroke, stroke_width, opacity: One value or one per circle
+
+        Example:
+            xs = [i * 20 for i in range(40)]
+            can.circles(xs, [300] * 40, radii=8, fill=Color.BLUE)
+        """
+        n = len(xs)
+        columns = (_column(xs, n, "xs"), _column(ys, n, "ys"), _column(radii, n, "radii"))
+        return self._add_batch('circles', columns, fill, stroke, stroke_width, opacity)
+
+    def rects(self, xs, ys, widths=100, heights=100, fill=Color.BLACK,
+              stroke=Color.BLACK, stroke_width=1) -> 'Canvas':
+        """
+        Draw many rectangles in one call.
+
+        Args:
+            xs, ys: Top-left corners
+            widths, heights: Size of each rectangle (or one size for all)
+            fill, stroke, stroke_width: One value or one per rectangle
+
+        Example:
+            can.rects(range(0, 800, 50), [100] * 16, widths=40, heights=40)
+        """
+        n = len(xs)
+        columns = (_column(xs, n, "xs"), _column(ys, n, "ys"),
+                   _column(widths, n, "widths"), _column(heights, n, "heights"))
+        return self._add_batch('rects', columns, fill, stroke, stroke_width)
+
+    def lines(self, x1s, y1s, x2s, y2s, stroke=Color.BLACK, stroke_width=2) -> 'Canvas':
+        """
+        Draw many lines in one call, from (x1s[i], y1s[i]) to (x2s[i], y2s[i]).
+
+        Args:
+            x1s, y1s: Start points
+            x2s, y2s: End points
+            stroke, stroke_width: One value or one per line
+
+        Example:
+            # Sun rays
+            angles = [i * math.pi / 8 for i in range(16)]
+            can.lines([400] * 16, [300] * 16,
+                      [400 + 200 * math.cos(a) for a in angles],
+                      [300 + 200 * math.sin(a) for a in angles])
+        """
+        n = len(x1s)
+        columns = (_column(x1s, n, "x1s"), _column(y1s, n, "y1s"),
+                   _column(x2s, n, "x2s"), _column(y2s, n, "y2s"))
+        return self._add_batch('lines', columns, None, stroke, stroke_width)
+
+    def curve(self, x1: float, y1: float, cx: float, cy: float, x2: float, y2: float,
+              stroke: str = Color.BLACK, stroke_width: float = 2,
+              fill: Optional[str] = None) -> 'Canvas':
+        """
+        Draw a quadratic Bézier curve from (x1, y1) to (x2, y2).
+
+        The curve bends toward the control point (cx, cy) without passing through it.
+
+        Examples:
+            # A smile
+            can.curve(350, 300, 400, 350, 450, 300, stroke=Color.BLACK, stroke_width=3)
+        """
+        self._check_shape_limit()
+        return self._add_path("MQ", (x1, y1, cx, cy, x2, y2),
+                              fill or "none", stroke, stroke_width)
+
+    def bezier(self, x1: float, y1: float, cx1: float, cy1: float,
+               cx2: float, cy2: float, x2: float, y2: float,
+               stroke: str = Color.BLACK, stroke_width: float = 2,
+               fill: Optional[str] = None) -> 'Canvas':
+        """
+        Draw a cubic Bézier curve from (x1, y1) to (x2, y2).
+
+        The curve leaves toward (cx1, cy1) and arrives from (cx2, cy2),
+        so two control points can make S-shapes.
+
+        Examples:
+            # S-curve
+            can.bezier(100, 300, 200, 100, 300, 500, 400, 300, stroke=Color.BLUE)
+        """
+        self._check_shape_limit()
+        return self._add_path("MC", (x1, y1, cx1, cy1, cx2, cy2, x2, y2),
+                              fill or "none", stroke, stroke_width)
+
+    def path(self, fill: Optional[str] = None, stroke: str = Color.BLACK,
+             stroke_width: float = 2) -> PathBuilder:
+        """
+        Start a path: an outline made of lines, curves and arcs, drawn as a
+        single shape however many pieces it has.
+
+        Chain move_to(), line_to(), quad_to(), cubic_to(), arc_to() and
+        close() on the result. Each call adds to the same shape.
+
+        Args:
+            fill: Fill color (None for just the outline)
+            stroke: Outline color
+            stroke_width: Outline thickness
+
+        Returns:
+            A PathBuilder for chaining the path's pieces
+
+        Raises:
+            ValueError: If the first piece is not move_to()
+
+        Examples:
+            # A leaf
+            (can.path(fill=Color.GREEN)
+                .move_to(100, 200)
+                .quad_to(150, 100, 200, 200)
+                .quad_to(150, 300, 100, 200)
+                .close())
+
+            # A rounded tab
+            tab = can.path(fill=Color.ORANGE, stroke=Color.BLACK)
+            tab.move_to(50, 200).line_to(50, 100).arc_to(150, 100, 50).line_to(150, 200).close()
+
+            # Many segments, one shape
+            zigzag = can.path().move_to(0, 300)
+            for i in range(1, 200):
+                zigzag.line_to(i * 4, 300 + (i % 2) * 20)
+        """
+        return PathBuilder(self, self._style(fill or "none", stroke, stroke_width))
+
+    def polygons(self, point_lists, fill=Color.BLACK, stroke=Color.BLACK,
+                 stroke_width=1) -> 'Canvas':
+        """
+        Draw many polygons in one call.
+
+        Args:
+            point_lists: A list of polygons, each a list of (x, y) points
+                         (or an (n, 2) NumPy array)
+            fill, stroke, stroke_width: One value or one per polygon
+
+        Example:
+            triangles = [[(x, 0), (x + 20, 40), (x - 20, 40)] for x in range(50, 800, 60)]
+            can.polygons(triangles, fill=Color.GREEN)
+        """
+        n = len(point_lists)
+        self._check_shape_limit(n)
+        records = []
+        for points, f, s, w in zip(point_lists, *_style_columns((fill, stroke, stroke_width), n)):
+            tolist = getattr(points, 'tolist', None)  # NumPy arrays
+            if tolist is not None:
+                points = tolist()
+            coords = array('d', [c for point in points for c in point])
+            records.append(_Shape('polygon', coords, self._style(f, s, w)))
+        return self._extend(records, n)
 
     def text(self, x: float = 0, y: float = 20, text: str = "Hello",
              size: int = 16, fill: str = Color.BLACK,
              font: str = "Arial") -> 'Canvas':
         """Draw text at (x, y). Note: y is the baseline."""
         self._check_shape_limit()
-        svg = f'<text x="{x}" y="{y}" font-size="{size}" fill="{self._resolve_fill(fill)}" font-family="{font}">{text}</text>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        return self._add(_Shape('text', (x, y, size), self._style(fill, None, None),
+                                (font, text)))
 
     def rounded_rect(self, x: float = 0, y: float = 0, width: float = 100, height: float = 100,
                      rx: float = 5, ry: float = 5,
@@ -305,12 +2047,8 @@ class Canvas:
                      stroke_width: float = 1) -> 'Canvas':
         """Draw a rectangle with rounded corners."""
         self._check_shape_limit()
-        svg = f'<rect x="{x}" y="{y}" width="{width}" height="{height}" rx="{rx}" ry="{ry}" fill="{self._resolve_fill(fill)}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-        return self
+        return self._add(_Shape('rect', (x, y, width, height, rx, ry),
+                                self._style(fill, stroke, stroke_width)))
 
     def grid(self, spacing: int = 50, color: str = "#E8E8E8",
              show_coords: bool = True) -> 'Canvas':
@@ -411,39 +2149,37 @@ class Canvas:
         """
         self._check_shape_limit()
 
-        # Calculate distance and angle
+        # Calculate direction and its unit normal
         dx = x2 - x1
         dy = y2 - y1
-        distance = math.sqrt(dx**2 + dy**2)
         angle = math.atan2(dy, dx)
+        normal_x = -math.sin(angle)
+        normal_y = math.cos(angle)
+
+        # A cubic segment per quarter wave: each piece joins two points on the
+        # sine with control points along their tangents (Hermite form)
+        segments = max(1, math.ceil(waves * 4))
+        third = 1 / (3 * segments)
+        coords = array('d')
+        prev = None
+
+        for t, sine, slope in _wave_table(waves):
+            offset = height * sine
+            slope *= height  # d(offset)/dt
+            px = x1 + t * dx + offset * normal_x
+            py = y1 + t * dy + offset * normal_y
+            tx = dx + slope * normal_x
+            ty = dy + slope * normal_y
+            if prev is None:
+                coords.extend((px, py))
+            else:
+                coords.extend((prev[0] + prev[2] * third, prev[1] + prev[3] * third,
+                               px - tx * third, py - ty * third, px, py))
+            prev = (px, py, tx, ty)
 
-        # Generate points along the wave
-        points = []
-        steps = max(50, int(waves * 20))  # More points for more waves
-
-        for i in range(steps + 1):
-            t = i / steps
-            # Position along line
-            base_x = x1 + t * dx
-            base_y = y1 + t * dy
-
-            # Perpendicular offset (sine wave)
-            wave_offset = height * math.sin(t * waves * 2 * math.pi)
-            offset_x = -wave_offset * math.sin(angle)
-            offset_y = wave_offset * math.cos(angle)
-
-            points.append((base_x + offset_x, base_y + offset_y))
-
-        # Draw as polyline (stroke only, no fill)
-        points_str = " ".join(f"{x},{y}" for x, y in points)
-        svg = f'<polyline points="{points_str}" fill="none" stroke="{stroke}" stroke-width="{stroke_width}"/>'
-
-        if self.current_group:
-            self.groups[self.current_group].append(svg)
-        else:
-            self.shapes.append(svg)
-
-        return self
+        # Draw as an open path (stroke only, no fill)
+        return self._add_path("M" + "C" * segments, coords,
+                              "none", stroke, stroke_width)
 
     def blob(self, x: float, y: float, radius: float = 50,
              wobble: float = 0.2, points: int = 8,
@@ -480,18 +2216,15 @@ class Canvas:
         # Generate irregular anchor points around a circle
         # To keep shapes convex, only vary radius outward (never inward)
         anchor_points = []
-        for i in range(points):
-            angle = (i / points) * 2 * math.pi
+        for cos_a, sin_a in _unit_circle(points):
             # Randomize radius based on wobble, but stay convex (only expand, never shrink)
             # Use a minimum radius to prevent concave shapes
-            r = radius * (1 + random.uniform(0, wobble))  # Only positive wobble
-            px = x + r * math.cos(angle)
-            py = y + r * math.sin(angle)
-            anchor_points.append((px, py))
+            r = radius * (1 + self.random.uniform(0, wobble))  # Only positive wobble
+            anchor_points.append((x + r * cos_a, y + r * sin_a))
 
-        # Generate smooth curve through anchor points using quadratic Bézier
+        # Join anchor points with quadratic Bézier segments
         # Control points are placed *outside* the direct line to keep convexity
-        smooth_points = []
+        coords = array('d', anchor_points[0])
 
         for i in range(len(anchor_points)):
             # Current anchor point
@@ -518,23 +2251,15 @@ class Canvas:
                 control_x = mid_x
                 control_y = mid_y
 
-            # Sample the curve between p1 and p2
-            curve_points = _bezier_points(
-                p1,
-                (control_x, control_y),
-                p2,
-                steps=8  # Fewer steps since we have multiple segments
-            )
-
-            # Add all points except the last (to avoid duplicates)
-            smooth_points.extend(curve_points[:-1])
+            coords.extend((control_x, control_y, p2[0], p2[1]))
 
-        # Use polygon to draw the smooth blob
-        return self.polygon(smooth_points, fill=fill, stroke=stroke, stroke_width=stroke_width)
+        # One closed path: M p0, Q control p1, ..., Q control p0, Z
+        return self._add_path("M" + "Q" * points + "Z", coords,
+                              fill, stroke, stroke_width)
 
     def pear(self, x: float, y: float, width: float = 80, height: float = 100,
              fill: str = Color.GREEN, stroke: Optional[str] = None,
-             stroke_width: int = 1) -> 'Canvas':
+             stroke_width: int = 1, tolerance: Optional[float] = None) -> 'Canvas':
         """
         Draw a pear shape (wide at top, narrow at bottom).
 
@@ -545,6 +2270,8 @@ class Canvas:
             fill: Fill color
             stroke: Optional outline color (defaults to same as fill)
             stroke_width: Outline thickness
+            tolerance: How far the outline may stray from the true curve,
+                       in pixels (default: the canvas tolerance)
 
         Returns:
             self (for method chaining)
@@ -561,76 +2288,17 @@ class Canvas:
         if stroke is None:
             stroke = fill
 
-        # Generate pear outline using control points
-        # Top portion: wide rounded top (head/shoulders)
-        top_y = y
-        shoulder_y = y + height * 0.3
-        waist_y = y + height * 0.6
-        bottom_y = y + height
-
-        # Width at different heights
-        top_width = width * 0.75  # Slightly narrower at very top
-        shoulder_width = width  # Widest point
-        waist_width = width * 0.65  # Narrower in middle
-        bottom_width = width * 0.62  # Broader base for tentacle attachment
-
-        # Build the outline using bezier curves
-        points = []
-
-        # Right side (top to bottom)
-        # Top curve
-        for i in range(13):
-            t = i / 12
-            # Bezier from top to shoulder
-            y_pos = top_y + (shoulder_y - top_y) * t
-            w = top_width + (shoulder_width - top_width) * t
-            # Use smooth curve
-            curve_factor = math.sin(t * math.pi / 2)
-            points.append((x + w/2 * curve_factor, y_pos))
-
-        # Shoulder to waist
-        for i in range(13):
-            t = i / 12
-            y_pos = shoulder_y + (waist_y - shoulder_y) * t
-            w = shoulder_width + (waist_width - shoulder_width) * t
-            points.append((x + w/2, y_pos))
-
-        # Waist to bottom
-        for i in range(13):
-            t = i / 12
-            y_pos = waist_y + (bottom_y - waist_y) * t
-            w = waist_width + (bottom_width - waist_width) * t
-            # Smooth taper
-            curve_factor = 1 - (1 - t)**2
-            points.append((x + w/2 * (1 - 0.3 * curve_factor), y_pos))
-
-        # Left side (bottom to top) - mirror
-        for i in range(13, -1, -1):
-            t = i / 12
-            y_pos = waist_y + (bottom_y - waist_y) * t
-            w = waist_width + (bottom_width - waist_width) * t
-            curve_factor = 1 - (1 - t)**2
-            points.append((x - w/2 * (1 - 0.3 * curve_factor), y_pos))
-
-        for i in range(12, -1, -1):
-            t = i / 12
-            y_pos = shoulder_y + (waist_y - shoulder_y) * t
-            w = shoulder_width + (waist_width - shoulder_width) * t
-            points.append((x - w/2, y_pos))
-
-        for i in range(12, -1, -1):
-            t = i / 12
-            y_pos = top_y + (shoulder_y - top_y) * t
-            w = top_width + (shoulder_width - top_width) * t
-            curve_factor = math.sin(t * math.pi / 2)
-            points.append((x - w/2 * curve_factor, y_pos))
+        # Small pears get few points, large ones enough to look smooth
+        outline = _pear_outline(width, height, self._tolerance(tolerance))
+        points = [(x + dx, y + dy) for dx, dy in outline]
 
         return self.polygon(points, fill=fill, stroke=stroke, stroke_width=stroke_width)
 
     def tentacle(self, x1: float, y1: float, x2: float, y2: float,
                  curl: float = 0.0, twist: float = 0.0, thickness: float = 20,
                  taper: float = 0.5, fill: str = Color.PURPLE,
-                 stroke: Optional[str] = None, stroke_width: int = 1) -> 'Canvas':
+                 stroke: Optional[str] = None, stroke_width: int = 1,
+                 tolerance: Optional[float] = None) -> 'Canvas':
         """
         Draw an organic tentacle from (x1, y1) to (x2, y2).
         Can create S-curves and flowing shapes.
@@ -647,6 +2315,9 @@ class Canvas:
             fill: Tentacle color
             stroke: Optional outline color (defaults to same as fill)
             stroke_width: Outline thickness
+            tolerance: How far the outline may stray from the true curve,
+                       in pixels (default: the canvas tolerance). Small
+                       tentacles need fewer curve segments to stay within it.
 
         Returns:
             self (for method chaining)
@@ -665,193 +2336,1011 @@ class Canvas:
 
         if stroke is None:
             stroke = fill
+        return self._add_tentacles([_tentacle_ctrl(x1, y1, x2, y2, curl, twist)], [thickness],
+                                   [thickness * taper], [self._style(fill, stroke, stroke_width)],
+                                   self._tolerance(tolerance))
 
-        # Calculate perpendicular direction for control points
-        dx = x2 - x1
-        dy = y2 - y1
-        distance = math.sqrt(dx**2 + dy**2)
-
-        # Perpendicular vector (rotated 90 degrees)
-        perp_x = -dy
-        perp_y = dx
-        perp_len = math.sqrt(perp_x**2 + perp_y**2)
-        if perp_len > 0:
-            perp_x /= perp_len
-            perp_y /= perp_len
-
-        if twist > 0:
-            # Use cubic Bézier for S-curve (two control points)
-            # First control point: 1/3 along, offset in curl direction
-            curl_distance1 = distance * abs(curl) * 0.4
-            cx1 = x1 + dx * 0.33 + perp_x * curl_distance1 * (1 if curl > 0 else -1)
-            cy1 = y1 + dy * 0.33 + perp_y * curl_distance1 * (1 if curl > 0 else -1)
-
-            # Second control point: 2/3 along, offset in OPPOSITE direction (creates S)
-            curl_distance2 = distance * abs(curl) * 0.4 * twist
-            cx2 = x1 + dx * 0.67 - perp_x * curl_distance2 * (1 if curl > 0 else -1)
-            cy2 = y1 + dy * 0.67 - perp_y * curl_distance2 * (1 if curl > 0 else -1)
-
-            # Generate centerline using cubic Bézier
-            centerline = _bezier_points((x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2), steps=50)
-        else:
-            # Use quadratic Bézier for simple curve (one control point)
-            curl_distance = distance * abs(curl) * 0.5
-            cx = (x1 + x2) / 2 + perp_x * curl_distance * (1 if curl > 0 else -1)
-            cy = (y1 + y2) / 2 + perp_y * curl_distance * (1 if curl > 0 else -1)
-
-            # Generate centerline points using quadratic Bézier
-            centerline = _bezier_points((x1, y1), (cx, cy), (x2, y2), steps=50)
-
-        # Generate outline by offsetting perpendicular to centerline
-        outline_points = []
-        tip_thickness = thickness * taper
-
-        for i, (px, py) in enumerate(centerline):
-            t = i / (len(centerline) - 1)
-            # Interpolate thickness from base to tip
-            current_thickness = thickness * (1 - t) + tip_thickness * t
-            half_thickness = current_thickness / 2
-
-            # Calculate perpendicular direction at this point
-            if i < len(centerline) - 1:
-                next_x, next_y = centerline[i + 1]
-                tangent_x = next_x - px
-                tangent_y = next_y - py
-            else:
-                prev_x, prev_y = centerline[i - 1]
-                tangent_x = px - prev_x
-                tangent_y = py - prev_y
-
-            tangent_len = math.sqrt(tangent_x**2 + tangent_y**2)
-            if tangent_len > 0:
-                tangent_x /= tangent_len
-                tangent_y /= tangent_len
-
-            # Perpendicular offset
-            perp_x = -tangent_y
-            perp_y = tangent_x
-
-            # Add points on both sides
-            outline_points.append((px + perp_x * half_thickness, py + perp_y * half_thickness))
-
-        # Add other side in reverse
-        for i in range(len(centerline) - 1, -1, -1):
-            px, py = centerline[i]
-            t = i / (len(centerline) - 1)
-            current_thickness = thickness * (1 - t) + tip_thickness * t
-            half_thickness = current_thickness / 2
-
-            # Calculate perpendicular direction
-            if i < len(centerline) - 1:
-                next_x, next_y = centerline[i + 1]
-                tangent_x = next_x - px
-                tangent_y = next_y - py
+    def tentacles(self, x1s, y1s, x2s, y2s, curl=0.0, twist=0.0, thickness=20, taper=0.5,
+                  fill=Color.PURPLE, stroke=None, stroke_width=1,
+                  tolerance: Optional[float] = None) -> 'Canvas':
+        """
+        Draw many tentacles in one call (see tentacle()).
+
+        Every argument can be a list, tuple or NumPy array with one value
+        per tentacle, or a single value shared by all of them. The outlines
+        are computed together (as array operations when NumPy is
+        installed), which is much faster than calling tentacle() in a loop.
+        tolerance is a single value for the whole batch.
+
+        Example:
+            # Eight tentacles fanning out below a head at (400, 300)
+            angles = [math.pi * (0.15 + 0.1 * i) for i in range(8)]
+            can.tentacles([400] * 8, [300] * 8,
+                          [400 + 150 * math.cos(a) for a in angles],
+                          [300 + 150 * math.sin(a) for a in angles],
+                          curl=[0.4, -0.3] * 4, twist=0.6, thickness=25)
+        """
+        tolerance = self._tolerance(tolerance)
+        n = len(x1s)
+        self._check_shape_limit(n)
+        if not n:
+            return self
+        x1s, y1s, x2s, y2s, curls, twists, thicknesses, tapers = [
+            _column(value, n, name) for value, name in (
+                (x1s, "x1s"), (y1s, "y1s"), (x2s, "x2s"), (y2s, "y2s"), (curl, "curl"),
+                (twist, "twist"), (thickness, "thickness"), (taper, "taper"))]
+        if stroke is None:
+            stroke = fill
+        styles = [self._style(*style) for style in zip(*_style_columns((fill, stroke, stroke_width), n))]
+        ctrls = [_tentacle_ctrl(*args) for args in zip(x1s, y1s, x2s, y2s, curls, twists)]
+        return self._add_tentacles(ctrls, thicknesses,
+                                   [w * k for w, k in zip(thicknesses, tapers)], styles, tolerance)
+
+    def _add_tentacles(self, ctrls: List[Tuple], start_widths: List[float],
+                       end_widths: List[float], styles: List[tuple],
+                       tolerance: float) -> 'Canvas':
+        """Add a tentacle outline record per centerline (limit already checked)."""
+        records = []
+        outlines = _offset_outlines(ctrls, start_widths, end_widths, tolerance)
+        for ctrl, start, end, style, outline in zip(ctrls, start_widths, end_widths,
+                                                    styles, outlines):
+            if outline is None:
+                # Degenerate offset (curve tighter than the tentacle is thick):
+                # sample the centerline and offset each point instead
+                coords = array('d', [c for point in _sampled_outline(ctrl, start, end, tolerance)
+                                     for c in point])
+                records.append(_Shape('polygon', coords, style))
             else:
-                prev_x, prev_y = centerline[i - 1]
-                tangent_x = px - prev_x
-                tangent_y = py - prev_y
+                commands, coords = outline
+                if not isinstance(coords, array):
+                    coords = array('d', coords)
+                records.append(_Shape('path', coords, style, commands))
+        return self._extend(records, len(records))
+
+    def brush(self, points: List[Tuple[float, float]], width=10, smooth: bool = False,
+              fill: str = Color.BLACK, stroke: Optional[str] = None, stroke_width: int = 1,
+              tolerance: Optional[float] = None) -> 'Canvas':
+        """
+        Draw a brush stroke along a line of points, with a width that can
+        change along the way. The stroke is a single filled outline, so
+        it counts as one shape however many points it has.
+
+        Args:
+            points: Centerline as a list of (x, y) points (at least 2)
+                    (or an (n, 2) NumPy array)
+            width: A number, a list with one width per point, or a function
+                   that gets how far along the stroke it is (0 at the
+                   start, 1 at the end) and returns the width there
+            smooth: Draw a smooth curve through the points instead of
+                    straight lines between them
+            fill: Stroke color
+            stroke: Optional outline color (defaults to same as fill)
+            stroke_width: Outline thickness
+            tolerance: How far a smooth curve may stray from the true one,
+                       in pixels (default: the canvas tolerance)
 
-            tangent_len = math.sqrt(tangent_x**2 + tangent_y**2)
-            if tangent_len > 0:
-                tangent_x /= tangent_len
-                tangent_y /= tangent_len
+        Returns:
+            self (for method chaining)
 
-            perp_x = -tangent_y
-            perp_y = tangent_x
+        Raises:
+            ValueError: If there are fewer than 2 different points, or the
+                        widths are negative or don't match the points
 
-            outline_points.append((px - perp_x * half_thickness, py - perp_y * half_thickness))
+        Examples:
+            # Swoosh that thins out towards the end
+            can.brush([(100, 300), (250, 200), (400, 320), (550, 250)],
+                      width=lambda u: 30 * (1 - u) + 2, smooth=True)
 
-        return self.polygon(outline_points, fill=fill, stroke=stroke, stroke_width=stroke_width)
+            # Thin at both ends, thick in the middle
+            can.brush(points, width=lambda u: 4 + 20 * math.sin(math.pi * u))
+        """
+        self._check_shape_limit()
+        tolist = getattr(points, 'tolist', None)  # NumPy arrays
+        points = [(x, y) for x, y in (tolist() if tolist is not None else points)]
+        if len(points) < 2:
+            raise ValueError(f"brush needs at least 2 points, got {len(points)}")
+        if all(point == points[0] for point in points):
+            raise ValueError(f"brush needs at least 2 different points, got only {points[0]}")
+        if _is_per_shape(width):
+            widths = _column(width, len(points), "width")
+        if smooth:
+            tolerance = self._tolerance(tolerance)
+            centerline = []
+            params = []
+            for i, curve in enumerate(_smooth_curves(points)):
+                for t, x, y in _flatten_curve(_cubic_point(curve), tolerance)[bool(i):]:
+                    centerline.append((x, y))
+                    params.append((i, t))
+            if _is_per_shape(width):
+                widths = [widths[i] * (1 - t) + widths[i + 1] * t for i, t in params]
+            points = centerline
+        if callable(width):
+            distances = [0.0]
+            for (x0, y0), (x1, y1) in zip(points, points[1:]):
+                distances.append(distances[-1] + math.sqrt((x1 - x0)**2 + (y1 - y0)**2))
+            total = distances[-1] or 1.0
+            widths = [width(d / total) for d in distances]
+        elif not _is_per_shape(width):
+            widths = [width] * len(points)
+        if any(w < 0 for w in widths):
+            raise ValueError(f"brush width can't be negative, got {min(widths)}")
+
+        if stroke is None:
+            stroke = fill
+        outline = _polyline_outline(points, widths)
+        coords = array('d', [c for point in outline for c in point])
+        return self._add(_Shape('polygon', coords, self._style(fill, stroke, stroke_width)))
 
     def move_group(self, name: str, dx: float = 0, dy: float = 0) -> 'Canvas':
-        """Move a group by offset (dx, dy)."""
+        """
+        Move a group by offset (dx, dy) from where it was drawn.
+
+        The offset replaces the one from an earlier move_group call, so an
+        animation loop can pass the current position every frame.
+        """
         if name not in self.groups:
             return self
 
-        # Parse existing transform or create new one
-        existing = self.group_transforms.get(name, "")
-        if existing and "translate" in existing:
-            # Extract current translation and add to it
-            # For simplicity, replace any existing translate
-            import re
-            existing = re.sub(r'translate\([^)]+\)', '', existing)
-
-        self.group_transforms[name] = f"translate({dx}, {dy}) {existing}".strip()
+        # The move is the outermost step of the transform: swap the old
+        # offset for the new one
+        old_dx, old_dy = self._group_offsets.get(name, (0, 0))
+        a, b, c, d, e, f = self.group_transforms[name]
+        self.group_transforms[name] = (a, b, c, d, e + dx - old_dx, f + dy - old_dy)
+        self._group_offsets[name] = (dx, dy)
+        self._changed()
         return self
 
     def rotate_group(self, name: str, angle: float, cx: float = 0, cy: float = 0) -> 'Canvas':
-        """Rotate a group by angle degrees around point (cx, cy)."""
+        """Rotate a group by angle degrees around point (cx, cy), adding to earlier rotations."""
         if name not in self.groups:
             return self
 
-        existing = self.group_transforms[name]
-        self.group_transforms[name] = f"{existing} rotate({angle}, {cx}, {cy})".strip()
+        self.group_transforms[name] = _mat_mul(self.group_transforms[name], _rotation(angle, cx, cy))
+        self._changed()
+        return self
+
+    def animate_group(self, name: str, duration: float = 2, dx: float = 0, dy: float = 0,
+                      angle: float = 0, cx: float = 0, cy: float = 0,
+                      scale: Optional[float] = None, opacity: Optional[float] = None,
+                      path: Optional[List[Tuple[float, float]]] = None,
+                      repeat: Union[bool, int] = True, bounce: bool = False,
+                      delay: float = 0) -> 'Canvas':
+        """
+        Animate a group in the browser, without running any more Python.
+
+        Adds SMIL animation elements to the group, so the SVG from to_svg()
+        plays the motion by itself. Every call adds one more animation on
+        top of the group's transform and the earlier animations.
+
+        Args:
+            name: Group to animate
+            duration: Seconds for one run of the animation
+            dx, dy: Distance to move
+            angle: Degrees to rotate around (cx, cy), e.g. 360 for a full spin
+            cx, cy: Center for rotation and scaling
+            scale: Size to grow or shrink to around (cx, cy), e.g. 1.5
+            opacity: Opacity to fade to, e.g. 0.2 for a pulse
+            path: Points to follow, as offsets from where the group was drawn
+                  (usually starting at (0, 0)), instead of dx/dy
+            repeat: True repeats forever, False plays once and stays at the
+                    end, a number repeats that many times
+            bounce: Go there and back again in each run
+            delay: Seconds to wait before starting
+
+        Example:
+            can.animate_group("mandala", duration=10, angle=360, cx=400, cy=300)
+            can.animate_group("star", opacity=0.2, bounce=True)
+        """
+        if name not in self.groups:
+            return self
+        if duration <= 0:
+            raise ValueError(f"Animation duration must be positive, got {duration}")
+
+        if repeat is True:
+            timing = f'dur="{_num(duration)}s" repeatCount="indefinite"'
+        elif repeat is False or repeat <= 1:
+            timing = f'dur="{_num(duration)}s" fill="freeze"'
+        else:
+            timing = f'dur="{_num(duration)}s" repeatCount="{_num(repeat)}" fill="freeze"'
+        if delay:
+            timing += f' begin="{_num(delay)}s"'
+
+        def transform(kind: str, start: str, end: str) -> str:
+            values = f"{start};{end};{start}" if bounce else f"{start};{end}"
+            return (f'<animateTransform attributeName="transform" type="{kind}" '
+                    f'values="{values}" additive="sum" {timing}/>')
+
+        animations = []
+        if path:
+            d = "M" + "L".join(f"{_num(x)} {_num(y)}" for x, y in path)
+            keys = ' keyPoints="0;1;0" keyTimes="0;0.5;1" calcMode="linear"' if bounce else ""
+            animations.append(f'<animateMotion path="{d}"{keys} {timing}/>')
+        elif dx or dy:
+            animations.append(transform("translate", "0 0", f"{_num(dx)} {_num(dy)}"))
+        if angle:
+            center = f"{_num(cx)} {_num(cy)}"
+            animations.append(transform("rotate", f"0 {center}", f"{_num(angle)} {center}"))
+        if scale is not None and scale != 1:
+            if cx or cy:
+                # Keep (cx, cy) in place: scaling by k around it is
+                # translate(c * (1 - k)) scale(k), linear in k
+                shift = 1 - scale
+                animations.append(transform("translate", "0 0", f"{_num(cx * shift)} {_num(cy * shift)}"))
+            animations.append(transform("scale", "1", _num(scale)))
+        if opacity is not None:
+            values = f"1;{_num(opacity)};1" if bounce else f"1;{_num(opacity)}"
+            animations.append(f'<animate attributeName="opacity" values="{values}" {timing}/>')
+
+        if animations:
+            self.group_animations.setdefault(name, []).extend(animations)
+            self._changed()
         return self
 
     def hide_group(self, name: str) -> 'Canvas':
         """Hide a group from rendering."""
         if name in self.group_visibility:
             self.group_visibility[name] = False
+            self._changed()
         return self
 
     def show_group(self, name: str) -> 'Canvas':
         """Show a previously hidden group."""
         if name in self.group_visibility:
             self.group_visibility[name] = True
+            self._changed()
         return self
 
     def remove_group(self, name: str) -> 'Canvas':
-        """Permanently remove a group from the canvas."""
-        if name in self.groups:
-            del self.groups[name]
-            del self.group_visibility[name]
-            del self.group_transforms[name]
+        """Permanently remove a group, and the groups nested in it, from the canvas."""
+        if name not in self.groups:
+            return self
+        for key in [key for key, _, _, _ in self._segments(name, hidden=True)]:
+            self._shape_count -= sum(shape.count for shape in self.groups[key])
+            del self.groups[key]
+            del self.group_parents[key]
+            del self.group_visibility[key]
+            del self.group_transforms[key]
+            self._group_offsets.pop(key, None)
+            self.group_animations.pop(key, None)
+            self.layer_z.pop(key, None)
+            self._segment_cache.pop(key, None)
+            self._subtree_cache.pop(key, None)
+            self._spatial.pop(key, None)
+        self._changed()
         return self
 
     def clear(self) -> 'Canvas':
-        """Clear all shapes and groups from the canvas."""
+        """
+        Clear all shapes and groups from the canvas.
+
+        The canvas's random numbers (canvas.random) also start over from
+        its seed, so drawing the same scene again after clear() gives the
+        same picture, e.g. in an animation loop that redraws every frame.
+        """
+        self.random.seed(self.seed)
         self.shapes = []
         self.groups = {}
+        self.group_parents = {}
         self.group_transforms = {}
+        self._group_offsets = {}
         self.group_visibility = {}
+        self.group_animations = {}
+        self.layer_z = {}
         self.current_group = None
+        self._shape_count = 0
+        self._styles = {}
+        self._style_attrs = {}
+        self._style_classes = {}
+        self._style_rules = []
+        self._segment_cache = {}
+        self._subtree_cache = {}
+        self._spatial = {}
+        self._changed()
         return self
 
-    def to_svg(self) -> str:
-        """Generate the complete SVG string."""
-        svg_header = f'<svg width="{self.width}" height="{self.height}" xmlns="http://www.w3.org/2000/svg">'
-        svg_background = f'<rect width="100%" height="100%" fill="{self.background}"/>'
+    def copy(self) -> 'Canvas':
+        """
+        Copy of the canvas that can be drawn on without changing this one.
+
+        Shape records are never changed once drawn, so both canvases share
+        them, and markup already rendered for this canvas is reused by the
+        copy. The copy's random numbers carry on from where this canvas's
+        are, independently of them.
+
+        Example:
+            scene = Canvas(800, 600)
+            ...  # Draw the background once
+            day = scene.copy()
+            day.circle(700, 100, 40, fill=Color.YELLOW)
+        """
+        can = copy.copy(self)
+        can.random = random.Random()
+        can.random.setstate(self.random.getstate())
+        can.shapes = list(self.shapes)
+        can.groups = {name: list(shapes) for name, shapes in self.groups.items()}
+        can.group_parents = dict(self.group_parents)
+        can.group_transforms = dict(self.group_transforms)
+        can._group_offsets = dict(self._group_offsets)
+        can.group_visibility = dict(self.group_visibility)
+        can.group_animations = {name: list(elements) for name, elements in self.group_animations.items()}
+        can.layer_z = dict(self.layer_z)
+        can.gradients = dict(self.gradients)
+        can.symbols = dict(self.symbols)
+        can._styles = dict(self._styles)
+        can._style_attrs = dict(self._style_attrs)
+        can._style_classes = dict(self._style_classes)
+        can._style_rules = list(self._style_rules)
+        can._segment_cache = dict(self._segment_cache)
+        can._subtree_cache = dict(self._subtree_cache)
+        can._spatial = {}  # Indexes are extended in place, so the copy builds its own
+        return can
+
+    def _spatial_index(self, segments: List[tuple]) -> List[tuple]:
+        """(key, transform matrix, _SpatialSegment) for segments, brought up to date."""
+        result = []
+        for key, shapes, _, _ in segments:
+            index = self._spatial.get(key)
+            done = index.count if index is not None else 0
+            if (index is None or index.defs_version != self._defs_version or done > len(shapes)
+                    or (done and shapes[done - 1] is not index.last)):
+                index = self._spatial[key] = _SpatialSegment(self._defs_version)
+            if index.count < len(shapes):
+                index.extend(shapes[index.count:], self.symbols)
+            matrix = self._world_transform(key) if key else None
+            if matrix == _IDENTITY:
+                matrix = None
+            result.append((key, matrix, index))
+        return result
+
+    def shapes_at(self, x: float, y: float) -> List[Tuple[Optional[str], int]]:
+        """
+        Find the shapes drawn at a point, e.g. to check what a click hit.
+
+        Shapes are tested exactly: inside their fill by SVG's nonzero rule
+        (not for fill="none") or on their stroke, at its full width. Text
+        and stamps are tested by their bounding box. Hidden groups are
+        skipped and group transforms from move_group()/rotate_group() are
+        applied (animations are not). Not available in the browser.
+
+        Returns:
+            (group, index) for each shape, bottom to top: group is None for
+            shapes outside any group, index counts the shapes in that group
+            in drawing order
+
+        Example:
+            if can.shapes_at(120, 80):
+                print("Something is there!")
+        """
+        return _local_module('spatial', 'shapes_at()').shapes_at(self, x, y)
+
+    def shapes_in_rect(self, x: float, y: float, width: float,
+                       height: float) -> List[Tuple[Optional[str], int]]:
+        """
+        Find the shapes whose bounding box overlaps a rectangle.
+
+        Shapes in moved or rotated groups are matched by the bounding box
+        of where they end up on the canvas (the same boxes bounds() and
+        overlapping_pairs() use). Not available in the browser.
+
+        Returns:
+            (group, index) for each shape in drawing order, like shapes_at()
+        """
+        return _local_module('spatial', 'shapes_in_rect()').shapes_in_rect(self, x, y, width, height)
+
+    def overlapping_pairs(self) -> List[tuple]:
+        """
+        Find every pair of shapes whose bounding boxes overlap.
+
+        Two circles only count when they really touch. Uses a sweep over
+        the boxes sorted by x, so it stays fast for thousands of shapes.
+        Not available in the browser.
+
+        Returns:
+            ((group, index), (group, index)) pairs, earlier-drawn shape first
+
+        Example:
+            for a, b in can.overlapping_pairs():
+                print(a, "bumps into", b)
+        """
+        return _local_module('spatial', 'overlapping_pairs()').overlapping_pairs(self)
+
+    def optimize(self) -> Dict[str, int]:
+        """
+        Remove shapes that cannot be seen, so the SVG has fewer elements.
+
+        Two kinds of shapes go:
+        - exact repeats of a shape drawn again later (only for opaque
+          styles, since a see-through shape drawn twice looks darker)
+        - shapes completely hidden under a later rect, circle or ellipse
+          with a solid, fully opaque fill (no gradient, no opacity)
+
+        Only shapes in the same group hide each other, so moving, hiding
+        or animating a group later cannot uncover anything. Text and
+        stamps are never removed. Not available in the browser.
+
+        Returns:
+            {'duplicates': shapes removed as repeats, 'covered': shapes removed as hidden}
+
+        Example:
+            can.optimize()   # {'duplicates': 3, 'covered': 12}
+        """
+        return _local_module('optimize', 'optimize()').optimize(self)
+
+    def bounds(self, group: Optional[str] = None) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Smallest box around everything drawn: (left, top, right, bottom).
+
+        Not available in the browser.
+
+        Args:
+            group: Only this group's shapes and those of the visible groups
+                   nested in it (drawn even if the group itself is hidden)
+
+        Returns:
+            The box, or None if there is nothing to measure
+        """
+        return _local_module('spatial', 'bounds()').bounds(self, group)
+
+    def _defs_svg(self, fmt, options: tuple) -> str:
+        """<defs> block (gradients and symbols), re-rendered only when one changes."""
+        key = (self._defs_version, options)
+        cached = self._defs_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        css_classes = options[1]
+        symbols = "".join(f'<g id="sym_{name}">{"".join(self._iter_shapes(shapes, fmt, css_classes))}</g>'
+                          for name, shapes in self.symbols.items())
+        defs = f"<defs>{''.join(self.gradients.values())}{symbols}</defs>"
+        self._defs_cache = (key, defs)
+        return defs
+
+    def _segment_svg(self, key: Optional[str], shapes: List[_Shape], fmt,
+                     css_classes: bool) -> str:
+        """
+        Markup for one display-list segment (ungrouped shapes or one group).
+
+        The result is cached per segment. Shapes appended since the last
+        render are rendered and added to the cached markup; the rest is
+        reused as-is.
+        """
+        count = len(shapes)
+        last = shapes[-1] if count else None
+        cached = self._segment_cache.get(key)
+        markup = None
+        if cached is not None:
+            done, done_last, markup = cached
+            if done == count and done_last is last:
+                return markup
+            if done < count and (done == 0 or shapes[done - 1] is done_last):
+                markup += "".join(self._iter_shapes(shapes[done:], fmt, css_classes))
+            else:
+                markup = None  # Segment was rewritten, render it again
+        if markup is None:
+            markup = "".join(self._iter_shapes(shapes, fmt, css_classes))
+        self._segment_cache[key] = (count, last, markup)
+        return markup
+
+    def _fresh_segment(self, key: Optional[str], shapes: List[_Shape]) -> Optional[str]:
+        """Cached markup for a segment if it is still up to date, else None."""
+        cached = self._segment_cache.get(key)
+        if cached is not None and cached[0] == len(shapes) and (
+                not shapes or cached[1] is shapes[-1]):
+            return cached[2]
+        return None
+
+    def _render_options(self, precision: Optional[int], css_classes: Optional[bool]) -> tuple:
+        """Fill in canvas defaults and validate: (precision, css_classes)."""
+        if precision is None:
+            precision = self.precision
+        if css_classes is None:
+            css_classes = self.css_classes
+        _number_formatter(precision)  # Validate before any output is produced
+        return (precision, bool(css_classes))
+
+    def _cache_usable(self, options: tuple) -> bool:
+        """Whether cached segments can serve a render with these options."""
+        if options != (self.precision, bool(self.css_classes)):
+            return False  # One-off render with different options
+        if self._segment_options != options:
+            # Canvas precision or css_classes was changed since the segments were rendered
+            self._segment_cache = {}
+            self._segment_options = options
+        return True
+
+    def _iter_head(self, fmt, options: tuple):
+        """Yield the document start: <svg>, <style> (css_classes), background and <defs>."""
+        if options[1]:
+            scope, style_block = self._style_block()
+            yield f'<svg class="{scope}" width="{self.width}" height="{self.height}" xmlns="http://www.w3.org/2000/svg">'
+            yield style_block
+        else:
+            yield f'<svg width="{self.width}" height="{self.height}" xmlns="http://www.w3.org/2000/svg">'
+        yield f'<rect width="100%" height="100%" fill="{self.background}"/>'
+
+        if self.gradients or self.symbols:
+            yield self._defs_svg(fmt, options)
+
+    def _group_opening(self, name: str, matrix: tuple) -> str:
+        """A group's <g> tag with this transform, followed by its animation elements."""
+        transform_attr = f' transform="{_transform_attr(matrix)}"' if matrix != _IDENTITY else ""
+        return f'<g id="{name}"{transform_attr}>{"".join(self.group_animations.get(name, ()))}'
+
+    def _segments(self, group: Optional[str] = None, hidden: bool = False) -> List[tuple]:
+        """
+        Rendered display-list segments as (key, shapes, opening tag, depth).
+
+        The ungrouped shapes come first (key None, no tag, depth 0), then
+        the visible groups in document order: every group is followed by
+        the groups nested in it, and depth counts the <g> elements around
+        its shapes. Sibling groups are ordered by layer z, then creation.
+
+        Args:
+            group: Only this group (even if hidden) and the groups in it
+            hidden: Include hidden groups
+        """
+        children = {}
+        for name, parent in self.group_parents.items():
+            children.setdefault(parent, []).append(name)
+        if self.layer_z:
+            z = self.layer_z
+            for names in children.values():
+                names.sort(key=lambda name: z.get(name, 0))
+        if group is None:
+            segments = [(None, self.shapes, None, 0)]
+            stack = [(name, 1) for name in reversed(children.get(None, ()))]
+        else:
+            segments = []
+            stack = [(group, 1)]
+        while stack:
+            name, depth = stack.pop()
+            if not (hidden or name == group or self.group_visibility[name]):
+                continue  # Skip hidden groups and everything in them
+            opening = self._group_opening(name, self.group_transforms[name])
+            segments.append((name, self.groups[name], opening, depth))
+            stack.extend((child, depth + 1) for child in reversed(children.get(name, ())))
+        return segments
+
+    def _world_transform(self, name: str) -> tuple:
+        """A group's transform combined with those of the groups it is nested in."""
+        matrix = self.group_transforms[name]
+        parent = self.group_parents[name]
+        while parent is not None:
+            matrix = _mat_mul(self.group_transforms[parent], matrix)
+            parent = self.group_parents[parent]
+        return matrix
+
+    def _animated(self, name: str) -> bool:
+        """Whether a group or a group it is nested in has animations."""
+        while name is not None:
+            if name in self.group_animations:
+                return True
+            name = self.group_parents[name]
+        return False
+
+    def _cull_plan(self, segments: List[tuple]) -> Dict[Optional[str], List[int]]:
+        """
+        Element indices to keep, for each segment with elements that
+        cannot reach the canvas. Segments with nothing to drop are left out.
+
+        Bounds are widened where the spatial index box may be too tight
+        for this: text gets a full em per character, stroked outlines room
+        for miter joins. Animated groups, and the groups in them, are never
+        culled, since they may move into view.
+        """
+        width, height = self.width, self.height
+        plan = {}
+        for key, matrix, index in self._spatial_index(segments):
+            if key is not None and self._animated(key):
+                continue
+            records = index.records
+            kept = []
+            for i, box in enumerate(index.world_boxes(matrix)):
+                if box is None:
+                    continue  # Draws nothing
+                record = records[i]
+                tag = record.tag
+                if tag == 'text':
+                    x, y, size = record.geom
+                    box = _box_transform((x, y - size, x + size * len(record.extra[1]), y + size / 2), matrix)
+                elif tag in ('polygon', 'polyline', 'path') and _stroke_pad(record.style):
+                    x0, y0, x1, y1 = index.boxes[i]
+                    pad = _stroke_pad(record.style) * 3
+                    box = _box_transform((x0 - pad, y0 - pad, x1 + pad, y1 + pad), matrix)
+                if box[0] <= width and box[2] >= 0 and box[1] <= height and box[3] >= 0:
+                    kept.append(i)
+            if len(kept) < len(records):
+                plan[key] = kept
+        return plan
+
+    def cull_report(self, precision: Optional[int] = None,
+                    css_classes: Optional[bool] = None) -> Dict[str, int]:
+        """
+        What culling removes from the SVG of the canvas as it is now.
+
+        Returns:
+            {'elements': elements left out, 'bytes': size of their markup}
+
+        Example:
+            can = Canvas(800, 600, cull=True)
+            ...
+            print(can.cull_report())   # {'elements': 120, 'bytes': 9480}
+        """
+        precision, css_classes = self._render_options(precision, css_classes)
+        fmt = _number_formatter(precision)
+        if css_classes:
+            self._style_block()  # Assign classes, as a render would
+        elements = 0
+        size = 0
+        for key, kept in self._cull_plan(self._segments()).items():
+            keep = set(kept)
+            dropped = [r for i, r in enumerate(self._spatial[key].records) if i not in keep]
+            elements += len(dropped)
+            size += len("".join(self._iter_shapes(dropped, fmt, css_classes)).encode('utf-8'))
+        return {'elements': elements, 'bytes': size}
+
+    def _iter_document(self, options: tuple, cache: Optional[bool], cull: bool = False,
+                       bake_transforms: bool = False):
+        """
+        Yield the SVG document piece by piece.
+
+        Args:
+            options: (precision, css_classes) from _render_options
+            cache: True builds and reuses per-segment markup (to_svg).
+                   False reuses up-to-date cached segments but streams the
+                   rest in chunks without keeping it (iter_svg). None
+                   bypasses the cache entirely.
+            cull: Leave out elements outside the canvas. Segments that
+                  lose elements are rendered without the cache.
+            bake_transforms: Apply group transforms to the coordinates
+                  where sketchpy.bake allows. Those groups are rendered
+                  without the cache.
+        """
+        precision, css_classes = options
+        fmt = _number_formatter(precision)
+        yield from self._iter_head(fmt, options)
+
+        segments = self._segments()
+        plan = self._cull_plan(segments) if cull else {}
+        baked, openings = {}, {}
+        if bake_transforms:
+            baked, openings = _local_module('bake', 'bake_transforms').bake_plan(self, segments)
+        if cache and not plan and not openings:
+            # Whole subtrees come from the cache: a changed <g> tag costs
+            # nothing below it
+            yield self._segment_svg(None, self.shapes, fmt, css_classes)
+            children = self._child_segments(segments)
+            for segment in children.get(None, ()):
+                yield segment[2]
+                yield self._subtree_svg(segment, children, fmt, css_classes)
+                yield '</g>'
+            yield '</svg>'
+            return
+
+        yield from self._iter_segments(segments, fmt, css_classes, cache, plan, baked, openings)
+        yield '</svg>'
+
+    def _iter_segments(self, segments: List[tuple], fmt, css_classes: bool,
+                       cache: Optional[bool] = None, plan: Optional[dict] = None,
+                       baked: Optional[dict] = None, openings: Optional[dict] = None):
+        """
+        Yield the markup of consecutive segments, closing every <g> after
+        the groups nested in it.
+
+        cache is as for _iter_document; plan, baked and openings come from
+        _cull_plan and bake.bake_plan.
+        """
+        plan = plan or {}
+        baked = baked or {}
+        openings = openings or {}
+        depths = []  # Depths of the open <g> elements
+        for key, shapes, opening, depth in segments:
+            while depths and depths[-1] >= depth:
+                depths.pop()
+                yield '</g>'
+            if opening:
+                yield openings.get(key, opening)
+                depths.append(depth)
+            kept = plan.get(key)
+            matrix = baked.get(key)
+            if kept is not None or matrix is not None:
+                if kept is None:
+                    records = _flat_records(shapes)
+                else:
+                    records = [self._spatial[key].records[i] for i in kept]
+                if matrix is not None:
+                    records = _local_module('bake', 'bake_transforms').bake_records(records, matrix)
+                yield from self._iter_shapes(records, fmt, css_classes)
+            elif cache:
+                yield self._segment_svg(key, shapes, fmt, css_classes)
+            else:
+                markup = self._fresh_segment(key, shapes) if cache is not None else None
+                if markup is not None:
+                    yield markup
+                else:
+                    yield from self._iter_shapes(shapes, fmt, css_classes)
+        yield '</g>' * len(depths)
+
+    @staticmethod
+    def _child_segments(segments: List[tuple]) -> Dict[Optional[str], List[tuple]]:
+        """Segments of the groups directly inside each segment (None: top level)."""
+        children = {}
+        parents = [None]  # Key of the innermost open segment at each depth
+        for segment in segments[1:]:
+            depth = segment[3]
+            del parents[depth:]
+            children.setdefault(parents[-1], []).append(segment)
+            parents.append(segment[0])
+        return children
+
+    @staticmethod
+    def _subtree_segments(segments: List[tuple], i: int) -> List[tuple]:
+        """Segment i followed by the segments of the groups nested in it."""
+        depth = segments[i][3]
+        end = i + 1
+        while end < len(segments) and segments[end][3] > depth:
+            end += 1
+        return segments[i:end]
+
+    def _subtree_svg(self, segment: tuple, children: Dict[Optional[str], List[tuple]],
+                     fmt, css_classes: bool) -> str:
+        """
+        Markup inside a group's <g>: its shapes, then the groups nested in it.
+
+        Groups with children cache the joined result, checked against its
+        parts, so moving, rotating, hiding or animating a group re-renders
+        its own <g> tag only and reuses everything inside it.
+        """
+        key, shapes = segment[:2]
+        markup = self._segment_svg(key, shapes, fmt, css_classes)
+        if key not in children:
+            return markup
+        parts = [markup]
+        for child in children[key]:
+            parts += (child[2], self._subtree_svg(child, children, fmt, css_classes), '</g>')
+        parts = tuple(parts)
+        cached = self._subtree_cache.get(key)
+        if cached is not None and cached[0] == parts:
+            return cached[1]
+        markup = "".join(parts)
+        self._subtree_cache[key] = (parts, markup)
+        return markup
+
+    def iter_svg(self, precision: Optional[int] = None, css_classes: Optional[bool] = None,
+                 cull: Optional[bool] = None, bake_transforms: bool = False):
+        """
+        Generate the SVG document as a sequence of string chunks.
+
+        Nothing is joined into one big string, so large canvases can be
+        streamed with bounded memory (see write_svg).
+
+        Args:
+            precision: Decimal places for coordinates (default: the canvas precision)
+            css_classes: Use CSS classes for styles (default: the canvas setting)
+            cull: Leave out shapes outside the canvas (default: the canvas setting)
+            bake_transforms: Write group transforms into the coordinates (see to_svg)
+
+        Example:
+            for chunk in can.iter_svg():
+                send(chunk)
+        """
+        options = self._render_options(precision, css_classes)
+        return self._iter_document(options, cache=False if self._cache_usable(options) else None,
+                                   cull=self.cull if cull is None else cull,
+                                   bake_transforms=bake_transforms)
 
-        defs_section = ""
-        if self.gradients:
-            gradient_defs = "".join(self.gradients.values())
-            defs_section = f"<defs>{gradient_defs}</defs>"
+    def to_svg(self, precision: Optional[int] = None, css_classes: Optional[bool] = None,
+               cull: Optional[bool] = None, bake_transforms: bool = False) -> str:
+        """
+        Generate the complete SVG string.
 
-        # Ungrouped shapes
-        ungrouped = ''.join(self.shapes)
+        The result is cached until the canvas changes, so repeated calls
+        (e.g. marimo redisplay) are free. After a change only the affected
+        segment - the gradient defs, the ungrouped shapes or a single group -
+        is rendered again.
 
-        # Grouped shapes
-        grouped = ""
-        for group_name, shapes in self.groups.items():
-            if not self.group_visibility.get(group_name, True):
-                continue  # Skip hidden groups
+        Args:
+            precision: Decimal places for coordinates (default: the canvas
+                       precision). Rounded numbers drop trailing zeros, so
+                       to_svg(precision=1) writes 123.4567 as "123.5" and
+                       100.0 as "100".
+            css_classes: Write styles once as CSS classes in a <style> block
+                         (default: the canvas setting, see Canvas())
+            cull: Leave out shapes that lie completely outside the canvas,
+                  taking strokes and group transforms into account
+                  (default: the canvas setting, see cull_report())
+            bake_transforms: Apply moved, rotated and scaled groups'
+                  transforms to their shapes' coordinates instead of
+                  writing a transform attribute, for tools that ignore
+                  transforms. Rotated rectangles become polygons, rotated
+                  ellipses paths. Groups that cannot be baked (skewed or
+                  unevenly scaled, rotated text, animated) keep theirs.
+                  Not available in the browser.
+        """
+        options = self._render_options(precision, css_classes)
+        cull = self.cull if cull is None else bool(cull)
+        bake_transforms = bool(bake_transforms)
+        if not self._cache_usable(options):
+            return "".join(self._iter_document(options, cache=None, cull=cull,
+                                               bake_transforms=bake_transforms))
+
+        key = (self._version, self.width, self.height, self.background, options, cull, bake_transforms)
+        cached = self._svg_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        svg = "".join(self._iter_document(options, cache=True, cull=cull,
+                                          bake_transforms=bake_transforms))
+        self._svg_cache = (key, svg)
+        return svg
+
+    def write_svg(self, fileobj, precision: Optional[int] = None,
+                  css_classes: Optional[bool] = None, cull: Optional[bool] = None,
+                  bake_transforms: bool = False) -> None:
+        """
+        Stream the SVG document into an open file object.
 
-            transform = self.group_transforms.get(group_name, "")
-            transform_attr = f' transform="{transform}"' if transform else ""
+        Works with text files (open(..., 'w')) and binary files
+        (open(..., 'wb'), io.BytesIO); binary output is UTF-8 encoded.
 
-            group_svg = f'<g id="{group_name}"{transform_attr}>{"".join(shapes)}</g>'
-            grouped += group_svg
+        Args:
+            fileobj: Any object with a write() method
+            precision: Decimal places for coordinates (default: the canvas precision)
+            css_classes: Use CSS classes for styles (default: the canvas setting)
+            cull: Leave out shapes outside the canvas (default: the canvas setting)
+            bake_transforms: Write group transforms into the coordinates (see to_svg)
+        """
+        binary = (isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase))
+                  or 'b' in getattr(fileobj, 'mode', ''))
+        write = fileobj.write
+        for chunk in self.iter_svg(precision, css_classes, cull, bake_transforms):
+            write(chunk.encode('utf-8') if binary else chunk)
+
+    def _element_writer(self, fmt, css_classes: bool):
+        """Function rendering a single display-list record to its element markup."""
+        writers = _SVG_WRITERS
+        attrs = self._class_attrs if css_classes else self._attrs
+        return lambda r: writers[r.tag](r.geom, attrs(r.style), r.extra, fmt)
+
+    def diff(self, previous: 'Canvas', precision: Optional[int] = None,
+             css_classes: Optional[bool] = None) -> List[list]:
+        """
+        Patch that turns the SVG of `previous` into the SVG of this canvas.
 
-        svg_footer = '</svg>'
+        Lets a page that already shows `previous` update only what changed
+        instead of replacing the whole drawing. An element is identified by
+        its segment (None for ungrouped shapes, else the group name) and
+        its position in that segment, so re-running a program after a small
+        edit finds the same elements again.
 
-        return svg_header + svg_background + defs_section + ungrouped + grouped + svg_footer
+        Returns:
+            A list of JSON-friendly ops, applied in order:
+            ['reset', svg]                          replace everything (size,
+                                                    background, styles or defs changed,
+                                                    or either canvas culls)
+            ['set', segment, index, {attr: value}]  change attributes (None removes one)
+            ['replace', segment, index, markup]     swap an element (new tag or text)
+            ['remove', segment, index]              remove (highest index first)
+            ['add', segment, markup]                append an element to the segment
+            ['group', name, {attr: value}]          change a group's <g> attributes
+            ['remove_group', name]                  remove a group with everything in it
+            ['add_group', markup, parent]           append a whole <g> after the other
+                                                    groups in parent (None: top level)
+
+            An empty list means nothing changed.
+        """
+        options = self._render_options(precision, css_classes)
+        fmt = _number_formatter(options[0])
+        if self.cull or previous.cull:
+            # Culling shifts element positions, so they cannot be matched up
+            return [['reset', self.to_svg(*options)]]
+        if "".join(self._iter_head(fmt, options)) != "".join(previous._iter_head(fmt, options)):
+            return [['reset', self.to_svg(*options)]]
+
+        old_list = previous._segments()
+        old_segments = {key: (shapes, opening) for key, shapes, opening, _ in old_list}
+        new_segments = self._segments()
+        kept = {key for key, _, _, _ in new_segments}.intersection(old_segments)
+        if any(self.group_parents.get(key) != previous.group_parents.get(key) for key in kept):
+            return [['reset', self.to_svg(*options)]]  # Moved into another group
+        old_children = previous._child_segments(old_list)
+        new_children = self._child_segments(new_segments)
+        for parent in kept:
+            old_keys = [segment[0] for segment in old_children.get(parent, ()) if segment[0] in kept]
+            new_keys = [segment[0] for segment in new_children.get(parent, ())]
+            if old_keys != new_keys[:len(old_keys)]:
+                # Groups were reordered, or a new group sits before an old one
+                return [['reset', self.to_svg(*options)]]
+        if any(self.group_animations.get(key) != previous.group_animations.get(key) for key in kept):
+            # Animations restart from scratch anyway
+            return [['reset', self.to_svg(*options)]]
+
+        render_old = previous._element_writer(fmt, options[1])
+        render_new = self._element_writer(fmt, options[1])
+        # A removed or added group takes the groups inside it along
+        ops = [['remove_group', key] for key, _, _, _ in old_list
+               if key not in kept and previous.group_parents[key] in kept]
+        for i, (key, shapes, opening, _) in enumerate(new_segments):
+            if key not in old_segments:
+                parent = self.group_parents[key]
+                if parent in kept:  # Else part of its new parent's markup
+                    markup = "".join(self._iter_segments(self._subtree_segments(new_segments, i),
+                                                         fmt, options[1]))
+                    ops.append(['add_group', markup, parent])
+                continue
+            old_shapes, old_opening = old_segments[key]
+            if opening != old_opening:
+                ops.append(['group', key, _attr_delta(_element_parts(old_opening)[1],
+                                                       _element_parts(opening)[1])])
+            _diff_elements(key, _flat_records(old_shapes), _flat_records(shapes),
+                           render_old, render_new, ops)
+        return ops
 
     def save(self, filename: str) -> None:
         """Save the canvas to an SVG file."""
-        with open(filename, 'w') as f:
-            f.write(self.to_svg())
+        with open(filename, 'w', encoding='utf-8') as f:
+            self.write_svg(f)
         print(f"Saved to {filename}")
 
+    def to_png(self, scale: float = 1.0, processes: Optional[int] = None) -> bytes:
+        """
+        Render the canvas to PNG image bytes, without Pillow or cairo.
+
+        For thumbnails, previews and places that cannot show SVG. Edges
+        are anti-aliased; gradients and opacity are drawn, text is not.
+        Group animations show their starting state. Not available in the
+        browser.
+
+        Args:
+            scale: Image size relative to the canvas (0.25 for a thumbnail)
+            processes: Render bands of the image in this many worker
+                       processes, for large canvases
+
+        Example:
+            thumbnail = can.to_png(scale=0.25)
+
+        Raises:
+            ValueError: If scale is not positive or the image is too large
+        """
+        return _local_module('raster', 'to_png()').rasterize(self, scale, processes)
+
+    def save_png(self, filename: str, scale: float = 1.0,
+                 processes: Optional[int] = None) -> None:
+        """Save the canvas to a PNG file (see to_png())."""
+        with open(filename, 'wb') as f:
+            f.write(self.to_png(scale, processes))
+        print(f"Saved to {filename}")
+
+    def dumps(self) -> bytes:
+        """
+        Serialize the drawing to compact bytes, to cache it or send it to
+        another process. Canvas.loads() turns them back into an identical
+        canvas, much faster than parsing SVG.
+
+        Layout (little-endian): a 24-byte header, JSON metadata (size,
+        options, the style table, text and path command strings,
+        gradients, symbols, groups and layers), one 16-byte record per
+        display-list entry, then packed float64 and float32 coordinate
+        buffers. Numbers are stored as float32 when that is exact, so
+        nothing is rounded.
+        """
+        from .serialize import dumps
+        return dumps(self)
+
+    @classmethod
+    def loads(cls, data) -> 'Canvas':
+        """
+        Rebuild a canvas from Canvas.dumps() bytes (or any buffer holding
+        them, e.g. a memoryview of shared memory).
+
+        The coordinate buffers are read in place through memoryview casts,
+        without unpacking or copying the data first.
+
+        Raises:
+            ValueError: If data is not a drawing from dumps(), is cut
+                        short, or exceeds the canvas limits
+        """
+        from .serialize import loads
+        return loads(cls, data)
+
     def _repr_html_(self):
         """Automatic display in marimo."""
         return self.to_svg()
@@ -3,8 +3,6 @@ Ocean-themed shape helpers for drawing sea creatures.
 """
 
 import math
-import random
-import time
 
 # Imports will be available when combined for browser
 try:
@@ -72,6 +70,15 @@ class OceanShapes:
             ]
         )
 
+    def _tentacles(self, tentacles: list, taper: float, color: str):
+        """Draw (x1, y1, x2, y2, curl, twist, thickness) tentacles in one batch."""
+        if not tentacles:
+            return
+        x1s, y1s, x2s, y2s, curls, twists, thicknesses = zip(*tentacles)
+        self.canvas.tentacles(x1s, y1s, x2s, y2s, curl=curls, twist=twists,
+                              thickness=thicknesses, taper=taper,
+                              fill=color, stroke=color, stroke_width=1)
+
     def octopus(self, x: float, y: float, size: float = 100,
                 body_color: str = "gradient:ocean_octopus_body",
                 eye_color: str = Color.WHITE,
@@ -113,9 +120,11 @@ class OceanShapes:
         # Reduce further to account for tentacle thickness at angles
         attachment_width = head_width * 0.35
 
-        # Seed random for variation (use position and time for uniqueness)
-        random.seed(int(x * 1000 + y * 1000 + time.time() * 1000))
+        # Variation comes from the canvas's own random numbers, so a seeded
+        # canvas draws the same octopus every time
+        rng = self.canvas.random
 
+        tentacles = []  # (x1, y1, x2, y2, curl, twist, thickness)
         for i in range(num_tentacles):
             # Spread tentacles in an arc below the octopus
             angle = math.pi * 0.15 + (i / (num_tentacles - 1)) * math.pi * 0.7
@@ -125,20 +134,20 @@ class OceanShapes:
             end_y = base_y + math.sin(angle) * tentacle_length
 
             # Add some curl and twist variation for natural S-curves
-            curl = random.uniform(-0.5, 0.5)
-            twist = random.uniform(0.6, 0.9)
+            curl = rng.uniform(-0.5, 0.5)
+            twist = rng.uniform(0.6, 0.9)
 
             # Vary thickness slightly
-            thickness = size * 0.12 * random.uniform(0.8, 1.0)
+            thickness = size * 0.12 * rng.uniform(0.8, 1.0)
 
             # Calculate attachment point within body outline
             # Account for tentacle thickness by keeping them more centered
             attach_offset = (i - (num_tentacles - 1) / 2) * (attachment_width / (num_tentacles - 1))
             attach_x = x + attach_offset
 
-            self.canvas.tentacle(attach_x, base_y, end_x, end_y,
-                               curl=curl, twist=twist, thickness=thickness, taper=0.2,
-                               fill=body_color, stroke=body_color, stroke_width=1)
+            tentacles.append((attach_x, base_y, end_x, end_y, curl, twist, thickness))
+
+        self._tentacles(tentacles, taper=0.2, color=body_color)
 
         # Draw pear-shaped head AFTER tentacles (appears in front)
         self.canvas.pear(x, y, width=head_width, height=head_height,
@@ -191,9 +200,9 @@ class OceanShapes:
         # Reduce to account for tentacle thickness at angles
         group_width = head_width * 0.18
 
-        # Seed random for variation (use position and time for uniqueness)
-        random.seed(int(x * 1000 + y * 1000 + time.time() * 1000))
+        rng = self.canvas.random
 
+        tentacles = []  # (x1, y1, x2, y2, curl, twist, thickness)
         for i in range(num_tentacles):
             # Group tentacles: 4 on left, 4 on right with gaps in middle
             if i < 4:
@@ -212,14 +221,14 @@ class OceanShapes:
             end_y = base_y + math.sin(angle) * tentacle_length
 
             # More natural curl variation
-            curl = random.uniform(-0.4, 0.4)
-            twist = random.uniform(0.5, 0.8)
+            curl = rng.uniform(-0.4, 0.4)
+            twist = rng.uniform(0.5, 0.8)
+
+            thickness = size * 0.13 * rng.uniform(0.85, 1.0)
 
-            thickness = size * 0.13 * random.uniform(0.85, 1.0)
+            tentacles.append((attach_x, base_y, end_x, end_y, curl, twist, thickness))
 
-            self.canvas.tentacle(attach_x, base_y, end_x, end_y,
-                               curl=curl, twist=twist, thickness=thickness, taper=0.15,
-                               fill=body_color, stroke=body_color, stroke_width=1)
+        self._tentacles(tentacles, taper=0.15, color=body_color)
 
         # Draw pear-shaped head
         self.canvas.pear(x, y, width=head_width, height=head_height,
@@ -272,9 +281,9 @@ class OceanShapes:
         # Account for thicker tentacles in cartoon style
         attachment_width = head_width * 0.4
 
-        # Seed random for variation (use position and time for uniqueness)
-        random.seed(int(x * 1000 + y * 1000 + time.time() * 1000))
+        rng = self.canvas.random
 
+        tentacles = []  # (x1, y1, x2, y2, curl, twist, thickness)
         for i in range(num_tentacles):
             # Wide spread for cartoon effect
             angle = math.pi * 0.12 + (i / (num_tentacles - 1)) * math.pi * 0.76
@@ -284,18 +293,18 @@ class OceanShapes:
             end_y = base_y + math.sin(angle) * tentacle_length
 
             # Exaggerated curl and twist
-            curl = random.uniform(-0.7, 0.7)
-            twist = random.uniform(0.7, 1.0)  # More S-curves
+            curl = rng.uniform(-0.7, 0.7)
+            twist = rng.uniform(0.7, 1.0)  # More S-curves
 
-            thickness = size * 0.14 * random.uniform(0.9, 1.1)
+            thickness = size * 0.14 * rng.uniform(0.9, 1.1)
 
             # Calculate attachment point within body outline
             attach_offset = (i - (num_tentacles - 1) / 2) * (attachment_width / (num_tentacles - 1))
             attach_x = x + attach_offset
 
-            self.canvas.tentacle(attach_x, base_y, end_x, end_y,
-                               curl=curl, twist=twist, thickness=thickness, taper=0.25,
-                               fill=body_color, stroke=body_color, stroke_width=1)
+            tentacles.append((attach_x, base_y, end_x, end_y, curl, twist, thickness))
+
+        self._tentacles(tentacles, taper=0.25, color=body_color)
 
         # Draw exaggerated pear head (shorter and wider)
         self.canvas.pear(x, y, width=head_width, height=head_height,
@@ -345,20 +354,22 @@ class OceanShapes:
         tentacle_length = size * 1.5
         base_y = y + bell_radius * 0.5
 
+        rng = self.canvas.random
+        tentacles = []  # (x1, y1, x2, y2, curl, twist, thickness)
         for i in range(tentacle_count):
             # Spread tentacles across bottom of bell
             offset_x = (i - tentacle_count / 2) * (size * 0.2)
-            end_x = x + offset_x + random.uniform(-10, 10)
-            end_y = base_y + tentacle_length + random.uniform(-20, 20)
+            end_x = x + offset_x + rng.uniform(-10, 10)
+            end_y = base_y + tentacle_length + rng.uniform(-20, 20)
 
             # Vary curl, twist, and thickness for natural flowing movement
-            curl = random.uniform(-0.4, 0.4)
-            twist = random.uniform(0.3, 0.8)  # Jellyfish have flowing S-curves
-            thickness = size * 0.05 * random.uniform(0.7, 1.0)
+            curl = rng.uniform(-0.4, 0.4)
+            twist = rng.uniform(0.3, 0.8)  # Jellyfish have flowing S-curves
+            thickness = size * 0.05 * rng.uniform(0.7, 1.0)
+
+            tentacles.append((x + offset_x * 0.5, base_y, end_x, end_y, curl, twist, thickness))
 
-            self.canvas.tentacle(x + offset_x * 0.5, base_y, end_x, end_y,
-                               curl=curl, twist=twist, thickness=thickness, taper=0.1,
-                               fill=body_color, stroke=body_color, stroke_width=1)
+        self._tentacles(tentacles, taper=0.1, color=body_color)
 
         return self
 
@@ -377,9 +388,10 @@ class OceanShapes:
             self (for method chaining)
         """
         # Main stem with gentle S-curve for natural sway
-        curl = random.uniform(-sway, sway)
-        twist = random.uniform(0.2, 0.5)  # Gentle S-curve like underwater plants
-        end_x = x + random.uniform(-20, 20)
+        rng = self.canvas.random
+        curl = rng.uniform(-sway, sway)
+        twist = rng.uniform(0.2, 0.5)  # Gentle S-curve like underwater plants
+        end_x = x + rng.uniform(-20, 20)
         end_y = y - height
 
         self.canvas.tentacle(x, y, end_x, end_y,
@@ -387,7 +399,7 @@ class OceanShapes:
                            fill=color, stroke=color, stroke_width=1)
 
         # Add a few small leaf-like shapes along the stem
-        num_leaves = random.randint(3, 5)
+        num_leaves = rng.randint(3, 5)
         for i in range(num_leaves):
             t = (i + 1) / (num_leaves + 1)  # Position along stem
             leaf_x = x + (end_x - x) * t
@@ -395,7 +407,7 @@ class OceanShapes:
 
             # Small blob for leaf
             leaf_size = height * 0.08
-            self.canvas.blob(leaf_x + random.uniform(-5, 5), leaf_y,
+            self.canvas.blob(leaf_x + rng.uniform(-5, 5), leaf_y,
                            radius=leaf_size, wobble=0.3, points=6,
                            fill=color, stroke=color)
 
@@ -0,0 +1,134 @@
+"""
+Canvas.optimize(): removes repeated shapes and shapes hidden under
+opaque ones. Not part of the browser build.
+"""
+
+import math
+from array import array
+from typing import Dict, List, Optional
+
+from .canvas import Canvas, _Shape, _ShapeBatch, _SpatialSegment, _stroke_pad
+from .spatial import _candidates
+
+
+def _is_solid(color) -> bool:
+    """Whether a fill or stroke color paints fully opaque (no gradient, no alpha)."""
+    if not isinstance(color, str) or color in ("none", "transparent") or color.startswith("gradient:"):
+        return False
+    if color.startswith("#"):
+        return len(color) in (4, 7)  # #rgba and #rrggbbaa carry alpha
+    return not color.startswith(("rgba", "hsla"))
+
+
+def _paints_opaque(style: tuple) -> bool:
+    """Whether drawing a style twice looks the same as drawing it once."""
+    fill, stroke, _, opacity = style
+    return ((opacity is None or opacity >= 1)
+            and (fill is None or fill == "none" or _is_solid(fill))
+            and (stroke is None or stroke == "none" or _is_solid(stroke)))
+
+
+def _covers(occluder: _Shape, target: _Shape, box: tuple) -> bool:
+    """
+    Whether the opaque fill of occluder hides everything target paints
+    (box is the target's bounding box, stroke included).
+    """
+    tag = occluder.tag
+    geom = occluder.geom
+    x0, y0, x1, y1 = box
+    if tag == 'rect':
+        if len(geom) != 4:
+            return False  # Rounded corners leave gaps
+        x, y, w, h = geom
+        # SVG draws nothing for a zero or negative width or height
+        return w > 0 and h > 0 and x <= x0 and y <= y0 and x + w >= x1 and y + h >= y1
+    if tag == 'circle':
+        cx, cy, r = geom
+        if not r > 0:
+            return False
+        if target.tag in ('circle', 'ellipse'):
+            # Round targets fit by their largest radius, not their box corners
+            tx, ty = target.geom[0], target.geom[1]
+            reach = max(target.geom[2:]) + _stroke_pad(target.style)
+            return math.hypot(tx - cx, ty - cy) + reach <= r
+        rx = ry = r
+    elif tag == 'ellipse':
+        cx, cy, rx, ry = geom
+    else:
+        return False
+    if not (rx > 0 and ry > 0):
+        return False
+    # The ellipse is convex: it holds the box if it holds all four corners
+    return all(((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1 for x in (x0, x1) for y in (y0, y1))
+
+
+def optimize(canvas: Canvas) -> Dict[str, int]:
+    """Remove shapes that cannot be seen; see Canvas.optimize()."""
+    duplicates = 0
+    covered = 0
+    segments = [(None, canvas.shapes)] + list(canvas.groups.items())
+    for key, shapes in segments:
+        if not shapes:
+            continue
+        index = _SpatialSegment(canvas._defs_version)
+        index.extend(shapes, canvas.symbols)
+        records = index.records
+        boxes = index.boxes
+        opaque = {}  # style -> has a solid, fully opaque fill
+        for record in records:
+            style = record.style
+            if style not in opaque:
+                opaque[style] = _is_solid(style[0]) and (style[3] is None or style[3] >= 1)
+        occluders = [r.tag in ('rect', 'circle', 'ellipse') and opaque[r.style] for r in records]
+        removed = set()
+        later = set()  # Shapes drawn above the current one, as data
+        for i in range(len(records) - 1, -1, -1):
+            record = records[i]
+            geom = record.geom
+            data = (record.tag, geom.tobytes() if isinstance(geom, array) else geom,
+                    record.style, record.extra)
+            if data in later and _paints_opaque(record.style) and record.tag not in ('text', 'use'):
+                removed.add(i)
+                duplicates += 1
+                continue
+            later.add(data)
+            box = boxes[i]
+            if box is None or record.tag in ('text', 'use'):
+                continue
+            x0, y0, x1, y1 = box
+            for j in _candidates(index, box):
+                if j <= i or not occluders[j]:
+                    continue
+                outer = boxes[j]
+                if (outer[0] <= x0 and outer[1] <= y0 and outer[2] >= x1 and outer[3] >= y1
+                        and _covers(records[j], record, box)):
+                    removed.add(i)
+                    covered += 1
+                    break
+        if removed:
+            _remove_elements(canvas, key, shapes, removed)
+    return {'duplicates': duplicates, 'covered': covered}
+
+
+def _remove_elements(canvas: Canvas, key: Optional[str], shapes: List[_Shape], removed: set):
+    """Drop elements (by expanded index) from a segment, keeping batches batched."""
+    kept = []
+    start = 0
+    for shape in shapes:
+        count = shape.count if isinstance(shape, _ShapeBatch) else 1
+        gone = [i - start for i in range(start, start + count) if i in removed]
+        start += count
+        if not gone:
+            kept.append(shape)
+        elif len(gone) < count:
+            skip = set(gone)
+            columns = tuple(array('d', (v for i, v in enumerate(column) if i not in skip))
+                            for column in shape.geom)
+            kept.append(_ShapeBatch(shape.tag, columns, shape.style))
+    # In place: a PathBuilder whose path survived keeps drawing into this list
+    shapes[:] = kept
+    canvas._shape_count -= len(removed)
+    # The last record may be unchanged, which the caches would take as "nothing new"
+    canvas._segment_cache.pop(key, None)
+    canvas._spatial.pop(key, None)
+    canvas._changed()
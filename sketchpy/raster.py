@@ -0,0 +1,652 @@
+"""
+Bitmap output for Canvas.to_png(): a small pure-Python rasterizer.
+
+Shapes become polygons in pixel coordinates (curves flattened, strokes
+outlined) that are filled scanline by scanline with the nonzero rule.
+Coverage is exact along each scanline and sampled _SUBSAMPLES times down
+each pixel row, which anti-aliases edges without rendering a larger
+image. Gradients, opacity and colors with alpha are composited the way
+an SVG renderer does. Text is not drawn: there are no fonts to draw it
+with.
+
+Only the standard library is used; the PNG is compressed with zlib.
+Not part of the browser build.
+"""
+
+import colorsys
+import functools
+import math
+import re
+import struct
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .canvas import (Canvas, _ATTR_RE, _PATH_ARITY, _element_parts, _flat_records,
+                     _mat_invert, _mat_mul, _rotation, _rounded_rect_path)
+
+# Samples down each pixel row; across the row coverage is exact
+_SUBSAMPLES = 4
+
+# Pixel rows rendered together: bounds memory use and is the unit of parallel work
+_BAND_ROWS = 32
+
+# How far flattened curves may stray from the true outline, in pixels
+_TOLERANCE = 0.2
+
+# Largest image to_png() renders, in pixels (four times the largest canvas)
+_MAX_PIXELS = 4 * Canvas.MAX_AREA
+
+# CSS color names; other names render black
+_NAMED_COLORS = {
+    'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (255, 0, 0), 'lime': (0, 255, 0),
+    'green': (0, 128, 0), 'blue': (0, 0, 255), 'yellow': (255, 255, 0), 'cyan': (0, 255, 255),
+    'aqua': (0, 255, 255), 'magenta': (255, 0, 255), 'fuchsia': (255, 0, 255),
+    'gray': (128, 128, 128), 'grey': (128, 128, 128), 'silver': (192, 192, 192),
+    'maroon': (128, 0, 0), 'olive': (128, 128, 0), 'navy': (0, 0, 128), 'purple': (128, 0, 128),
+    'teal': (0, 128, 128), 'orange': (255, 165, 0), 'pink': (255, 192, 203),
+    'brown': (165, 42, 42), 'gold': (255, 215, 0), 'coral': (255, 127, 80),
+    'salmon': (250, 128, 114), 'tomato': (255, 99, 71), 'violet': (238, 130, 238),
+    'indigo': (75, 0, 130), 'turquoise': (64, 224, 208), 'skyblue': (135, 206, 235),
+    'lightblue': (173, 216, 230), 'darkblue': (0, 0, 139), 'darkgreen': (0, 100, 0),
+    'lightgreen': (144, 238, 144), 'lightgray': (211, 211, 211), 'lightgrey': (211, 211, 211),
+    'darkgray': (169, 169, 169), 'darkgrey': (169, 169, 169), 'beige': (245, 245, 220),
+    'tan': (210, 180, 140), 'khaki': (240, 230, 140), 'crimson': (220, 20, 60),
+    'chocolate': (210, 105, 30), 'sienna': (160, 82, 45), 'plum': (221, 160, 221),
+    'lavender': (230, 230, 250), 'ivory': (255, 255, 240), 'wheat': (245, 222, 179),
+}
+
+_COLOR_FUNCTION_RE = re.compile(r'(rgba?|hsla?)\(([^)]*)\)')
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_color(color: str) -> Optional[Tuple[float, float, float, float]]:
+    """(r, g, b, alpha) from 0 to 1 for a CSS color; None for none and transparent."""
+    color = color.strip().lower()
+    if color in ('none', 'transparent'):
+        return None
+    if color.startswith('#'):
+        digits = color[1:]
+        if len(digits) in (3, 4):
+            digits = "".join(ch * 2 for ch in digits)
+        if len(digits) in (6, 8) and all(ch in '0123456789abcdef' for ch in digits):
+            values = [int(digits[i:i + 2], 16) / 255 for i in range(0, len(digits), 2)]
+            return tuple(values) + (1.0,) * (4 - len(values))
+        return (0.0, 0.0, 0.0, 1.0)
+    match = _COLOR_FUNCTION_RE.fullmatch(color)
+    if match:
+        args = [arg for arg in re.split(r'[\s,/]+', match.group(2)) if arg]
+        if len(args) >= 3:
+            try:
+                values = [float(arg.rstrip('%deg')) for arg in args[:4]]
+            except ValueError:
+                return (0.0, 0.0, 0.0, 1.0)
+            alpha = 1.0
+            if len(values) == 4:
+                alpha = values[3] / 100 if args[3].endswith('%') else values[3]
+            if match.group(1).startswith('rgb'):
+                rgb = [v / 100 if arg.endswith('%') else v / 255 for v, arg in zip(values, args)]
+            else:
+                rgb = colorsys.hls_to_rgb(values[0] / 360 % 1, values[2] / 100, values[1] / 100)
+            return tuple(min(max(v, 0.0), 1.0) for v in (*rgb[:3], alpha))
+    r, g, b = _NAMED_COLORS.get(color, (0, 0, 0))
+    return (r / 255, g / 255, b / 255, 1.0)
+
+
+def _fraction(value: str) -> float:
+    """Gradient attribute value: "25%" or "0.25"."""
+    return float(value[:-1]) / 100 if value.endswith('%') else float(value)
+
+
+def _gradient(definition: str) -> Optional[tuple]:
+    """
+    (kind, geometry, lookup table) for a gradient in Canvas.gradients.
+
+    geometry is (x1, y1, x2, y2) for linear and (cx, cy, r) for radial
+    gradients, in fractions of the shape's bounding box. The table holds
+    256 (r, g, b, alpha) colors along the gradient.
+    """
+    tag, attrs, content = _element_parts(definition)
+    stops = []
+    for stop in re.findall(r'<stop\b[^>]*>', content):
+        stop_attrs = dict(_ATTR_RE.findall(stop))
+        color = _parse_color(stop_attrs.get('stop-color', 'black')) or (0.0, 0.0, 0.0, 0.0)
+        offset = min(max(_fraction(stop_attrs.get('offset', '0')), 0.0), 1.0)
+        if stops:
+            offset = max(offset, stops[-1][0])  # Offsets never go back
+        stops.append((offset, color))
+    if not stops:
+        return None
+
+    table = []
+    i = 0
+    for step in range(256):
+        t = step / 255
+        while i < len(stops) - 1 and stops[i + 1][0] < t:
+            i += 1
+        (t0, c0), (t1, c1) = stops[i], stops[min(i + 1, len(stops) - 1)]
+        if t <= t0 or t1 <= t0:
+            table.append(c0 if t <= t0 else c1)
+        else:
+            k = min((t - t0) / (t1 - t0), 1.0)
+            table.append(tuple(a + (b - a) * k for a, b in zip(c0, c1)))
+
+    if tag == 'linearGradient':
+        geometry = tuple(_fraction(attrs.get(name, default)) for name, default in
+                         (('x1', '0%'), ('y1', '0%'), ('x2', '100%'), ('y2', '0%')))
+        return 'linear', geometry, table
+    geometry = tuple(_fraction(attrs.get(name, '50%')) for name in ('cx', 'cy', 'r'))
+    return 'radial', geometry, table
+
+
+def _arc_steps(radius: float) -> int:
+    """Points for a full circle of this radius in pixels, within _TOLERANCE."""
+    if radius <= _TOLERANCE:
+        return 8
+    return max(8, min(1024, math.ceil(math.pi / math.acos(1 - _TOLERANCE / radius))))
+
+
+def _ellipse_points(cx: float, cy: float, rx: float, ry: float, scale: float) -> List[float]:
+    """Flat [x0, y0, x1, y1, ...] outline of an ellipse."""
+    n = _arc_steps(max(rx, ry) * scale)
+    points = []
+    for i in range(n):
+        t = 2 * math.pi * i / n
+        points += (cx + rx * math.cos(t), cy + ry * math.sin(t))
+    return points
+
+
+def _flatten_path(commands: str, coords, scale: float) -> List[tuple]:
+    """Subpaths of a 'path' record as (flat points, closed), curves flattened."""
+    subpaths = []
+    points = None
+    x = y = start_x = start_y = 0.0
+    i = 0
+    for command in commands:
+        args = coords[i:i + _PATH_ARITY[command]]
+        i += _PATH_ARITY[command]
+        if command == 'M':
+            if points is not None:
+                subpaths.append((points, False))
+            x, y = start_x, start_y = args
+            points = [x, y]
+            continue
+        if points is None:
+            points = [x, y]
+        if command == 'L':
+            x, y = args
+            points += (x, y)
+        elif command == 'Q':
+            x1, y1, x2, y2 = args
+            bend = math.hypot(x - 2 * x1 + x2, y - 2 * y1 + y2) * scale
+            n = max(1, min(256, math.ceil(math.sqrt(bend / (4 * _TOLERANCE)))))
+            for k in range(1, n + 1):
+                t = k / n
+                u = 1 - t
+                points += (u * u * x + 2 * u * t * x1 + t * t * x2,
+                           u * u * y + 2 * u * t * y1 + t * t * y2)
+            x, y = x2, y2
+        elif command == 'C':
+            x1, y1, x2, y2, x3, y3 = args
+            bend = max(math.hypot(x - 2 * x1 + x2, y - 2 * y1 + y2),
+                       math.hypot(x1 - 2 * x2 + x3, y1 - 2 * y2 + y3)) * scale
+            n = max(1, min(256, math.ceil(math.sqrt(3 * bend / (4 * _TOLERANCE)))))
+            for k in range(1, n + 1):
+                t = k / n
+                u = 1 - t
+                a, b, c, d = u * u * u, 3 * u * u * t, 3 * u * t * t, t * t * t
+                points += (a * x + b * x1 + c * x2 + d * x3, a * y + b * y1 + c * y2 + d * y3)
+            x, y = x3, y3
+        else:  # Z
+            subpaths.append((points, True))
+            points = None
+            x, y = start_x, start_y
+    if points is not None:
+        subpaths.append((points, False))
+    return subpaths
+
+
+def _stroke_outline(subpaths: List[tuple], width: float, scale: float) -> List[List[float]]:
+    """
+    Polygons that together cover a stroke: one quad per segment and a
+    disc where the line turns (round joins, butt ends). All wind the
+    same way, so the nonzero rule paints their union.
+    """
+    half = width / 2
+    polygons = []
+    disc = None
+    for points, closed in subpaths:
+        xs = points[0::2]
+        ys = points[1::2]
+        if closed and (xs[0], ys[0]) != (xs[-1], ys[-1]):
+            xs.append(xs[0])
+            ys.append(ys[0])
+        directions = []
+        for k in range(len(xs) - 1):
+            dx, dy = xs[k + 1] - xs[k], ys[k + 1] - ys[k]
+            length = math.hypot(dx, dy)
+            if not length:
+                continue
+            nx, ny = -dy / length * half, dx / length * half
+            polygons.append([xs[k] - nx, ys[k] - ny, xs[k + 1] - nx, ys[k + 1] - ny,
+                             xs[k + 1] + nx, ys[k + 1] + ny, xs[k] + nx, ys[k] + ny])
+            directions.append((k, dx / length, dy / length))
+        joins = list(zip(directions, directions[1:]))
+        if closed and len(directions) > 1:
+            joins.append((directions[-1], directions[0]))
+        for (_, ax, ay), (k, bx, by) in joins:
+            turn = math.atan2(abs(ax * by - ay * bx), ax * bx + ay * by)
+            if turn * half * scale < _TOLERANCE:
+                continue  # Gap on the outside of the turn is too small to see
+            if disc is None:
+                disc = _ellipse_points(0, 0, half, half, scale)
+            polygons.append([v + (xs[k] if j % 2 == 0 else ys[k]) for j, v in enumerate(disc)])
+    return polygons
+
+
+def _record_geometry(record, scale: float) -> Optional[tuple]:
+    """
+    (fill polygons, stroke polygons, fill box) of a record in its own
+    coordinates, or None if it draws nothing. scale is pixels per unit,
+    for flattening.
+    """
+    tag = record.tag
+    geom = record.geom
+    fill_polygons = []
+    subpaths = None
+    stroke_polygons = None
+    _, stroke, width, _ = record.style
+    half = (width if width is not None else 1) / 2
+    stroked = stroke is not None and stroke != 'none' and half > 0
+
+    if tag == 'rect':
+        x, y, w, h = geom[:4]
+        if w <= 0 or h <= 0:
+            return None
+        if len(geom) == 6 and geom[4] > 0 and geom[5] > 0:
+            commands, coords = _rounded_rect_path(x, y, w, h, geom[4], geom[5])
+            subpaths = _flatten_path(commands, coords, scale)
+            fill_polygons = [points for points, _ in subpaths]
+        else:
+            fill_polygons = [[x, y, x + w, y, x + w, y + h, x, y + h]]
+            if stroked:
+                # Outer edge minus inner edge: sharp corners like SVG's miter joins
+                stroke_polygons = [[x - half, y - half, x + w + half, y - half,
+                                    x + w + half, y + h + half, x - half, y + h + half]]
+                if w > 2 * half and h > 2 * half:
+                    stroke_polygons.append([x + half, y + half, x + half, y + h - half,
+                                            x + w - half, y + h - half, x + w - half, y + half])
+    elif tag in ('circle', 'ellipse'):
+        if tag == 'circle':
+            cx, cy, rx = geom
+            ry = rx
+        else:
+            cx, cy, rx, ry = geom
+        if rx <= 0 or ry <= 0:
+            return None
+        fill_polygons = [_ellipse_points(cx, cy, rx, ry, scale)]
+        if stroked:
+            stroke_polygons = [_ellipse_points(cx, cy, rx + half, ry + half, scale)]
+            if rx > half and ry > half:
+                inner = _ellipse_points(cx, cy, rx - half, ry - half, scale)
+                stroke_polygons.append([v for k in range(len(inner) - 2, -1, -2)
+                                        for v in inner[k:k + 2]])
+    elif tag == 'line':
+        subpaths = [(list(geom), False)]
+    elif tag in ('polygon', 'polyline'):
+        subpaths = [(list(geom), tag == 'polygon')]
+        fill_polygons = [list(geom)]
+    elif tag == 'path':
+        subpaths = _flatten_path(record.extra, geom, scale)
+        fill_polygons = [points for points, _ in subpaths]
+    else:
+        return None  # text: no fonts to draw it with
+
+    if stroked and stroke_polygons is None and subpaths:
+        stroke_polygons = _stroke_outline(subpaths, 2 * half, scale)
+    points = [p for polygon in (fill_polygons or [pts for pts, _ in subpaths or ()]) for p in polygon]
+    if not points:
+        return None
+    xs, ys = points[0::2], points[1::2]
+    return fill_polygons, stroke_polygons or [], (min(xs), min(ys), max(xs), max(ys))
+
+
+def _edges(polygons: List[List[float]], m: tuple) -> Tuple[list, Optional[tuple]]:
+    """
+    Polygon edges mapped through m as (top, bottom, x at top, dx/dy,
+    winding), and their bounding box. Horizontal edges are left out.
+    """
+    a, b, c, d, e, f = m
+    edges = []
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for polygon in polygons:
+        n = len(polygon) // 2
+        if n < 3:
+            continue
+        xs = [a * polygon[2 * k] + c * polygon[2 * k + 1] + e for k in range(n)]
+        ys = [b * polygon[2 * k] + d * polygon[2 * k + 1] + f for k in range(n)]
+        min_x, max_x = min(min_x, min(xs)), max(max_x, max(xs))
+        min_y, max_y = min(min_y, min(ys)), max(max_y, max(ys))
+        x0, y0 = xs[-1], ys[-1]
+        for x1, y1 in zip(xs, ys):
+            if y0 < y1:
+                edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0), 1))
+            elif y1 < y0:
+                edges.append((y1, y0, x1, (x0 - x1) / (y0 - y1), -1))
+            x0, y0 = x1, y1
+    if not edges:
+        return edges, None
+    return edges, (min_x, min_y, max_x, max_y)
+
+
+def _paint(color, box: tuple, m: tuple, gradients: Dict[str, str]) -> Optional[tuple]:
+    """
+    How to color a shape's pixels: ('solid', (r, g, b, alpha)) or
+    ('gradient', kind, geometry, table, pixel -> gradient box matrix);
+    None paints nothing.
+    """
+    if color.startswith('gradient:'):
+        definition = gradients.get(color[9:])
+        gradient = _gradient(definition) if definition else None
+        x0, y0, x1, y1 = box
+        if gradient is None or x1 <= x0 or y1 <= y0:
+            return None  # Like SVG: no gradient on a shape without area
+        kind, geometry, table = gradient
+        inverse = _mat_invert(_mat_mul(m, (x1 - x0, 0, 0, y1 - y0, x0, y0)))
+        if inverse is None:
+            return None
+        return ('gradient', kind, geometry, table, inverse)
+    color = _parse_color(color)
+    if color is None or not color[3]:
+        return None
+    return ('solid', color)
+
+
+def _record_jobs(record, m: tuple, scale: float, canvas: Canvas, jobs: list) -> None:
+    """Append the fill jobs that draw one display-list record, as seen through m."""
+    if record.tag == 'use':
+        x, y, angle, size = record.geom
+        placed = _mat_mul(_mat_mul(m, (1, 0, 0, 1, x, y)), _rotation(angle))
+        placed = _mat_mul(placed, (size, 0, 0, size, 0, 0))
+        for shape in _flat_records(canvas.symbols.get(record.extra, [])):
+            _record_jobs(shape, placed, scale * abs(size), canvas, jobs)
+        return
+    geometry = _record_geometry(record, scale)
+    if geometry is None:
+        return
+    fill_polygons, stroke_polygons, box = geometry
+    fill, stroke, _, opacity = record.style
+    opacity = 1.0 if opacity is None else min(max(opacity, 0.0), 1.0)
+    if not opacity:
+        return
+    parts = []
+    for polygons, color in ((fill_polygons, 'black' if fill is None else fill),
+                            (stroke_polygons, stroke)):
+        if not polygons or color is None:
+            continue
+        paint = _paint(color, box, m, canvas.gradients)
+        if paint is None:
+            continue
+        edges, bounds = _edges(polygons, m)
+        if bounds is not None:
+            parts.append((edges, bounds, paint, 1.0))
+    if opacity < 1.0 and len(parts) > 1:
+        # Like SVG, opacity fades the stroked shape as a whole: the fill
+        # mustn't show through the inner half of the stroke
+        bounds = (min(part[1][0] for part in parts), min(part[1][1] for part in parts),
+                  max(part[1][2] for part in parts), max(part[1][3] for part in parts))
+        jobs.append((parts, bounds, ('layer',), opacity))
+    else:
+        jobs.extend((edges, bounds, paint, opacity) for edges, bounds, paint, _ in parts)
+
+
+def _jobs(canvas: Canvas, scale: float) -> list:
+    """Fill and layer jobs for everything visible on the canvas, bottom to top."""
+    jobs = []
+    zoom = (scale, 0.0, 0.0, scale, 0.0, 0.0)
+    for key, shapes, _, _ in canvas._segments():
+        m = zoom if key is None else _mat_mul(zoom, canvas._world_transform(key))
+        detail = math.sqrt(abs(m[0] * m[3] - m[1] * m[2]))  # Pixels per unit
+        for record in _flat_records(shapes):
+            _record_jobs(record, m, detail, canvas, jobs)
+    return jobs
+
+
+def _fill(job: tuple, pixels: array, width: int, band_top: int, band_bottom: int) -> None:
+    """
+    Composite one fill job into the rows of a band.
+
+    Pixels hold premultiplied RGBA scaled to 0-255 plus 0.5, which
+    blending keeps, so int() turns them into bytes (see _render_band).
+    """
+    edges, (x0, y0, x1, y1), paint, opacity = job
+    top = max(band_top, int(math.floor(y0)))
+    bottom = min(band_bottom, math.ceil(y1))
+    left = max(0, int(math.floor(x0)))
+    right = min(width, math.ceil(x1))
+    if top >= bottom or left >= right:
+        return
+    span = right - left
+    pending = sorted(edge for edge in edges if edge[0] < bottom and edge[1] > top)
+    active = []
+    next_edge = 0
+    weight = 1 / _SUBSAMPLES
+    offsets = [(k + 0.5) * weight for k in range(_SUBSAMPLES)]
+    solid = paint[0] == 'solid'
+    if solid:
+        red, green, blue, alpha = paint[1]
+        alpha *= opacity
+        red, green, blue = red * 255 + 0.5, green * 255 + 0.5, blue * 255 + 0.5
+        opaque = array('d', (red, green, blue, 255.5))
+    else:
+        _, kind, geometry, table, (ga, gb, gc, gd, ge, gf) = paint
+        table = [(r * 255 + 0.5, g * 255 + 0.5, b * 255 + 0.5, a * opacity) for r, g, b, a in table]
+        if kind == 'linear':
+            # t along the gradient is linear in pixel coordinates
+            gx1, gy1, gx2, gy2 = geometry
+            dx, dy = gx2 - gx1, gy2 - gy1
+            length = (dx * dx + dy * dy) or 1.0
+            tx = (ga * dx + gb * dy) / length
+            ty = (gc * dx + gd * dy) / length
+            t0 = ((ge - gx1) * dx + (gf - gy1) * dy) / length
+        else:
+            gcx, gcy, radius = geometry
+            radius = radius or 1e-9
+    # A linear gradient across the rows paints each row in one color
+    row_color = solid or (kind == 'linear' and abs(tx) < 1e-12)
+
+    for row in range(top, bottom):
+        while next_edge < len(pending) and pending[next_edge][0] < row + 1:
+            active.append(pending[next_edge])
+            next_edge += 1
+        active = [edge for edge in active if edge[1] > row]
+        if not active:
+            continue
+        partial = [0.0] * (span + 2)  # Coverage of pixels an edge passes through
+        steps = [0.0] * (span + 2)    # Changes in full coverage, summed along the row
+        marks = set()                 # Pixels where coverage may change
+        for offset in offsets:
+            y = row + offset
+            crossings = sorted((x + (y - edge_top) * slope - left, winding)
+                               for edge_top, edge_bottom, x, slope, winding in active
+                               if edge_top <= y < edge_bottom)
+            winding = 0
+            for x, turn in crossings:
+                if not winding:
+                    start = x
+                winding += turn
+                if winding:
+                    continue
+                xa = start if start > 0 else 0.0
+                xb = x if x < span else float(span)
+                if xb <= xa:
+                    continue
+                ia = int(xa)
+                ib = int(xb)
+                if ia == ib:
+                    partial[ia] += (xb - xa) * weight
+                    marks.add(ia)
+                else:
+                    partial[ia] += (ia + 1 - xa) * weight
+                    steps[ia + 1] += weight
+                    steps[ib] -= weight
+                    partial[ib] += (xb - ib) * weight
+                    marks.update((ia, ia + 1, ib))
+        if not marks:
+            continue
+
+        # Between marks the coverage is constant: walk runs, not pixels
+        marks = sorted(i for i in marks if i < span)
+        marks.append(span)
+        base = ((row - band_top) * width + left) * 4
+        py = row + 0.5
+        if not solid and kind == 'linear':
+            t_row = t0 + ty * py + tx * (left + 0.5)
+        if row_color and not solid:
+            red, green, blue, alpha = table[0 if t_row <= 0 else 255 if t_row >= 1 else int(t_row * 255 + 0.5)]
+            opaque = array('d', (red, green, blue, 255.5))
+        run = 0.0
+        for k in range(len(marks) - 1):
+            i = marks[k]
+            run += steps[i]
+            first = run + partial[i]
+            end = marks[k + 1]
+            if run < 1e-4:
+                end = i + 1  # Only pixel i is covered
+                if first < 1e-4:
+                    continue
+            if row_color and first >= 1.0 and run >= 1.0 and alpha >= 1.0:
+                pixels[base + 4 * i:base + 4 * end] = opaque * (end - i)
+                continue
+            for p in range(i, end):
+                cover = first if p == i else run
+                if cover > 1.0:
+                    cover = 1.0
+                if row_color:
+                    r, g, b, a = red, green, blue, alpha * cover
+                else:
+                    if kind == 'linear':
+                        t = t_row + tx * p
+                    else:
+                        px = left + p + 0.5
+                        t = math.hypot(ga * px + gc * py + ge - gcx, gb * px + gd * py + gf - gcy) / radius
+                    r, g, b, a = table[0 if t <= 0 else 255 if t >= 1 else int(t * 255 + 0.5)]
+                    a *= cover
+                j = base + 4 * p
+                keep = 1.0 - a
+                pixels[j] = r * a + pixels[j] * keep
+                pixels[j + 1] = g * a + pixels[j + 1] * keep
+                pixels[j + 2] = b * a + pixels[j + 2] * keep
+                pixels[j + 3] = 255.5 * a + pixels[j + 3] * keep
+
+
+def _composite(job: tuple, pixels: array, width: int, band_top: int, band_bottom: int) -> None:
+    """Draw a layer job's fill jobs at full strength, then blend the result in at its opacity."""
+    parts, (x0, y0, x1, y1), _, opacity = job
+    top = max(band_top, int(math.floor(y0)))
+    bottom = min(band_bottom, math.ceil(y1))
+    left = max(0, int(math.floor(x0)))
+    right = min(width, math.ceil(x1))
+    if top >= bottom or left >= right:
+        return
+    layer = array('d', (0.5,)) * (width * (bottom - top) * 4)  # Transparent
+    for part in parts:
+        _fill(part, layer, width, top, bottom)
+    for row in range(top, bottom):
+        source = ((row - top) * width + left) * 4
+        target = ((row - band_top) * width + left) * 4
+        for k in range(0, (right - left) * 4, 4):
+            i = source + k
+            a = (layer[i + 3] - 0.5) / 255 * opacity
+            if a <= 0.0:
+                continue
+            keep = 1.0 - a
+            j = target + k
+            for c in range(4):
+                pixels[j + c] = (layer[i + c] - 0.5) * opacity + (pixels[j + c] - 0.5) * keep + 0.5
+
+
+def _render_band(jobs: list, width: int, background: tuple, alpha: bool,
+                 top: int, bottom: int) -> bytes:
+    """PNG scanlines (filter byte and pixels) for image rows top to bottom."""
+    r, g, b, a = background
+    pixels = array('d', (r * a * 255 + 0.5, g * a * 255 + 0.5, b * a * 255 + 0.5, a * 255 + 0.5))
+    pixels *= width * (bottom - top)
+    for job in jobs:
+        bounds = job[1]
+        if bounds[1] < bottom and bounds[3] > top:
+            if job[2][0] == 'layer':
+                _composite(job, pixels, width, top, bottom)
+            else:
+                _fill(job, pixels, width, top, bottom)
+
+    if alpha:
+        # PNG stores colors without the alpha multiplied in
+        for j in range(0, len(pixels), 4):
+            a = pixels[j + 3] - 0.5
+            if 0.0 < a < 255.0:
+                for c in range(j, j + 3):
+                    pixels[c] = (pixels[c] - 0.5) * 255 / a + 0.5
+    rgba = bytes(map(int, pixels))
+    stride = width * 4
+    out = bytearray()
+    for row in range(bottom - top):
+        out.append(0)  # Filter type: none
+        if alpha:
+            out += rgba[row * stride:(row + 1) * stride]
+        else:
+            rgb = bytearray(width * 3)
+            rgb[0::3] = rgba[row * stride:(row + 1) * stride:4]
+            rgb[1::3] = rgba[row * stride + 1:(row + 1) * stride:4]
+            rgb[2::3] = rgba[row * stride + 2:(row + 1) * stride:4]
+            out += rgb
+    return bytes(out)
+
+
+def _png(width: int, height: int, scanlines: bytes, alpha: bool) -> bytes:
+    """PNG file for 8-bit RGB or RGBA scanlines."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6 if alpha else 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(scanlines, 9)) + chunk(b'IEND', b''))
+
+
+# Per-process state for parallel rendering, set up by _init_worker
+_worker: dict = {}
+
+
+def _init_worker(jobs: list, width: int, background: tuple, alpha: bool):
+    """Process pool initializer: receive the fill jobs once per worker."""
+    _worker.update(jobs=jobs, width=width, background=background, alpha=alpha)
+
+
+def _run_band(band: Tuple[int, int]) -> bytes:
+    """Render one band in a worker process."""
+    return _render_band(_worker['jobs'], _worker['width'], _worker['background'],
+                        _worker['alpha'], *band)
+
+
+def rasterize(canvas: Canvas, scale: float = 1.0, processes: Optional[int] = None) -> bytes:
+    """PNG image bytes for a canvas; see Canvas.to_png()."""
+    if scale <= 0:
+        raise ValueError(f"PNG scale must be positive, got {scale}")
+    width = max(1, math.ceil(canvas.width * scale))
+    height = max(1, math.ceil(canvas.height * scale))
+    if width * height > _MAX_PIXELS:
+        raise ValueError(f"PNG of {width}x{height} pixels exceeds maximum {_MAX_PIXELS} pixels")
+
+    background = _parse_color(canvas.background) or (0.0, 0.0, 0.0, 0.0)
+    alpha = background[3] < 1
+    jobs = _jobs(canvas, scale)
+    bands = [(top, min(top + _BAND_ROWS, height)) for top in range(0, height, _BAND_ROWS)]
+    if processes is not None and processes > 1 and len(bands) > 1:
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(jobs, width, background, alpha)) as pool:
+            parts = list(pool.map(_run_band, bands))
+    else:
+        parts = [_render_band(jobs, width, background, alpha, top, bottom) for top, bottom in bands]
+    return _png(width, height, b"".join(parts), alpha)
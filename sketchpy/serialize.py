@@ -0,0 +1,201 @@
+"""
+Binary canvas format for Canvas.dumps() and Canvas.loads().
+
+A drawing is stored as its display list: one fixed-size record per
+entry plus packed coordinate buffers, so loading it back skips parsing
+SVG and rendering anything. The browser build includes it, so a
+worker can send drawings to the page as bytes.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from itertools import islice
+from typing import Dict, List
+
+from .canvas import Canvas, _BATCH_TAGS, _Shape, _ShapeBatch, _Use
+
+# Canvas.dumps() format: record tag codes (append only, never reorder)
+_RECORD_TAGS = ('rect', 'circle', 'ellipse', 'line', 'polygon', 'polyline', 'path',
+                'text', 'use', 'circles', 'rects', 'lines')
+_RECORD_CODES = {tag: code for code, tag in enumerate(_RECORD_TAGS)}
+_FLAT_TAGS = ('polygon', 'polyline', 'path')  # geom is one flat array('d')
+_BINARY_MAGIC = b'SKPY'
+_BINARY_VERSION = 1
+# magic, version, reserved, metadata bytes, records, float64 values, float32 values
+_BINARY_HEADER = struct.Struct('<4sHHIIII')
+
+
+def _pack_records(records: List[_Shape], styles: Dict[tuple, int], extras: dict,
+                  words: array, narrow: array, wide: array):
+    """
+    Append display-list records to the Canvas.dumps() tables.
+
+    Each record is four uint32 words: tag code | float64 flag << 8 |
+    aux << 16, style index, extra index and number of values. aux is the
+    column count of a batch, or for tuple geometry a bit mask of the
+    values that are ints. Values go to the float32 buffer when float32
+    holds them exactly, else to the float64 one.
+    """
+    for record in records:
+        geom = record.geom
+        aux = 0
+        if isinstance(record, _ShapeBatch):
+            aux = len(geom)
+            values = array('d')
+            for column in geom:
+                values.extend(column)
+        else:
+            values = geom
+            if isinstance(geom, tuple):
+                for i, value in enumerate(geom):
+                    if isinstance(value, int):
+                        aux |= 1 << i
+        try:
+            packed = array('f', values)
+            is_wide = packed.tolist() != list(values)
+        except OverflowError:
+            is_wide = True
+        if is_wide:
+            wide.extend(values)
+        else:
+            narrow.extend(packed)
+        words.extend((_RECORD_CODES[record.tag] | is_wide << 8 | aux << 16,
+                      styles.setdefault(record.style, len(styles)),
+                      extras.setdefault(record.extra, len(extras)), len(values)))
+
+
+def _unpack_records(words, narrow, wide, styles: list, extras: list,
+                    symbols: Dict[str, List[_Shape]]):
+    """Yield the records packed by _pack_records(), in order."""
+    buffers = (narrow, wide)
+    offsets = [0, 0]
+    for word, style, extra, n in zip(words[0::4], words[1::4], words[2::4], words[3::4]):
+        is_wide = word >> 8 & 1
+        start = offsets[is_wide]
+        offsets[is_wide] = start + n
+        values = buffers[is_wide][start:start + n]
+        if len(values) != n:
+            raise ValueError("Canvas data is truncated")
+        tag = _RECORD_TAGS[word & 255]
+        aux = word >> 16
+        style = styles[style]
+        extra = extras[extra]
+        if tag in _BATCH_TAGS:
+            size = n // aux
+            yield _ShapeBatch(tag, tuple(array('d', values[i:i + size]) for i in range(0, n, size)),
+                              style)
+        elif tag in _FLAT_TAGS:
+            yield _Shape(tag, array('d', values), style, extra)
+        else:
+            if not aux:
+                geom = tuple(values)
+            elif aux == (1 << n) - 1:
+                geom = tuple(map(int, values))
+            else:
+                geom = tuple([int(v) if aux >> i & 1 else v for i, v in enumerate(values)])
+            if tag == 'use':
+                yield _Use(geom, style, extra, sum(shape.count for shape in symbols[extra]))
+            else:
+                yield _Shape(tag, geom, style, extra)
+
+
+def _typed_view(view: memoryview, start: int, typecode: str, n: int) -> tuple:
+    """
+    (values, end) for n little-endian values of an array typecode at
+    view[start:]. The bytes are read in place; only big-endian hosts copy
+    them to swap byte order.
+    """
+    end = start + n * array(typecode).itemsize
+    if end > len(view):
+        raise ValueError("Canvas data is truncated")
+    part = view[start:end]
+    if sys.byteorder == 'little':
+        return part.cast(typecode), end
+    values = array(typecode)
+    values.frombytes(part)
+    values.byteswap()
+    return values, end
+
+
+def dumps(canvas: Canvas) -> bytes:
+    """Serialize a canvas for Canvas.dumps(), which describes the layout."""
+    styles: Dict[tuple, int] = {}
+    extras: dict = {None: 0}
+    words, narrow, wide = array('I'), array('f'), array('d')
+    lists = [*canvas.symbols.values(), canvas.shapes, *canvas.groups.values()]
+    for records in lists:
+        _pack_records(records, styles, extras, words, narrow, wide)
+    meta = {
+        'canvas': [canvas.width, canvas.height, canvas.background, canvas.precision,
+                   canvas.css_classes, canvas.cull, canvas.tolerance, canvas.seed],
+        'styles': list(styles),
+        'extras': list(extras)[1:],
+        'gradients': canvas.gradients,
+        'symbols': list(canvas.symbols),
+        'groups': [[name, canvas.group_parents.get(name), canvas.group_transforms.get(name),
+                    canvas._group_offsets.get(name), canvas.group_visibility.get(name),
+                    canvas.group_animations.get(name)] for name in canvas.groups],
+        'layers': canvas.layer_z,
+        'sizes': [len(records) for records in lists],
+    }
+    blob = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+    blob += b' ' * (-len(blob) % 8)  # Keep the buffers aligned
+    if sys.byteorder == 'big':
+        for values in (words, narrow, wide):
+            values.byteswap()
+    header = _BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, 0, len(blob),
+                                 len(words) // 4, len(wide), len(narrow))
+    return b"".join([header, blob, words.tobytes(), wide.tobytes(), narrow.tobytes()])
+
+
+def loads(cls: type, data) -> Canvas:
+    """Canvas of class cls rebuilt from dumps() bytes, for Canvas.loads()."""
+    view = memoryview(data).cast('B')
+    if len(view) < _BINARY_HEADER.size:
+        raise ValueError("Not a sketchpy canvas")
+    magic, version, _, meta_size, count, wide_count, narrow_count = \
+        _BINARY_HEADER.unpack_from(view)
+    if magic != _BINARY_MAGIC:
+        raise ValueError("Not a sketchpy canvas")
+    if version != _BINARY_VERSION:
+        raise ValueError(f"Unsupported canvas format version {version}")
+    start = _BINARY_HEADER.size + meta_size
+    if start > len(view):
+        raise ValueError("Canvas data is truncated")
+    meta = json.loads(bytes(view[_BINARY_HEADER.size:start]))
+    words, start = _typed_view(view, start, 'I', 4 * count)
+    wide, start = _typed_view(view, start, 'd', wide_count)
+    narrow, start = _typed_view(view, start, 'f', narrow_count)
+
+    try:
+        can = cls(*meta['canvas'])
+        can.gradients = dict(meta['gradients'])
+        can.layer_z = dict(meta['layers'])
+        styles = [can._style(*style) for style in meta['styles']]
+        extras = [None] + [tuple(e) if isinstance(e, list) else e for e in meta['extras']]
+        records = _unpack_records(words, narrow, wide, styles, extras, can.symbols)
+        sizes = iter(meta['sizes'])
+        for name in meta['symbols']:
+            can.symbols[name] = list(islice(records, next(sizes)))
+        can.shapes = list(islice(records, next(sizes)))
+        for name, parent, transform, offset, visible, animations in meta['groups']:
+            can.groups[name] = list(islice(records, next(sizes)))
+            can.group_parents[name] = parent
+            if transform is not None:
+                can.group_transforms[name] = tuple(transform)
+            if offset is not None:
+                can._group_offsets[name] = tuple(offset)
+            if visible is not None:
+                can.group_visibility[name] = visible
+            if animations is not None:
+                can.group_animations[name] = animations
+    except (IndexError, KeyError, StopIteration, TypeError, ZeroDivisionError):
+        raise ValueError("Canvas data is corrupt") from None
+
+    count = sum(shape.count for shapes in [can.shapes, *can.groups.values()]
+                for shape in shapes)
+    can._check_shape_limit(count)
+    can._shape_count = count
+    return can
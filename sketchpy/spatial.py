@@ -0,0 +1,220 @@
+"""
+Spatial queries for Canvas.shapes_at(), shapes_in_rect(),
+overlapping_pairs() and bounds().
+
+The bounding boxes of each display-list segment (Canvas._spatial_index)
+are put in a uniform grid, so a query looks only at the shapes near it.
+Not part of the browser build.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from .canvas import Canvas, _Shape, _SpatialSegment, _mat_invert, _stroke_pad
+from .raster import _record_geometry
+
+
+def _winding(polygons: List[List[float]], x: float, y: float) -> int:
+    """Winding number of closed flat [x0, y0, x1, y1, ...] polygons around a point."""
+    winding = 0
+    for points in polygons:
+        px, py = points[-2], points[-1]
+        for i in range(0, len(points), 2):
+            qx, qy = points[i], points[i + 1]
+            if (py <= y) != (qy <= y):
+                side = (qx - px) * (y - py) - (x - px) * (qy - py)
+                if qy > py and side > 0:
+                    winding += 1
+                elif qy <= py and side < 0:
+                    winding -= 1
+            px, py = qx, qy
+    return winding
+
+
+def _record_contains(record: _Shape, x: float, y: float) -> bool:
+    """
+    Exact hit test (box test already passed): inside the fill by SVG's
+    nonzero rule, unless the fill is none, or on the stroke. Text and
+    stamps are hit anywhere in their box.
+    """
+    if record.tag in ('text', 'use'):
+        return True
+    geometry = _record_geometry(record, 1.0)
+    if geometry is None:
+        return False  # Draws nothing
+    fill_polygons, stroke_polygons, _ = geometry
+    fill = record.style[0]
+    if fill is not None and fill != 'none' and fill_polygons and _winding(fill_polygons, x, y):
+        return True
+    return bool(stroke_polygons) and _winding(stroke_polygons, x, y) != 0
+
+
+# Spatial index grid cell size in pixels; boxes covering more cells than
+# _INDEX_MAX_CELLS go in a list that every query checks
+_INDEX_CELL = 64
+_INDEX_MAX_CELLS = 64
+
+
+class _BoxGrid:
+    """Uniform grid over numbered bounding boxes, for finding those near a box."""
+
+    __slots__ = ('grid', 'large', 'extent', 'size')
+
+    def __init__(self):
+        self.grid: Dict[tuple, List[int]] = {}
+        self.large: List[int] = []
+        self.extent: Optional[list] = None  # occupied cell range [cx0, cy0, cx1, cy1]
+        self.size = 0  # boxes added so far, see extend()
+
+    def extend(self, boxes: List[Optional[tuple]]):
+        """Add the boxes appended to a list since the last call, numbered by position."""
+        for i in range(self.size, len(boxes)):
+            if boxes[i] is not None:
+                self.add(i, boxes[i])
+        self.size = len(boxes)
+
+    def add(self, index: int, box: tuple):
+        cell = _INDEX_CELL
+        cx0, cy0 = int(box[0] // cell), int(box[1] // cell)
+        cx1, cy1 = int(box[2] // cell), int(box[3] // cell)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > _INDEX_MAX_CELLS:
+            self.large.append(index)
+            return
+        grid = self.grid
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                grid.setdefault((cx, cy), []).append(index)
+        extent = self.extent
+        if extent is None:
+            self.extent = [cx0, cy0, cx1, cy1]
+        else:
+            extent[0] = min(extent[0], cx0)
+            extent[1] = min(extent[1], cy0)
+            extent[2] = max(extent[2], cx1)
+            extent[3] = max(extent[3], cy1)
+
+    def candidates(self, box: tuple) -> List[int]:
+        """Indices of boxes whose cells touch a box, in order."""
+        found = set(self.large)
+        extent = self.extent
+        if extent is not None:
+            cell = _INDEX_CELL
+            cx0 = max(int(box[0] // cell), extent[0])
+            cy0 = max(int(box[1] // cell), extent[1])
+            cx1 = min(int(box[2] // cell), extent[2])
+            cy1 = min(int(box[3] // cell), extent[3])
+            grid = self.grid
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    found.update(grid.get((cx, cy), ()))
+        return sorted(found)
+
+
+def _candidates(index: _SpatialSegment, box: tuple, m: Optional[tuple] = None) -> List[int]:
+    """
+    Indices of a segment's entries whose cells touch a box, in order: in
+    the segment's own coordinates, or in world coordinates after the
+    segment's transform m. The grids are kept on the segment and brought
+    up to date here.
+    """
+    if m is None:
+        grid = index.local
+        if grid is None:
+            grid = index.local = _BoxGrid()
+        grid.extend(index.boxes)
+    else:
+        boxes = index.world_boxes(m)
+        grid = index.world[2]
+        if grid is None:
+            grid = _BoxGrid()
+            grid.extend(boxes)
+            index.world = (m, boxes, grid)
+    return grid.candidates(box)
+
+
+def shapes_at(canvas: Canvas, x: float, y: float) -> List[Tuple[Optional[str], int]]:
+    """Shapes drawn at a point; see Canvas.shapes_at()."""
+    hits = []
+    for key, matrix, index in canvas._spatial_index(canvas._segments()):
+        lx, ly = x, y
+        if matrix is not None:
+            inverse = _mat_invert(matrix)
+            if inverse is None:
+                continue
+            a, b, c, d, e, f = inverse
+            lx, ly = a * x + c * y + e, b * x + d * y + f
+        boxes = index.boxes
+        for i in _candidates(index, (lx, ly, lx, ly)):
+            box = boxes[i]
+            if (box[0] <= lx <= box[2] and box[1] <= ly <= box[3]
+                    and _record_contains(index.records[i], lx, ly)):
+                hits.append((key, i))
+    return hits
+
+
+def shapes_in_rect(canvas: Canvas, x: float, y: float, width: float,
+                   height: float) -> List[Tuple[Optional[str], int]]:
+    """Shapes whose world bounding box overlaps a rectangle; see Canvas.shapes_in_rect()."""
+    query = (min(x, x + width), min(y, y + height), max(x, x + width), max(y, y + height))
+    found = []
+    for key, matrix, index in canvas._spatial_index(canvas._segments()):
+        boxes = index.world_boxes(matrix)
+        for i in _candidates(index, query, matrix):
+            box = boxes[i]
+            if box[0] <= query[2] and query[0] <= box[2] and box[1] <= query[3] and query[1] <= box[3]:
+                found.append((key, i))
+    return found
+
+
+def overlapping_pairs(canvas: Canvas) -> List[tuple]:
+    """Pairs of shapes whose bounding boxes overlap; see Canvas.overlapping_pairs()."""
+    items = []
+    for key, matrix, index in canvas._spatial_index(canvas._segments()):
+        # Circles stay circles under move and rotate (and uniform scale)
+        similar = matrix is None or (matrix[0] == matrix[3] and matrix[1] == -matrix[2])
+        for i, box in enumerate(index.world_boxes(matrix)):
+            if box is None:
+                continue
+            record = index.records[i]
+            circle = None
+            if similar and record.tag == 'circle':
+                cx, cy, r = record.geom
+                r += _stroke_pad(record.style)
+                if matrix is not None:
+                    a, b, c, d, e, f = matrix
+                    cx, cy, r = a * cx + c * cy + e, b * cx + d * cy + f, r * math.hypot(a, b)
+                circle = (cx, cy, r)
+            items.append((box[0], box[1], box[2], box[3], len(items), (key, i), circle))
+
+    items.sort()
+    pairs = []
+    active = []
+    for item in items:
+        x0 = item[0]
+        active = [other for other in active if other[2] > x0]
+        for other in active:
+            if other[1] < item[3] and item[1] < other[3]:
+                c1, c2 = other[6], item[6]
+                if c1 and c2 and math.hypot(c1[0] - c2[0], c1[1] - c2[1]) >= c1[2] + c2[2]:
+                    continue
+                first, second = (other, item) if other[4] < item[4] else (item, other)
+                pairs.append((first[4], second[4], first[5], second[5]))
+        active.append(item)
+    pairs.sort()
+    return [(a, b) for _, _, a, b in pairs]
+
+
+def bounds(canvas: Canvas, group: Optional[str] = None) -> Optional[Tuple[float, float, float, float]]:
+    """Box around everything drawn, or one group; see Canvas.bounds()."""
+    if group is None:
+        segments = canvas._segments()
+    elif group in canvas.groups:
+        segments = canvas._segments(group)
+    else:
+        return None
+    boxes = [box for _, matrix, index in canvas._spatial_index(segments)
+             for box in index.world_boxes(matrix) if box is not None]
+    if not boxes:
+        return None
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
@@ -38,6 +38,7 @@ export function createAppState() {
         pyodideWorker: null,
         pyodideReady: false,
         editorReady: false,  // Track editor initialization
+        svgShown: false,  // Canvas shows the last run's SVG, so re-runs can send a patch
 
         // Error handler (initialized after Pyodide is ready)
         errorHandler: null,
@@ -118,7 +119,7 @@ export function createAppState() {
 
         // Handle messages from worker
         async handleWorkerMessage(event) {
-            const { type, output, svg, error, errorData, code } = event.data;
+            const { type, output, svg, patch, error, errorData, code } = event.data;
 
             if (type === 'ready') {
                 console.log('Pyodide worker ready!');
@@ -202,9 +203,19 @@ export function createAppState() {
                     if (formattedError.line && window.editorView) {
                         this.highlightErrorLine(formattedError.line);
                     }
-                } else if (svg) {
-                    // Success - got SVG
-                    canvasDiv.innerHTML = svg;
+                } else if (svg || patch) {
+                    // Success - got SVG, or a patch against the SVG already shown
+                    if (patch) {
+                        const applied = await this.applyPatch(canvasDiv, JSON.parse(patch));
+                        if (!applied) {
+                            // Page did not match the patch, ask for the whole SVG
+                            this.pyodideWorker.postMessage({ type: 'render' });
+                            return;
+                        }
+                    } else {
+                        canvasDiv.innerHTML = svg;
+                    }
+                    this.svgShown = true;
                     this.activeTab = 'canvas';
                     statusSpan.textContent = 'Success! ✓';
                     statusSpan.style.color = '#4CAF50';
@@ -217,6 +228,7 @@ export function createAppState() {
                 } else {
                     // No SVG returned
                     canvasDiv.innerHTML = '<div style="color: #999;">Make sure your code ends with "can" to display the canvas.</div>';
+                    this.svgShown = false;
                     statusSpan.textContent = '';
                 }
 
@@ -272,7 +284,8 @@ export function createAppState() {
             // Send code to worker (which will do full security validation)
             this.pyodideWorker.postMessage({
                 type: 'run',
-                code: code
+                code: code,
+                incremental: this.svgShown
             });
         },
 
@@ -318,9 +331,22 @@ export function createAppState() {
             }
         },
 
+        // Apply a Canvas.diff() patch to the SVG on the page
+        async applyPatch(canvasDiv, ops) {
+            try {
+                const basePath = window.BASE_PATH || '';
+                const { applySvgPatch } = await import(`${basePath}/static/js/core/svgPatch.dev.js`);
+                return applySvgPatch(canvasDiv, ops);
+            } catch (e) {
+                console.error('Failed to apply SVG patch:', e);
+                return false;
+            }
+        },
+
         // Clear Canvas (moved from window.clearCanvas)
         clearCanvas() {
             document.getElementById('canvas').innerHTML = '<div style="color: #999;">Canvas cleared. Click "Run Code" to draw.</div>';
+            this.svgShown = false;
             document.getElementById('error').style.display = 'none';
             this.output = '';
             this.error = null;
@@ -0,0 +1,128 @@
+/**
+ * Apply Canvas.diff() patches to a rendered sketchpy SVG
+ *
+ * When the page already shows the drawing from the previous run, the
+ * worker sends a list of ops instead of a whole new SVG. Applying them
+ * touches only the elements that changed, so re-running a large drawing
+ * after a small edit does not rebuild the DOM or flash.
+ *
+ * Elements are addressed by segment and index: segment null means the
+ * ungrouped shapes (root children after the background rect, excluding
+ * <style>, <defs> and groups), otherwise the <g> with that id (excluding
+ * its animation elements and nested groups).
+ *
+ * @module svgPatch
+ */
+
+const SVG_NS = 'http://www.w3.org/2000/svg';
+const NON_SHAPE_TAGS = new Set(['style', 'defs', 'g']);
+// Canvas.animate_group() elements, written before a group's shapes
+const ANIMATION_TAGS = new Set(['animate', 'animateTransform', 'animateMotion']);
+
+/**
+ * Parse SVG markup into elements in the SVG namespace
+ *
+ * @param {string} markup - One or more SVG elements
+ * @returns {Element[]}
+ */
+function parseElements(markup) {
+    const holder = document.createElementNS(SVG_NS, 'svg');
+    holder.innerHTML = markup;
+    return [...holder.children];
+}
+
+function findGroup(svg, name) {
+    return [...svg.querySelectorAll('g')].find(el => el.id === name) || null;
+}
+
+// Shapes come before nested groups, so new ones go in front of the first
+function appendShape(parent, node) {
+    parent.insertBefore(node, [...parent.children].find(el => el.tagName === 'g') || null);
+}
+
+function setAttributes(el, attrs) {
+    for (const [name, value] of Object.entries(attrs)) {
+        if (value === null || value === undefined) {
+            el.removeAttribute(name);
+        } else {
+            el.setAttribute(name, value);
+        }
+    }
+}
+
+/**
+ * Apply a patch produced by Canvas.diff()
+ *
+ * @param {HTMLElement} container - Element holding the rendered <svg>
+ * @param {Array} ops - Patch ops, see Canvas.diff() for the format
+ * @returns {boolean} false if the DOM did not match the patch; the caller
+ *   should then render the full SVG instead
+ */
+export function applySvgPatch(container, ops) {
+    const reset = ops.find(op => op[0] === 'reset');
+    if (reset) {
+        container.innerHTML = reset[1];
+        return true;
+    }
+
+    const svg = container.querySelector('svg');
+    if (!svg) return false;
+
+    // Element lists per segment, kept in sync as ops are applied
+    const segments = new Map();
+    const elementsOf = (segment) => {
+        const key = segment ?? null;
+        if (!segments.has(key)) {
+            if (key === null) {
+                const shapes = [...svg.children].filter(el => !NON_SHAPE_TAGS.has(el.tagName));
+                segments.set(key, shapes.slice(1));  // Skip the background rect
+            } else {
+                const group = findGroup(svg, key);
+                segments.set(key, group ? [...group.children].filter(
+                    el => el.tagName !== 'g' && !ANIMATION_TAGS.has(el.tagName)) : null);
+            }
+        }
+        return segments.get(key);
+    };
+
+    for (const [kind, ...args] of ops) {
+        if (kind === 'remove_group') {
+            const group = findGroup(svg, args[0]);
+            if (!group) return false;
+            group.remove();
+            segments.delete(args[0]);
+        } else if (kind === 'add_group') {
+            const parent = args[1] == null ? svg : findGroup(svg, args[1]);
+            if (!parent) return false;
+            parent.append(...parseElements(args[0]));
+        } else if (kind === 'group') {
+            const group = findGroup(svg, args[0]);
+            if (!group) return false;
+            setAttributes(group, args[1]);
+        } else {
+            const elements = elementsOf(args[0]);
+            if (!elements) return false;
+            if (kind === 'add') {
+                const [node] = parseElements(args[1]);
+                appendShape(args[0] === null ? svg : findGroup(svg, args[0]), node);
+                elements.push(node);
+                continue;
+            }
+            const el = elements[args[1]];
+            if (!el) return false;
+            if (kind === 'set') {
+                setAttributes(el, args[2]);
+            } else if (kind === 'replace') {
+                const [node] = parseElements(args[2]);
+                el.replaceWith(node);
+                elements[args[1]] = node;
+            } else if (kind === 'remove') {
+                el.remove();
+                elements.splice(args[1], 1);
+            } else {
+                return false;
+            }
+        }
+    }
+    return true;
+}
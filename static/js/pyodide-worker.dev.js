@@ -50,6 +50,8 @@ print("✓ Initial security applied")
 
     // Load shapes code (Canvas API) from shapesCode variable
     // This is set by the 'init' message from the main thread
+    // NumPy is deliberately not loaded: the Canvas geometry kernel falls back
+    // to its plain-Python path, which produces the same coordinates
     if (shapesCode) {
         await pyodide.runPythonAsync(shapesCode);
         console.log('✓ Canvas API loaded');
@@ -69,6 +71,24 @@ builtins.OceanShapes = OceanShapes
 print("✓ Canvas, Color, and palettes available globally")
         `);
 
+        // Incremental re-runs: diff against the canvas the page is showing
+        await pyodide.runPythonAsync(`
+import json
+
+_sketchpy_previous = None  # Canvas rendered on the page by the last run
+
+def _sketchpy_output(canvas, incremental):
+    """('patch', JSON ops against the canvas on the page) or ('svg', full SVG)."""
+    global _sketchpy_previous
+    previous, _sketchpy_previous = _sketchpy_previous, canvas
+    # A re-run that drew into the same canvas object can't be diffed against itself
+    if incremental and previous is not None and previous is not canvas:
+        ops = canvas.diff(previous)
+        if not (ops and ops[0][0] == 'reset'):
+            return ('patch', json.dumps(ops))
+    return ('svg', canvas.to_svg())
+        `);
+
         // Import ast module BEFORE we block imports (needed for validation)
         // Pre-import everything ast.walk() needs to avoid blocking stdlib internals
         // Also import math for Math Doodling lessons
@@ -225,7 +245,7 @@ async function executeCode(code) {
  * Handle messages from main thread
  */
 self.onmessage = async (event) => {
-    const { id, type, code, shapes } = event.data;
+    const { id, type, code, shapes, incremental } = event.data;
 
     try {
         // Handle init message (from app.js)
@@ -267,9 +287,23 @@ self.onmessage = async (event) => {
                 return;
             }
 
-            // Get SVG output
-            const svg = await pyodide.runPythonAsync('can.to_svg()');
+            // Get SVG output, or a patch when the page shows the previous run
+            const result = await pyodide.runPythonAsync(
+                `_sketchpy_output(can, ${incremental ? 'True' : 'False'})`
+            );
+            const [kind, payload] = result.toJs();
+            result.destroy();
 
+            self.postMessage({
+                type: 'result',
+                [kind]: payload
+            });
+            return;
+        }
+
+        // Handle render message (page could not apply a patch, send the full SVG)
+        if (type === 'render') {
+            const svg = await pyodide.runPythonAsync('can.to_svg()');
             self.postMessage({
                 type: 'result',
                 svg: svg
@@ -0,0 +1,90 @@
+import { describe, it, expect, beforeEach } from 'vitest';
+import { applySvgPatch } from '../../static/js/core/svgPatch.dev.js';
+
+const SVG = '<svg width="100" height="100" xmlns="http://www.w3.org/2000/svg">'
+  + '<rect width="100%" height="100%" fill="#FFFFFF"/>'
+  + '<circle cx="1" cy="1" r="1" fill="#FF0000"/>'
+  + '<circle cx="2" cy="2" r="2" fill="#FF0000"/>'
+  + '<g id="tree"><rect x="0" y="0" width="5" height="5" fill="#00FF00"/></g>'
+  + '</svg>';
+
+describe('applySvgPatch', () => {
+  let container;
+
+  beforeEach(() => {
+    container = document.createElement('div');
+    container.innerHTML = SVG;
+  });
+
+  it('should change attributes of ungrouped shapes by index', () => {
+    expect(applySvgPatch(container, [['set', null, 1, { fill: '#0000FF', r: null }]])).toBe(true);
+
+    const circles = container.querySelectorAll('svg > circle');
+    expect(circles[1].getAttribute('fill')).toBe('#0000FF');
+    expect(circles[1].hasAttribute('r')).toBe(false);
+    expect(circles[0].getAttribute('fill')).toBe('#FF0000');
+  });
+
+  it('should add ungrouped shapes before the groups', () => {
+    applySvgPatch(container, [['add', null, '<line x1="0" y1="0" x2="5" y2="5"/>']]);
+
+    const svg = container.querySelector('svg');
+    const line = svg.querySelector('line');
+    expect(line.namespaceURI).toBe('http://www.w3.org/2000/svg');
+    expect(line.nextElementSibling.id).toBe('tree');
+  });
+
+  it('should replace, remove and add elements inside groups', () => {
+    applySvgPatch(container, [
+      ['replace', 'tree', 0, '<circle cx="3" cy="3" r="3"/>'],
+      ['remove', null, 1],
+      ['add', 'tree', '<ellipse cx="1" cy="1" rx="1" ry="1"/>'],
+      ['group', 'tree', { transform: 'translate(5, 0)' }],
+    ]);
+
+    const tree = container.querySelector('#tree');
+    expect([...tree.children].map(el => el.tagName)).toEqual(['circle', 'ellipse']);
+    expect(tree.getAttribute('transform')).toBe('translate(5, 0)');
+    expect(container.querySelectorAll('svg > circle').length).toBe(1);
+  });
+
+  it('should skip animation elements when indexing group shapes', () => {
+    container.querySelector('#tree').insertAdjacentHTML(
+      'afterbegin', '<animateTransform attributeName="transform" type="rotate"/>');
+    applySvgPatch(container, [['set', 'tree', 0, { fill: '#0000FF' }]]);
+
+    expect(container.querySelector('#tree rect').getAttribute('fill')).toBe('#0000FF');
+  });
+
+  it('should add and remove whole groups', () => {
+    applySvgPatch(container, [
+      ['remove_group', 'tree'],
+      ['add_group', '<g id="sun"><circle cx="9" cy="9" r="9"/></g>'],
+    ]);
+
+    expect(container.querySelector('#tree')).toBeNull();
+    expect(container.querySelector('#sun circle')).not.toBeNull();
+  });
+
+  it('should patch nested groups and keep shapes before them', () => {
+    applySvgPatch(container, [
+      ['add_group', '<g id="bus"><rect width="4" height="2"/></g>', 'tree'],
+      ['add', 'tree', '<ellipse cx="1" cy="1" rx="1" ry="1"/>'],
+      ['set', 'bus', 0, { fill: '#FF0000' }],
+    ]);
+
+    const tree = container.querySelector('#tree');
+    expect([...tree.children].map(el => el.tagName)).toEqual(['rect', 'ellipse', 'g']);
+    expect(container.querySelector('#bus rect').getAttribute('fill')).toBe('#FF0000');
+  });
+
+  it('should replace everything on reset', () => {
+    applySvgPatch(container, [['reset', '<svg width="10" height="10"></svg>']]);
+    expect(container.querySelector('svg').getAttribute('width')).toBe('10');
+  });
+
+  it('should report a patch that does not match the page', () => {
+    expect(applySvgPatch(container, [['set', null, 7, { fill: '#000000' }]])).toBe(false);
+    expect(applySvgPatch(container, [['remove_group', 'missing']])).toBe(false);
+  });
+});
@@ -0,0 +1,135 @@
+"""Tests for frame-by-frame animation export."""
+
+import re
+
+import pytest
+from sketchpy import Animation, Canvas, Color
+
+
+def sky(can):
+    """Static layer: background shapes and an untouched group."""
+    can.rect(0, 0, 200, 100, fill=Color.BLUE)
+    can.circle(180, 20, 10, fill=Color.YELLOW)
+    with can.group("hills"):
+        can.ellipse(100, 100, 120, 30, fill=Color.GREEN)
+
+
+def ball(can, t):
+    """Moving shape drawn in every frame."""
+    can.circle(20 + 160 * t, 50, 8, fill=Color.RED)
+
+
+def bubbles(can, t):
+    """Random bubbles from the frame canvas's own random numbers."""
+    for _ in range(3):
+        can.circle(can.random.uniform(0, 200), 100 - 100 * t, can.random.uniform(2, 6))
+
+
+def ball_and_hills(can, t):
+    """Moves the static group, so it can no longer be shared."""
+    ball(can, t)
+    can.move_group("hills", dx=10 * t)
+
+
+class TestAnimationFrames:
+    """Test frame canvases."""
+
+    def test_time_runs_from_zero_towards_one(self):
+        """draw() gets t = index / frames."""
+        seen = []
+        anim = Animation(lambda can, t: seen.append(t), frames=4, width=100, height=100)
+        list(anim)
+        assert seen == [0, 0.25, 0.5, 0.75]
+
+    def test_frame_matches_drawing_directly(self):
+        """A frame renders exactly like a canvas drawn from scratch."""
+        anim = Animation(ball, frames=4, width=200, height=100, static=sky)
+        expected = Canvas(200, 100)
+        sky(expected)
+        ball(expected, 0.5)
+        assert anim.frame(2).to_svg() == expected.to_svg()
+
+    def test_frames_do_not_leak_into_each_other(self):
+        """Shapes drawn in one frame are not in the next one."""
+        frames = list(Animation(ball, frames=3, width=200, height=100, static=sky))
+        assert [len(can.shapes) for can in frames] == [3, 3, 3]
+        assert [len(can.groups["hills"]) for can in frames] == [1, 1, 1]
+
+    def test_invalid_arguments(self):
+        """Frame count, frame index and size are validated."""
+        with pytest.raises(ValueError, match="at least 1 frame"):
+            Animation(ball, frames=0)
+        with pytest.raises(ValueError, match="exceeds maximum"):
+            Animation(ball, width=5000)
+        with pytest.raises(ValueError, match="out of range"):
+            Animation(ball, frames=2).frame(2)
+
+
+class TestAnimationExport:
+    """Test frame files and sprite sheets."""
+
+    def test_save_frames(self, tmp_path):
+        """Every frame is written to its own file."""
+        anim = Animation(ball, frames=3, width=200, height=100, static=sky)
+        paths = anim.save_frames(str(tmp_path / "out" / "ball_{:02d}.svg"))
+
+        assert [p.rsplit("/", 1)[1] for p in paths] == ["ball_00.svg", "ball_01.svg", "ball_02.svg"]
+        for index, path in enumerate(paths):
+            with open(path, encoding="utf-8") as f:
+                assert f.read() == anim.frame(index).to_svg()
+
+    def test_save_frames_in_process_pool(self, tmp_path):
+        """Frames rendered in worker processes match the sequential output."""
+        anim = Animation(ball, frames=6, width=200, height=100, static=sky)
+        sequential = anim.save_frames(str(tmp_path / "a_{}.svg"))
+        parallel = anim.save_frames(str(tmp_path / "b_{}.svg"), processes=2)
+
+        for a, b in zip(sequential, parallel):
+            with open(a, encoding="utf-8") as fa, open(b, encoding="utf-8") as fb:
+                assert fa.read() == fb.read()
+
+    def test_sprite_sheet_shares_static_layer(self):
+        """Static shapes are defined once and referenced from every cell."""
+        anim = Animation(ball, frames=6, width=200, height=100, static=sky)
+        sheet = anim.sprite_sheet(columns=3)
+
+        assert sheet.startswith('<svg width="600" height="200"')
+        assert sheet.count("<ellipse") == 1
+        assert sheet.count('<use href="#frame_static"/>') == 6
+        assert sheet.count('<use href="#frame_static_hills"/>') == 6
+        assert sheet.count("<circle") == 1 + 6  # Sun once, ball per frame
+        assert '<svg x="400" y="100" width="200" height="100">' in sheet
+
+    def test_sprite_sheet_copies_changed_groups(self):
+        """A group changed by a frame is written into that frame's cell."""
+        sheet = Animation(ball_and_hills, frames=2, width=200, height=100,
+                          static=sky).sprite_sheet()
+        # Frame 0 moves the group by (0, 0), which leaves it as it was
+        assert sheet.count('<use href="#frame_static_hills"/>') == 1
+        assert len(re.findall(r'<g transform="translate\(', sheet)) == 1
+        assert 'id="hills"' not in sheet
+
+    def test_random_frames_match_in_process_pool(self, tmp_path):
+        """Each frame has its own random numbers, whatever order frames are drawn in."""
+        anim = Animation(bubbles, frames=4, width=200, height=100, seed=7)
+        sequential = anim.save_frames(str(tmp_path / "a_{}.svg"))
+        parallel = anim.save_frames(str(tmp_path / "b_{}.svg"), processes=2)
+
+        svgs = []
+        for index, (a, b) in enumerate(zip(sequential, parallel)):
+            with open(a, encoding="utf-8") as fa, open(b, encoding="utf-8") as fb:
+                svgs.append(fa.read())
+                assert fb.read() == svgs[-1] == anim.frame(index).to_svg()
+        assert len({re.sub(r'cy="[^"]*"', '', svg) for svg in svgs}) == 4
+        assert Animation(bubbles, frames=4, width=200, height=100, seed=8).frame(1).to_svg() != svgs[1]
+
+    def test_sprite_sheet_in_process_pool(self):
+        """Parallel sprite sheet rendering gives the same document."""
+        anim = Animation(ball, frames=5, width=200, height=100, static=sky)
+        assert anim.sprite_sheet(processes=2) == anim.sprite_sheet()
+
+    def test_sprite_sheet_default_grid(self):
+        """Without columns the grid is roughly square."""
+        sheet = Animation(ball, frames=5, width=10, height=10).sprite_sheet()
+        assert sheet.startswith('<svg width="30" height="20"')
+        assert "frame_static" not in sheet
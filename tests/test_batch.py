@@ -0,0 +1,117 @@
+"""Tests for batch drawing methods (circles, rects, lines, polygons)."""
+
+import pytest
+from sketchpy import Canvas, Color
+
+
+class TestCircles:
+    """Test Canvas.circles()."""
+
+    def test_circles_match_individual_calls(self):
+        """circles() renders the same markup as circle() in a loop."""
+        xs, ys, radii = [10, 20, 30.5], [40, 50, 60], [5, 6, 7]
+
+        batch = Canvas(200, 200).circles(xs, ys, radii, fill=Color.RED, opacity=0.5)
+        single = Canvas(200, 200)
+        for x, y, r in zip(xs, ys, radii):
+            single.circle(x, y, r, fill=Color.RED, opacity=0.5)
+
+        assert batch.to_svg() == single.to_svg()
+
+    def test_scalar_arguments_broadcast(self):
+        """A single radius or style applies to every circle."""
+        can = Canvas(200, 200).circles([10, 20, 30], [10, 10, 10], radii=4)
+        svg = can.to_svg()
+
+        assert svg.count('<circle') == 3
+        assert svg.count('r="4"') == 3
+
+    def test_per_shape_styles(self):
+        """Style sequences give each circle its own style."""
+        can = Canvas(200, 200)
+        can.circles([10, 20], [10, 20], 5, fill=[Color.RED, Color.BLUE])
+        svg = can.to_svg()
+
+        assert f'cx="10" cy="10" r="5" fill="{Color.RED}"' in svg
+        assert f'cx="20" cy="20" r="5" fill="{Color.BLUE}"' in svg
+
+    def test_batch_stored_as_one_record(self):
+        """A uniformly styled batch is a single display-list record."""
+        can = Canvas(200, 200).circles(list(range(100)), [5] * 100, 2)
+
+        assert len(can.shapes) == 1
+        assert can._shape_count == 100
+
+    def test_length_mismatch_raises(self):
+        """Sequences of different lengths raise ValueError."""
+        with pytest.raises(ValueError, match="ys has 2 values, expected 3"):
+            Canvas(200, 200).circles([1, 2, 3], [1, 2])
+        with pytest.raises(ValueError, match="style has 2 values"):
+            Canvas(200, 200).circles([1, 2, 3], [1, 2, 3], fill=[Color.RED, Color.BLUE])
+
+    def test_empty_batch(self):
+        """Empty sequences draw nothing."""
+        can = Canvas(200, 200).circles([], [])
+        assert '<circle' not in can.to_svg()
+
+    def test_chaining(self):
+        """circles() returns self for chaining."""
+        can = Canvas(200, 200)
+        assert can.circles([1], [1]) is can
+
+    def test_numpy_arrays(self):
+        """NumPy arrays are accepted for coordinates."""
+        np = pytest.importorskip("numpy")
+        can = Canvas(200, 200).circles(np.array([10.0, 20.0]), np.array([5, 5]), np.array([1.5, 2]))
+        svg = can.to_svg()
+
+        assert 'cx="10" cy="5" r="1.5"' in svg
+        assert 'cx="20" cy="5" r="2"' in svg
+
+
+class TestOtherBatches:
+    """Test rects(), lines() and polygons()."""
+
+    def test_rects(self):
+        """rects() draws one rect per entry."""
+        can = Canvas(200, 200).rects([0, 50], [0, 50], widths=[10, 20], heights=30, fill=Color.GREEN)
+        svg = can.to_svg()
+
+        assert '<rect x="0" y="0" width="10" height="30"' in svg
+        assert '<rect x="50" y="50" width="20" height="30"' in svg
+
+    def test_lines(self):
+        """lines() draws stroke-only lines."""
+        can = Canvas(200, 200).lines([0, 0], [0, 10], [100, 100], [0, 10], stroke=Color.BLUE)
+        svg = can.to_svg()
+
+        assert '<line x1="0" y1="10" x2="100" y2="10"' in svg
+        assert svg.count(f'stroke="{Color.BLUE}"') == 2
+        assert svg.count('fill=') == 1  # Background only
+
+    def test_polygons(self):
+        """polygons() draws each point list as a polygon."""
+        triangles = [[(0, 0), (10, 0), (5, 10)], [(20, 0), (30, 0), (25, 10)]]
+        can = Canvas(200, 200).polygons(triangles, fill=[Color.RED, Color.BLUE])
+        svg = can.to_svg()
+
+        assert f'points="0,0 10,0 5,10" fill="{Color.RED}"' in svg
+        assert f'points="20,0 30,0 25,10" fill="{Color.BLUE}"' in svg
+
+    def test_batches_in_group(self):
+        """Batch methods respect the active group."""
+        can = Canvas(200, 200)
+        with can.group("dots"):
+            can.circles([1, 2], [1, 2], 1)
+
+        assert len(can.shapes) == 0
+        assert '<g id="dots"><circle' in can.to_svg()
+
+    def test_batch_limit_checked_once_for_whole_batch(self):
+        """A batch that would exceed MAX_SHAPES is rejected entirely."""
+        can = Canvas(200, 200)
+        can.circles([1] * (Canvas.MAX_SHAPES - 5), [1] * (Canvas.MAX_SHAPES - 5), 1)
+
+        with pytest.raises(ValueError, match="Shape limit exceeded"):
+            can.lines([0] * 10, [0] * 10, [1] * 10, [1] * 10)
+        assert can._shape_count == Canvas.MAX_SHAPES - 5
@@ -99,6 +99,38 @@ def test_generated_code_excludes_browser_incompatible():
     assert 'def save(' not in python_code, "save() method should be excluded"
     assert 'class Point' not in python_code, "Point class should be excluded"
     assert '@dataclass' not in python_code, "dataclass decorator should be excluded"
+    # Local-only tooling lives in modules the bundle leaves out
+    assert 'class _BoxGrid' not in python_code, "spatial query grid should be excluded"
+    assert 'def _bake_record(' not in python_code, "transform baking should be excluded"
+    assert 'def _covers(' not in python_code, "optimize() should be excluded"
+
+
+def test_generated_code_serializes_and_reports_local_only_methods():
+    """dumps()/loads() work in the bundle; local-only methods say they are unavailable."""
+    # Run build first
+    subprocess.run(['uv', 'run', 'build'], cwd=PROJECT_ROOT, check=True)
+
+    content = OUTPUT_FILE.read_text()
+    match = re.search(
+        r'window\.SHAPES_CODE = `(.*?)`;',
+        content,
+        re.DOTALL
+    )
+    assert match is not None, "Could not find Python code in generated HTML (window.SHAPES_CODE)"
+    namespace = {'__name__': '__main__'}
+    exec(match.group(1), namespace)
+
+    can = namespace['Canvas'](100, 100)
+    can.circle(50, 50, 20, fill="#FF0000")
+    restored = namespace["Canvas"].loads(can.dumps())
+    assert restored.to_svg() == can.to_svg()
+
+    with pytest.raises(RuntimeError, match=r"optimize\(\) is not available in the browser"):
+        can.optimize()
+    with pytest.raises(RuntimeError, match=r"to_png\(\) is not available in the browser"):
+        can.to_png()
+    with pytest.raises(RuntimeError, match="bake_transforms is not available in the browser"):
+        can.to_svg(bake_transforms=True)
 
 
 def test_generated_code_has_required_imports():
@@ -177,14 +209,27 @@ def test_generated_code_size():
     assert match is not None, "Could not find Python code in generated HTML (window.SHAPES_CODE)"
     python_code = match.group(1)
 
-    # The generated Python code should be reasonable size (less than 70KB)
+    # The generated Python code should be reasonable size (less than 190KB)
     # Increased from 10KB due to gradients, named groups, and MathDoodlingPalette
     # Increased from 21KB to 35KB due to ocean shapes (wave, blob, tentacle, OceanShapes)
     # Increased from 35KB to 55KB due to pear primitive and improved octopus
     # Increased from 55KB to 60KB due to enhanced CarShapes (rounded_car, sports_car, bus)
     # Increased from 60KB to 70KB to accommodate continued curvy-car / helper growth
+    # Increased from 70KB to 80KB due to the display list, streaming output and render cache
+    # Increased from 80KB to 90KB due to batch drawing (circles, rects, lines, polygons)
+    # Increased from 90KB to 100KB due to Bézier paths (curve, bezier, offset outlines)
+    # Increased from 100KB to 110KB due to symbols, CSS class styles and Canvas.diff
+    # Increased from 110KB to 125KB due to group animations and spatial queries
+    # Increased from 125KB to 140KB due to viewport culling and Canvas.optimize
+    # Increased from 140KB to 155KB due to transform baking and nested groups
+    # Increased from 155KB to 170KB due to binary serialization (Canvas.dumps/loads)
+    # Increased from 170KB to 185KB due to the geometry kernel and adaptive flattening
+    # Increased from 185KB to 200KB due to brush strokes and the path builder
+    # Decreased from 200KB to 180KB: dumps/loads, spatial queries, optimize and
+    # transform baking moved to local-only modules (serialize, spatial, optimize, bake)
+    # Increased from 180KB to 190KB: serialize is bundled again for dumps/loads in the worker
     code_size = len(python_code)
-    assert code_size < 70000, f"Generated code is too large: {code_size} bytes (expected < 70KB)"
+    assert code_size < 190000, f"Generated code is too large: {code_size} bytes (expected < 190KB)"
     assert code_size > 1000, f"Generated code seems too small: {code_size} bytes (expected > 1KB)"
 
 
@@ -1,5 +1,9 @@
 """Tests for core Canvas functionality."""
 
+import io
+import math
+import re
+
 import pytest
 from sketchpy import Canvas, Color
 
@@ -421,6 +425,49 @@ class TestSVGGeneration:
         assert content.startswith('<svg')
         assert Color.GREEN in content
 
+    def test_iter_svg_matches_to_svg(self):
+        """iter_svg chunks join to exactly the to_svg output."""
+        canvas = Canvas(400, 400)
+        canvas.linear_gradient("sky", colors=[Color.BLUE, Color.WHITE])
+        canvas.circle(200, 200, 50, fill="gradient:sky")
+        with canvas.group("flower"):
+            canvas.rect(10, 10, 20, 20)
+
+        assert "".join(canvas.iter_svg()) == canvas.to_svg()
+
+    def test_iter_svg_streams_in_chunks(self):
+        """Large canvases are yielded in many bounded chunks."""
+        canvas = Canvas(400, 400)
+        for i in range(3000):
+            canvas.circle(i % 400, i % 300, 2)
+
+        chunks = list(canvas.iter_svg())
+        assert len(chunks) > 5
+        assert max(len(c) for c in chunks) < len(canvas.to_svg()) / 3
+
+    def test_write_svg_text_file(self):
+        """write_svg streams into a text file object."""
+        canvas = Canvas(400, 400)
+        canvas.circle(200, 200, 50, fill=Color.GREEN)
+
+        buffer = io.StringIO()
+        canvas.write_svg(buffer)
+        assert buffer.getvalue() == canvas.to_svg()
+
+    def test_write_svg_binary_file(self, tmp_path):
+        """write_svg encodes UTF-8 for binary file objects."""
+        canvas = Canvas(400, 400)
+        canvas.text(10, 20, "Ahoj světe")
+
+        buffer = io.BytesIO()
+        canvas.write_svg(buffer)
+        assert buffer.getvalue() == canvas.to_svg().encode('utf-8')
+
+        filepath = tmp_path / "binary.svg"
+        with open(filepath, 'wb') as f:
+            canvas.write_svg(f)
+        assert filepath.read_text(encoding='utf-8') == canvas.to_svg()
+
 
 class TestMethodChaining:
     """Test that all shape methods support chaining."""
@@ -478,6 +525,45 @@ class TestClear:
         assert Color.RED not in svg
 
 
+class TestCopy:
+    """Test Canvas.copy()."""
+
+    def test_copy_is_independent(self):
+        """Drawing on a copy leaves the original as it was, and the other way round."""
+        def scene(can):
+            can.circle(200, 200, 50)
+            with can.group("tree"):
+                can.rect(10, 10, 20, 40)
+            can.linear_gradient("sky")
+
+        canvas = Canvas(400, 400, seed=3)
+        scene(canvas)
+        copied = canvas.copy()
+        assert copied.to_svg() == canvas.to_svg()
+        copied.ellipse(50, 50, 10, 5)
+        with copied.group("tree"):
+            copied.circle(20, 5, 10)
+        copied.move_group("tree", dx=5)
+        copied.radial_gradient("sun")
+        canvas.line(0, 0, 10, 10)
+
+        expected = Canvas(400, 400)
+        scene(expected)
+        expected.line(0, 0, 10, 10)
+        assert canvas.to_svg() == expected.to_svg()
+        assert len(copied.shapes) == 2 and len(copied.groups["tree"]) == 2
+        assert "sun" not in canvas.gradients
+        assert canvas._shape_count == 3 and copied._shape_count == 4
+
+    def test_copy_continues_random_numbers(self):
+        """The copy's random numbers carry on from the original's, separately."""
+        canvas = Canvas(seed=3)
+        canvas.random.random()
+        copied = canvas.copy()
+        assert copied.random is not canvas.random
+        assert [copied.random.random() for _ in range(3)] == [canvas.random.random() for _ in range(3)]
+
+
 class TestShapeLimit:
     """Test shape count security limits."""
 
@@ -499,6 +585,42 @@ class TestShapeLimit:
                 for i in range(Canvas.MAX_SHAPES + 1):
                     canvas.circle(i % 800, i % 600, 5)
 
+    def test_shape_limit_spread_across_groups(self):
+        """Shape limit counts shapes spread over many groups."""
+        canvas = Canvas(800, 600)
+
+        with pytest.raises(ValueError, match="Shape limit exceeded"):
+            for i in range(Canvas.MAX_SHAPES + 1):
+                with canvas.group(f"g{i % 500}"):
+                    canvas.circle(i % 800, i % 600, 5)
+
+    def test_shape_count_tracks_groups(self):
+        """Running shape count follows drawing, remove_group and clear."""
+        canvas = Canvas(800, 600)
+        canvas.circle(10, 10, 5)
+        with canvas.group("a"):
+            canvas.rect(0, 0, 10, 10).line(0, 0, 5, 5)
+        with canvas.group("b"):
+            canvas.blob(50, 50, 10)
+        assert canvas._shape_count == 4
+
+        canvas.remove_group("a")
+        assert canvas._shape_count == 2
+
+        canvas.clear()
+        assert canvas._shape_count == 0
+
+    def test_shapes_allowed_after_remove_group(self):
+        """Removing a group frees its shapes from the limit."""
+        canvas = Canvas(800, 600)
+        with canvas.group("full"):
+            for i in range(Canvas.MAX_SHAPES):
+                canvas.circle(i % 800, 10, 1)
+
+        canvas.remove_group("full")
+        canvas.circle(10, 10, 5)  # Should not raise
+        assert canvas._shape_count == 1
+
 
 class TestSecurityLimits:
     """Test various security constraints."""
@@ -518,3 +640,1424 @@ class TestSecurityLimits:
     def test_max_shapes_constant(self):
         """MAX_SHAPES constant is defined."""
         assert Canvas.MAX_SHAPES == 10_000
+
+
+class TestDisplayList:
+    """Test the structured display list behind the SVG output."""
+
+    def test_shapes_stored_as_records(self):
+        """Drawing stores data records, not pre-rendered SVG strings."""
+        canvas = Canvas(400, 400)
+        canvas.circle(200, 150, 50, fill=Color.RED)
+
+        shape = canvas.shapes[0]
+        assert not isinstance(shape, str)
+        assert shape.tag == 'circle'
+        assert shape.geom == (200, 150, 50)
+
+    def test_styles_are_interned(self):
+        """Shapes drawn with the same style share one style tuple."""
+        canvas = Canvas(400, 400)
+        canvas.circle(10, 10, 5, fill=Color.RED)
+        canvas.circle(20, 20, 5, fill=Color.RED)
+        canvas.circle(30, 30, 5, fill=Color.BLUE)
+
+        a, b, c = canvas.shapes
+        assert a.style is b.style
+        assert a.style is not c.style
+
+    def test_polygon_points_packed(self):
+        """Polygon coordinates are stored as a flat numeric array."""
+        canvas = Canvas(400, 400)
+        canvas.polygon([(10, 20), (30.5, 40), (50, 60)])
+
+        assert list(canvas.shapes[0].geom) == [10, 20, 30.5, 40, 50, 60]
+        assert 'points="10,20 30.5,40 50,60"' in canvas.to_svg()
+
+    def test_render_is_lazy_and_repeatable(self):
+        """to_svg renders the same markup on every call."""
+        canvas = Canvas(400, 400)
+        canvas.rect(1, 2, 3, 4, fill="gradient:sky").text(5, 6, "Hi", size=12)
+
+        first = canvas.to_svg()
+        assert first == canvas.to_svg()
+        assert '<rect x="1" y="2" width="3" height="4" fill="url(#grad_sky)"' in first
+        assert '<text x="5" y="6" font-size="12" fill="#000000" font-family="Arial">Hi</text>' in first
+
+
+class TestRenderCache:
+    """Test the dirty-tracked SVG render cache."""
+
+    @staticmethod
+    def _spy_render(canvas):
+        """Record how many shapes each _iter_shapes call renders."""
+        rendered = []
+        original = canvas._iter_shapes
+
+        def spy(shapes, *args):
+            rendered.append(len(shapes))
+            return original(shapes, *args)
+
+        canvas._iter_shapes = spy
+        return rendered
+
+    def _grouped_canvas(self):
+        canvas = Canvas(400, 400)
+        canvas.circle(10, 10, 5)
+        with canvas.group("a"):
+            canvas.rect(0, 0, 10, 10).rect(20, 20, 10, 10)
+        with canvas.group("b"):
+            canvas.circle(50, 50, 5)
+        return canvas
+
+    def test_unchanged_canvas_returns_cached_svg(self):
+        """Repeated to_svg and _repr_html_ calls reuse the cached string."""
+        canvas = self._grouped_canvas()
+        svg = canvas.to_svg()
+        rendered = self._spy_render(canvas)
+
+        assert canvas.to_svg() is svg
+        assert canvas._repr_html_() is svg
+        assert rendered == []
+
+    def test_new_shape_renders_only_new_shape(self):
+        """Drawing one more shape renders just that shape."""
+        canvas = self._grouped_canvas()
+        canvas.to_svg()
+        rendered = self._spy_render(canvas)
+
+        with canvas.group("b"):
+            canvas.circle(60, 60, 5, fill=Color.RED)
+        svg = canvas.to_svg()
+
+        assert rendered == [1]
+        assert svg.count('<circle') == 3
+        assert f'fill="{Color.RED}"' in svg
+
+    def test_group_changes_reuse_group_markup(self):
+        """hide/show/move/rotate only rewrite the <g> wrapper."""
+        canvas = self._grouped_canvas()
+        canvas.to_svg()
+        rendered = self._spy_render(canvas)
+
+        canvas.hide_group("a")
+        assert 'id="a"' not in canvas.to_svg()
+        canvas.show_group("a")
+        canvas.move_group("a", dx=5, dy=5)
+        canvas.rotate_group("b", 45)
+        svg = canvas.to_svg()
+
+        assert rendered == []
+        assert 'transform="translate(5, 5)"' in svg
+        assert 'transform="matrix(0.7071067812 0.7071067812 -0.7071067812 0.7071067812 0 0)"' in svg
+
+    def test_cache_matches_uncached_render(self):
+        """Cached output always equals a fresh streaming render."""
+        canvas = self._grouped_canvas()
+        canvas.to_svg()
+        canvas.linear_gradient("sky", colors=[Color.BLUE, Color.WHITE])
+        canvas.rect(1, 1, 5, 5, fill="gradient:sky")
+        canvas.remove_group("a")
+        with canvas.group("a"):
+            canvas.circle(1, 2, 3)
+
+        svg = canvas.to_svg()
+        assert 'id="grad_sky"' in svg
+        assert svg == "".join(canvas.iter_svg())
+
+    def test_attribute_changes_invalidate(self):
+        """Changing background or size re-renders the document."""
+        canvas = self._grouped_canvas()
+        canvas.to_svg()
+        canvas.background = Color.YELLOW
+        assert Color.YELLOW in canvas.to_svg()
+
+    def test_clear_invalidates(self):
+        """clear() drops cached markup."""
+        canvas = self._grouped_canvas()
+        canvas.to_svg()
+        canvas.clear()
+        assert '<circle' not in canvas.to_svg()
+
+
+class TestPrecision:
+    """Test numeric precision and compact number formatting."""
+
+    def test_default_keeps_full_precision(self):
+        """Without precision numbers are written exactly."""
+        canvas = Canvas(400, 400)
+        canvas.circle(123.45678901234567, 88.00000000000001, 10.0)
+        svg = canvas.to_svg()
+
+        assert 'cx="123.45678901234567"' in svg
+        assert 'cy="88.00000000000001"' in svg
+        assert 'r="10"' in svg
+
+    def test_canvas_precision_rounds_and_trims(self):
+        """Canvas(precision=...) rounds and drops trailing zeros."""
+        canvas = Canvas(400, 400, precision=2)
+        canvas.circle(123.45678, 88.00000000000001, 10.5)
+        canvas.polygon([(1.005, 2.499), (3.1, -0.001), (7, 8)])
+        svg = canvas.to_svg()
+
+        assert 'cx="123.46" cy="88" r="10.5"' in svg
+        assert 'points="1,2.5 3.1,0 7,8"' in svg
+
+    def test_to_svg_precision_override(self):
+        """to_svg(precision=...) renders once with different precision."""
+        canvas = Canvas(400, 400)
+        canvas.line(0.123456, 1.5, 2.75, 3)
+
+        assert 'x1="0.1" y1="1.5" x2="2.8" y2="3"' in canvas.to_svg(precision=1)
+        assert 'x1="0.123456"' in canvas.to_svg()
+        assert "".join(canvas.iter_svg(precision=0)).count('x1="0"') == 1
+
+    def test_changing_canvas_precision_rerenders(self):
+        """Setting canvas.precision after drawing takes effect."""
+        canvas = Canvas(400, 400)
+        canvas.circle(1.23456, 2, 3)
+        assert 'cx="1.23456"' in canvas.to_svg()
+
+        canvas.precision = 1
+        assert 'cx="1.2"' in canvas.to_svg()
+
+    def test_invalid_precision_raises(self):
+        """Negative or non-integer precision raises ValueError."""
+        with pytest.raises(ValueError, match="precision"):
+            Canvas(400, 400, precision=-1)
+        with pytest.raises(ValueError, match="precision"):
+            Canvas(400, 400).to_svg(precision=1.5)
+
+    def test_precision_shrinks_curve_heavy_scene(self):
+        """Rounding to 2 decimals shrinks an ocean scene by at least 40%."""
+        import random
+        from sketchpy import OceanShapes
+
+        random.seed(5)
+        canvas = Canvas(800, 600)
+        ocean = OceanShapes(canvas)
+        ocean.octopus(200, 150, size=80)
+        ocean.jellyfish(500, 300, size=50)
+        ocean.seaweed(100, 590, height=120)
+
+        full = len(canvas.to_svg())
+        compact = len(canvas.to_svg(precision=2))
+        assert compact < full * 0.6
+
+
+class TestSymbols:
+    """Test define_symbol() and stamp()."""
+
+    @staticmethod
+    def _petal(canvas):
+        canvas.ellipse(0, -20, 8, 20, fill=Color.PINK)
+
+    def test_stamp_uses_symbol_defined_once(self):
+        """Symbol geometry is written once in <defs>, stamps become <use>."""
+        canvas = Canvas(400, 400)
+        canvas.define_symbol("petal", self._petal)
+        for angle in range(0, 360, 45):
+            canvas.stamp("petal", 200, 200, angle=angle)
+        svg = canvas.to_svg()
+
+        assert svg.count('<ellipse') == 1
+        assert '<g id="sym_petal">' in svg
+        assert svg.count('<use href="#sym_petal"') == 8
+        assert 'transform="translate(200 200) rotate(45)"' in svg
+
+    def test_stamp_transform_parts(self):
+        """Identity parts of the transform are left out."""
+        canvas = Canvas(400, 400)
+        canvas.define_symbol("petal", self._petal)
+        canvas.stamp("petal")
+        canvas.stamp("petal", 10, 20, scale=0.5)
+        svg = canvas.to_svg()
+
+        assert '<use href="#sym_petal"/>' in svg
+        assert 'transform="translate(10 20) scale(0.5)"' in svg
+
+    def test_define_symbol_does_not_draw(self):
+        """Shapes drawn by the symbol function stay out of the scene."""
+        canvas = Canvas(400, 400)
+        canvas.circle(10, 10, 5)
+        canvas.define_symbol("petal", self._petal)
+
+        assert len(canvas.shapes) == 1
+        assert canvas._shape_count == 1
+
+    def test_define_symbol_from_group(self):
+        """An existing group can become a symbol and stays on the canvas."""
+        canvas = Canvas(400, 400)
+        with canvas.group("car"):
+            canvas.rect(0, 0, 60, 20)
+            canvas.circle(10, 20, 5)
+            canvas.circle(50, 20, 5)
+        canvas.define_symbol("car", "car")
+        canvas.stamp("car", 100, 100)
+        svg = canvas.to_svg()
+
+        assert svg.count('<circle') == 4  # group + symbol definition
+        assert '<g id="car">' in svg
+        assert '<use href="#sym_car"' in svg
+
+    def test_unknown_symbol_or_group_raises(self):
+        """Stamping an undefined symbol or using a missing group raises ValueError."""
+        canvas = Canvas(400, 400)
+        with pytest.raises(ValueError, match="Unknown symbol"):
+            canvas.stamp("nope")
+        with pytest.raises(ValueError, match="Unknown group"):
+            canvas.define_symbol("nope", "missing_group")
+
+    def test_stamps_count_symbol_shapes_toward_limit(self):
+        """Each stamp counts as many shapes as its symbol holds."""
+        canvas = Canvas(400, 400)
+        canvas.define_symbol("pair", lambda c: c.circle(0, 0, 5).circle(10, 0, 5))
+        with canvas.group("stamps"):
+            canvas.stamp("pair")
+            canvas.stamp("pair")
+        assert canvas._shape_count == 4
+
+        canvas._shape_count = Canvas.MAX_SHAPES - 1
+        with pytest.raises(ValueError, match="Shape limit exceeded"):
+            canvas.stamp("pair")
+
+        canvas._shape_count = 4
+        canvas.remove_group("stamps")
+        assert canvas._shape_count == 0
+
+    def test_redefining_symbol_updates_cached_svg(self):
+        """Redefining a symbol re-renders the <defs> block."""
+        canvas = Canvas(400, 400)
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 5))
+        canvas.stamp("dot", 50, 50)
+        assert 'r="5"' in canvas.to_svg()
+
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 9))
+        svg = canvas.to_svg()
+        assert 'r="9"' in svg
+        assert 'r="5"' not in svg
+
+    def test_redefining_symbol_recounts_stamps(self):
+        """Stamps count the shapes of the symbol's latest definition."""
+        canvas = Canvas(400, 400)
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 5))
+        canvas.define_symbol("pair", lambda c: c.stamp("dot").stamp("dot", 10, 0))
+        canvas.stamp("dot")
+        with canvas.group("stamps"):
+            canvas.stamp("pair")
+        composed = Canvas.compose(canvas)
+        assert canvas._shape_count == 3
+
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 5).circle(0, 0, 2))
+        assert canvas._shape_count == 6
+        canvas.remove_group("stamps")
+        assert canvas._shape_count == 2
+        assert composed._shape_count == 3  # Records shared by compose() are left alone
+        composed.remove_group("layer1")
+        assert composed._shape_count == 0
+        assert composed.symbols["pair"][0].count == 1
+
+        with pytest.raises(ValueError, match="stamp of itself"):
+            canvas.define_symbol("dot", lambda c: c.stamp("pair"))
+        assert canvas._shape_count == 2
+        assert canvas.to_svg().count('<circle') == 2
+
+        small = Canvas(400, 400)
+        small.MAX_SHAPES = 5
+        small.define_symbol("dot", lambda c: c.circle(0, 0, 5))
+        small.stamp("dot").stamp("dot", 20).stamp("dot", 40)
+        with pytest.raises(ValueError, match="Shape limit"):
+            small.define_symbol("dot", lambda c: c.circle(0, 0, 5).circle(0, 0, 2))
+        assert small._shape_count == 3
+        assert small.to_svg().count('<circle') == 1
+
+    def test_symbol_cannot_open_groups(self):
+        """A group opened while defining a symbol raises instead of leaking onto the canvas."""
+        canvas = Canvas(400, 400)
+        with canvas.group("scene"):
+            canvas.circle(10, 10, 5)
+
+        def wheel(c):
+            with c.group("scene"):
+                c.circle(0, 0, 5)
+
+        for source in (wheel, lambda c: c.group("hub").__enter__()):
+            with pytest.raises(ValueError, match="can't contain groups"):
+                canvas.define_symbol("wheel", source)
+        assert list(canvas.groups) == ["scene"]
+        assert len(canvas.groups["scene"]) == 1
+        assert canvas.current_group is None
+        assert "wheel" not in canvas.symbols
+        canvas.circle(20, 20, 5)
+        assert len(canvas.shapes) == 1
+
+        with canvas.group("car"):
+            canvas.rect(0, 0, 60, 20)
+            with canvas.group("wheels"):
+                canvas.circle(10, 20, 5)
+        with pytest.raises(ValueError, match="has groups inside it"):
+            canvas.define_symbol("car", "car")
+        canvas.define_symbol("wheels", "wheels")
+        assert "car" not in canvas.symbols
+
+    def test_stamps_smaller_than_repeated_geometry(self):
+        """Stamping a multi-shape figure is far smaller than redrawing it."""
+        def flower(c, x=0, y=0):
+            for angle in range(0, 360, 30):
+                rad = math.radians(angle)
+                c.ellipse(x + 20 * math.cos(rad), y + 20 * math.sin(rad), 12, 6,
+                          fill=Color.PINK)
+            c.circle(x, y, 10, fill=Color.YELLOW)
+
+        drawn = Canvas(800, 600)
+        stamped = Canvas(800, 600)
+        stamped.define_symbol("flower", flower)
+        for i in range(20):
+            flower(drawn, 40 * i, 300)
+            stamped.stamp("flower", 40 * i, 300)
+
+        assert len(stamped.to_svg()) < len(drawn.to_svg()) * 0.2
+
+
+class TestStyleClasses:
+    """Test the opt-in css_classes render mode."""
+
+    @staticmethod
+    def _inline_from_classes(svg):
+        """Substitute class="sN" with its CSS rule as attributes and drop the <style> block."""
+        import re
+        rules = dict(re.findall(r'\.(s\d+)\{([^}]*)\}', svg))
+        svg = re.sub(r'<style>.*?</style>', '', svg)
+        svg = re.sub(r'<svg class="k[0-9a-f]{8}" ', '<svg ', svg)
+
+        def attrs(match):
+            return " ".join(f'{k}="{v}"' for k, v in
+                            (decl.split(":", 1) for decl in rules[match.group(1)].split(";")))
+        return re.sub(r'class="(s\d+)"', attrs, svg)
+
+    @staticmethod
+    def _scene(canvas):
+        canvas.linear_gradient("sky", colors=[Color.BLUE, Color.WHITE])
+        canvas.rect(0, 0, 400, 200, fill="gradient:sky")
+        canvas.circles(range(0, 400, 40), [300] * 10, 15, fill=Color.RED, opacity=0.5)
+        canvas.line(0, 0, 100, 100, stroke=Color.GREEN)
+        canvas.text(10, 20, "Hi")
+        with canvas.group("tree"):
+            canvas.circle(50, 50, 20, fill=Color.GREEN)
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 3, fill=Color.RED))
+        canvas.stamp("dot", 5, 5)
+        return canvas
+
+    def test_default_output_has_no_classes(self):
+        """Without the option, styles stay inline attributes."""
+        svg = self._scene(Canvas(400, 400)).to_svg()
+        assert '<style>' not in svg
+        assert 'class=' not in svg
+
+    def test_classes_render_the_same_styles(self):
+        """Expanding the classes gives back exactly the inline output."""
+        canvas = self._scene(Canvas(400, 400))
+        inline = canvas.to_svg()
+        classes = canvas.to_svg(css_classes=True)
+
+        assert '<style>' in classes
+        assert 'fill="#FF0000"' not in classes
+        assert self._inline_from_classes(classes) == inline
+
+    def test_one_class_per_distinct_style(self):
+        """Shapes sharing a style share one class and one rule."""
+        canvas = Canvas(400, 400, css_classes=True)
+        for i in range(50):
+            canvas.circle(i * 5, 50, 4, fill=Color.RED)
+        canvas.circle(0, 0, 4, fill=Color.BLUE)
+        svg = canvas.to_svg()
+
+        assert svg.count('class="s0"') == 50
+        assert svg.count('class="s1"') == 1
+        assert svg.count('{fill:') == 2
+
+    def test_classes_shrink_repeated_styles(self):
+        """Byte size: many shapes in a few colors get much smaller."""
+        canvas = Canvas(800, 600)
+        colors = [Color.RED, Color.BLUE, Color.GREEN]
+        for i in range(300):
+            canvas.rect(i % 40 * 20, i // 40 * 20, 18, 18, fill=colors[i % 3])
+
+        inline = len(canvas.to_svg().encode())
+        classes = len(canvas.to_svg(css_classes=True).encode())
+        assert classes < inline * 0.7
+
+    def test_rules_are_scoped_per_style_set(self):
+        """Canvases with different styles use different root scopes."""
+        a = Canvas(100, 100, css_classes=True).circle(1, 1, 1, fill=Color.RED).to_svg()
+        b = Canvas(100, 100, css_classes=True).circle(1, 1, 1, fill=Color.BLUE).to_svg()
+        scope_a = a.split('class="', 1)[1].split('"', 1)[0]
+        scope_b = b.split('class="', 1)[1].split('"', 1)[0]
+
+        assert scope_a != scope_b
+        assert f'.{scope_a} .s0{{fill:#FF0000' in a
+
+    def test_classes_stay_valid_after_new_styles(self):
+        """Cached markup keeps its classes when later shapes add styles."""
+        canvas = Canvas(400, 400, css_classes=True)
+        canvas.circle(10, 10, 5, fill=Color.RED)
+        canvas.to_svg()
+        canvas.circle(20, 20, 5, fill=Color.BLUE)
+        svg = canvas.to_svg()
+
+        assert self._inline_from_classes(svg) == canvas.to_svg(css_classes=False)
+
+    def test_toggling_option_on_canvas(self):
+        """Changing canvas.css_classes after rendering takes effect."""
+        canvas = Canvas(400, 400)
+        canvas.circle(10, 10, 5)
+        assert 'class=' not in canvas.to_svg()
+
+        canvas.css_classes = True
+        assert 'class="s0"' in canvas.to_svg()
+        assert 'class=' not in "".join(canvas.iter_svg(css_classes=False))
+
+
+class TestDiff:
+    """Test Canvas.diff() patches between two renders."""
+
+    @staticmethod
+    def _draw(color=Color.RED, label="hi", extra=0):
+        canvas = Canvas(400, 400)
+        canvas.circles([10, 20, 30], [10, 10, 10], 5, fill=Color.BLUE)
+        canvas.rect(0, 0, 50, 50, fill=color)
+        canvas.text(5, 5, label)
+        for i in range(extra):
+            canvas.line(0, 0, i, i)
+        with canvas.group("tree"):
+            canvas.circle(100, 100, 20, fill=Color.GREEN)
+        return canvas
+
+    def test_identical_canvases_give_empty_patch(self):
+        """Nothing changed, nothing to do."""
+        assert self._draw().diff(self._draw()) == []
+
+    def test_changed_attribute(self):
+        """A changed colour is a single attribute update addressed by position."""
+        patch = self._draw(color=Color.YELLOW).diff(self._draw())
+        # Batch circles count as three elements, so the rect is index 3
+        assert patch == [['set', None, 3, {'fill': Color.YELLOW}]]
+
+    def test_changed_text_replaces_element(self):
+        """Different text content replaces the element."""
+        patch = self._draw(label="bye").diff(self._draw())
+        assert patch[0][:3] == ['replace', None, 4]
+        assert '>bye</text>' in patch[0][3]
+
+    def test_added_and_removed_elements(self):
+        """Extra shapes are appended; missing ones are removed from the end."""
+        patch = self._draw(extra=2).diff(self._draw())
+        assert [op[0] for op in patch] == ['add', 'add']
+        assert patch[1][1] is None and patch[1][2].startswith('<line')
+
+        patch = self._draw().diff(self._draw(extra=2))
+        assert patch == [['remove', None, 6], ['remove', None, 5]]
+
+    def test_group_changes(self):
+        """Group transforms, new groups and hidden groups."""
+        old = self._draw()
+        new = self._draw()
+        new.move_group("tree", 10, 0)
+        with new.group("sun"):
+            new.circle(300, 50, 30, fill=Color.YELLOW)
+
+        patch = new.diff(old)
+        assert patch[0] == ['group', 'tree', {'transform': 'translate(10, 0)'}]
+        assert patch[1][0] == 'add_group'
+        assert patch[1][1].startswith('<g id="sun">')
+
+        new.hide_group("tree")
+        assert new.diff(old)[0] == ['remove_group', 'tree']
+
+    def test_changed_frame_resets(self):
+        """A different size, background or gradient set sends the whole SVG."""
+        old = self._draw()
+        new = self._draw()
+        new.background = Color.BLACK
+
+        patch = new.diff(old)
+        assert patch == [['reset', new.to_svg()]]
+
+    def test_patch_is_much_smaller_than_svg(self):
+        """One changed shape out of thousands gives a tiny patch."""
+        import json
+
+        def scene(highlight):
+            canvas = Canvas(800, 600)
+            for i in range(3000):
+                canvas.circle(i % 800, i * 7 % 600, 3,
+                              fill=highlight if i == 1234 else Color.RED)
+            return canvas
+
+        new = scene(Color.BLUE)
+        patch = new.diff(scene(Color.RED))
+        assert patch == [['set', None, 1234, {'fill': Color.BLUE}]]
+        assert len(json.dumps(patch)) < len(new.to_svg()) / 1000
+
+    def test_changed_animation_resets(self):
+        """Adding or changing a group animation sends the whole SVG."""
+        old = self._draw()
+        new = self._draw()
+        new.animate_group("tree", angle=360, cx=100, cy=100)
+        assert new.diff(old)[0][0] == 'reset'
+
+
+class TestGroupAnimation:
+    """Test SMIL animations from animate_group()."""
+
+    @staticmethod
+    def _canvas():
+        canvas = Canvas(400, 400)
+        with canvas.group("star"):
+            canvas.circle(200, 200, 20, fill=Color.YELLOW)
+        return canvas
+
+    def test_spin(self):
+        """A rotation is an additive animateTransform inside the group."""
+        svg = self._canvas().animate_group("star", duration=10, angle=360, cx=200, cy=200).to_svg()
+        assert ('<g id="star"><animateTransform attributeName="transform" type="rotate" '
+                'values="0 200 200;360 200 200" additive="sum" dur="10s" '
+                'repeatCount="indefinite"/><circle') in svg
+
+    def test_move_and_bounce(self):
+        """Moving with bounce goes there and back again."""
+        svg = self._canvas().animate_group("star", dx=50, dy=-10.5, bounce=True).to_svg()
+        assert 'type="translate" values="0 0;50 -10.5;0 0"' in svg
+
+    def test_scale_around_center(self):
+        """Scaling around a center adds a compensating translation first."""
+        svg = self._canvas().animate_group("star", scale=2, cx=200, cy=200).to_svg()
+        translate = svg.index('values="0 0;-200 -200"')
+        assert translate < svg.index('type="scale" values="1;2"')
+
+    def test_opacity_pulse_and_timing(self):
+        """Opacity uses <animate>; repeat and delay control timing."""
+        svg = self._canvas().animate_group("star", opacity=0.2, bounce=True, repeat=3,
+                                           delay=0.5).to_svg()
+        assert ('<animate attributeName="opacity" values="1;0.2;1" dur="2s" '
+                'repeatCount="3" fill="freeze" begin="0.5s"/>') in svg
+
+        once = self._canvas().animate_group("star", dx=10, repeat=False).to_svg()
+        assert 'fill="freeze"' in once and 'repeatCount' not in once
+
+    def test_path(self):
+        """A path of offsets becomes an animateMotion."""
+        svg = self._canvas().animate_group("star", path=[(0, 0), (50, 20), (100, 0)]).to_svg()
+        assert '<animateMotion path="M0 0L50 20L100 0" dur="2s"' in svg
+
+    def test_animations_stack_and_keep_transform(self):
+        """Animations add up and keep the group's static transform."""
+        canvas = self._canvas().move_group("star", 10, 0)
+        canvas.animate_group("star", angle=90).animate_group("star", opacity=0.5)
+        svg = canvas.to_svg()
+        assert '<g id="star" transform="translate(10, 0)"><animateTransform' in svg
+        assert svg.count('<animate') == 2
+
+    def test_unknown_group_and_bad_duration(self):
+        """Unknown groups are ignored like move_group; duration must be positive."""
+        canvas = self._canvas()
+        before = canvas.to_svg()
+        assert canvas.animate_group("missing", angle=90).to_svg() == before
+        with pytest.raises(ValueError, match="duration must be positive"):
+            canvas.animate_group("star", duration=0, angle=90)
+
+    def test_removed_with_group_and_clear(self):
+        """Animations go away with their group."""
+        canvas = self._canvas().animate_group("star", angle=90)
+        canvas.remove_group("star")
+        assert canvas.group_animations == {}
+        canvas = self._canvas().animate_group("star", angle=90).clear()
+        assert '<animate' not in canvas.to_svg()
+
+
+class TestSpatialQueries:
+    """Test shapes_at, shapes_in_rect, overlapping_pairs and bounds."""
+
+    @staticmethod
+    def _canvas():
+        canvas = Canvas(400, 400)
+        canvas.circle(100, 100, 20, fill=Color.RED, stroke=None)
+        canvas.circles([10, 40, 300], [10, 10, 300], 12, stroke=None)
+        with canvas.group("tri"):
+            canvas.polygon([(200, 200), (260, 200), (230, 260)], stroke=None)
+        return canvas
+
+    def test_shapes_at_is_exact_for_circles_and_polygons(self):
+        """Corners of a circle's or triangle's box are not hits."""
+        canvas = self._canvas()
+        assert canvas.shapes_at(100, 100) == [(None, 0)]
+        assert canvas.shapes_at(118, 118) == []
+        assert canvas.shapes_at(40, 10) == [(None, 2)]  # Inside a batch
+        assert canvas.shapes_at(230, 220) == [("tri", 0)]
+        assert canvas.shapes_at(205, 250) == []
+
+    def test_shapes_at_follows_fill_rule_and_stroke(self):
+        """Hits use the nonzero fill rule, skip fill="none" and include the stroke width."""
+        canvas = Canvas(400, 400)
+        # Five-pointed star drawn in one stroke: its middle is wound twice
+        star = [(100 + 50 * math.sin(math.radians(144 * k)), 100 - 50 * math.cos(math.radians(144 * k)))
+                for k in range(5)]
+        canvas.polygon(star, stroke=None)
+        canvas.circle(300, 100, 40, fill="none", stroke=Color.BLUE, stroke_width=10)
+        canvas.line(0, 300, 100, 400, stroke_width=4)
+        canvas.rect(200, 250, 100, 100, fill=Color.RED, stroke=Color.BLUE, stroke_width=10)
+
+        assert canvas.shapes_at(100, 100) == [(None, 0)]
+        assert canvas.shapes_at(300, 100) == []
+        assert canvas.shapes_at(300, 62) == [(None, 1)]
+        assert canvas.shapes_at(50, 350) == [(None, 2)]
+        assert canvas.shapes_at(20, 380) == []
+        assert canvas.shapes_at(197, 300) == [(None, 3)]
+        assert canvas.shapes_at(193, 300) == []
+
+    def test_group_transforms_are_applied(self):
+        """Queries see groups where move_group/rotate_group put them."""
+        canvas = self._canvas().move_group("tri", dx=-100)
+        assert canvas.shapes_at(230, 220) == []
+        assert canvas.shapes_at(130, 220) == [("tri", 0)]
+
+        canvas.rotate_group("tri", 180, 230, 230)
+        assert canvas.shapes_at(130, 240) == [("tri", 0)]
+        assert canvas.bounds("tri") == pytest.approx((100, 200, 160, 260))
+
+    def test_hidden_groups_are_skipped(self):
+        """Hidden shapes cannot be hit."""
+        canvas = self._canvas().hide_group("tri")
+        assert canvas.shapes_at(230, 220) == []
+
+    def test_shapes_in_rect(self):
+        """Every shape whose box overlaps the rectangle, in drawing order."""
+        canvas = self._canvas()
+        assert canvas.shapes_in_rect(0, 0, 20, 20) == [(None, 1)]
+        assert canvas.shapes_in_rect(0, 0, 400, 400) == [
+            (None, 0), (None, 1), (None, 2), (None, 3), ("tri", 0)]
+
+    def test_shapes_in_rect_in_rotated_groups(self):
+        """Rotated groups are matched by their shapes' world boxes, like a full scan."""
+        import random
+
+        rng = random.Random(4)
+        canvas = Canvas(800, 800)
+        for name, angle in (("a", 30), ("b", 135)):
+            with canvas.group(name):
+                for _ in range(150):
+                    canvas.rect(rng.uniform(0, 700), rng.uniform(0, 700), rng.uniform(2, 90),
+                                rng.uniform(2, 90), stroke=None)
+            canvas.rotate_group(name, angle, 400, 400)
+        canvas.move_group("b", dx=40, dy=-25)
+        world = {(key, i): box for key, matrix, index in canvas._spatial_index(canvas._segments())
+                 for i, box in enumerate(index.world_boxes(matrix))}
+
+        for _ in range(100):
+            x, y, w, h = rng.uniform(-100, 800), rng.uniform(-100, 800), rng.uniform(1, 200), rng.uniform(1, 200)
+            expected = [hit for hit, box in world.items()
+                        if box[0] <= x + w and x <= box[2] and box[1] <= y + h and y <= box[3]]
+            assert canvas.shapes_in_rect(x, y, w, h) == expected
+
+    def test_index_follows_new_shapes(self):
+        """Shapes drawn after a query are found by the next one."""
+        canvas = self._canvas()
+        assert canvas.shapes_at(350, 50) == []
+        canvas.rect(340, 40, 20, 20)
+        assert canvas.shapes_at(350, 50) == [(None, 4)]
+        canvas.clear()
+        assert canvas.shapes_at(350, 50) == []
+        assert canvas.bounds() is None
+
+    def test_overlapping_pairs(self):
+        """Box overlaps, with exact tests between circles."""
+        canvas = Canvas(400, 400)
+        canvas.circles([0, 30, 100], [0, 0, 0], 16, stroke=None)   # 0-1 touch, 2 apart
+        canvas.circle(114, 14, 2, stroke=None)                      # In circle 2's box corner only
+        canvas.rect(25, -5, 10, 10, stroke=None)
+        assert canvas.overlapping_pairs() == [((None, 0), (None, 1)), ((None, 1), (None, 4))]
+
+    def test_overlapping_pairs_matches_brute_force(self):
+        """The sweep finds the same box overlaps as checking every pair."""
+        import random
+
+        rng = random.Random(7)
+        canvas = Canvas(800, 600)
+        for _ in range(300):
+            canvas.rect(rng.uniform(0, 780), rng.uniform(0, 580),
+                        rng.uniform(1, 40), rng.uniform(1, 40), stroke=None)
+        boxes = [(r.geom[0], r.geom[1], r.geom[0] + r.geom[2], r.geom[1] + r.geom[3])
+                 for r in canvas.shapes]
+        expected = [((None, i), (None, j)) for i in range(len(boxes)) for j in range(i + 1, len(boxes))
+                    if boxes[i][0] < boxes[j][2] and boxes[j][0] < boxes[i][2]
+                    and boxes[i][1] < boxes[j][3] and boxes[j][1] < boxes[i][3]]
+        assert canvas.overlapping_pairs() == expected
+
+    def test_bounds(self):
+        """Bounds include strokes and stamped symbols."""
+        canvas = Canvas(400, 400)
+        canvas.line(10, 20, 110, 220, stroke_width=4)
+        assert canvas.bounds() == (8, 18, 112, 222)
+        assert canvas.bounds("missing") is None
+
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 5, stroke=None))
+        canvas.stamp("dot", 300, 300, scale=2)
+        assert canvas.bounds() == (8, 18, 310, 310)
+
+
+class TestCulling:
+    """Test leaving off-canvas shapes out of the SVG."""
+
+    @staticmethod
+    def _canvas(**kwargs):
+        canvas = Canvas(200, 100, **kwargs)
+        canvas.circle(50, 50, 10, fill=Color.RED)
+        canvas.circle(500, 50, 10, fill=Color.BLUE)         # Far right
+        canvas.circles([-10, 100], [50, -30], 20, fill=Color.GREEN)  # Left edge, above
+        canvas.line(-50, -50, -10, -10, stroke_width=30)    # Only its stroke reaches in
+        return canvas
+
+    def test_cull_is_opt_in(self):
+        """Without cull every shape is written."""
+        assert self._canvas().to_svg().count("<circle") == 4
+
+    def test_cull_drops_shapes_outside(self):
+        """Shapes fully outside go; partly visible ones and strokes stay."""
+        svg = self._canvas().to_svg(cull=True)
+        assert svg.count("<circle") == 2
+        assert Color.BLUE not in svg
+        assert 'cx="-10"' in svg
+        assert "<line" in svg
+
+        assert self._canvas(cull=True).to_svg() == svg
+
+    def test_cull_report(self):
+        """The report counts the dropped elements and their bytes."""
+        canvas = self._canvas()
+        report = canvas.cull_report()
+        assert report["elements"] == 2
+        assert report["bytes"] == len(canvas.to_svg()) - len(canvas.to_svg(cull=True))
+
+    def test_group_transforms_are_applied(self):
+        """A group moved into view is kept; one moved out is dropped."""
+        canvas = Canvas(200, 100)
+        with canvas.group("in"):
+            canvas.rect(300, 0, 20, 20)
+        with canvas.group("out"):
+            canvas.rect(10, 10, 20, 20)
+        canvas.move_group("in", dx=-250).move_group("out", dy=200)
+        svg = canvas.to_svg(cull=True)
+        assert '<g id="in" transform="translate(-250, 0)"><rect' in svg
+        assert '<g id="out" transform="translate(0, 200)"></g>' in svg
+
+    def test_animated_groups_are_kept(self):
+        """Animations may bring shapes into view, so they are not culled."""
+        canvas = Canvas(200, 100)
+        with canvas.group("fish"):
+            canvas.circle(-50, 50, 10)
+        canvas.animate_group("fish", dx=300)
+        assert "<circle" in canvas.to_svg(cull=True)
+
+    def test_cull_after_more_drawing(self):
+        """Culling follows shapes added after an earlier render."""
+        canvas = self._canvas(cull=True)
+        canvas.to_svg()
+        canvas.circle(150, 150, 5)
+        canvas.circle(150, 50, 5, fill=Color.YELLOW)
+        svg = canvas.to_svg()
+        assert svg.count("<circle") == 3
+        assert Color.YELLOW in svg
+
+    def test_diff_resets_when_culling(self):
+        """Patches address elements by position, which culling shifts."""
+        assert self._canvas(cull=True).diff(self._canvas())[0][0] == "reset"
+
+
+class TestOptimize:
+    """Test removing duplicate and hidden shapes."""
+
+    def test_duplicates_keep_the_top_copy(self):
+        """The earlier copy goes, so the shape stays above what is between."""
+        canvas = Canvas(200, 200)
+        canvas.circle(50, 50, 10, fill=Color.RED)
+        canvas.rect(40, 40, 5, 5, fill=Color.BLUE)
+        canvas.circle(50, 50, 10, fill=Color.RED)
+        assert canvas.optimize() == {'duplicates': 1, 'covered': 0}
+        assert [s.tag for s in canvas.shapes] == ['rect', 'circle']
+
+    def test_translucent_duplicates_are_kept(self):
+        """Drawing a see-through shape twice makes it darker."""
+        canvas = Canvas(200, 200)
+        for _ in range(2):
+            canvas.circle(50, 50, 10, fill="#FF000080", stroke=None)
+            canvas.circle(0, 0, 10, fill=Color.RED, opacity=0.5)
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 0}
+
+    def test_text_and_stamps_are_kept(self):
+        """Repeated text and stamps are never removed, unlike repeated shapes."""
+        canvas = Canvas(200, 200)
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 5))
+        for _ in range(2):
+            canvas.text(10, 20, "Hi", fill=Color.BLACK)
+            canvas.stamp("dot", 50, 50)
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 0}
+        assert [s.tag for s in canvas.shapes] == ['text', 'use', 'text', 'use']
+
+    def test_covered_shapes_are_removed(self):
+        """Shapes under a later opaque rect, circle or ellipse go."""
+        canvas = Canvas(400, 400)
+        canvas.circle(100, 100, 30, fill=Color.RED)           # Under the big rect
+        canvas.rect(300, 300, 20, 20, fill=Color.RED)         # Under the circle
+        canvas.ellipse(150, 300, 30, 10, fill=Color.RED)      # Under the ellipse
+        canvas.rect(0, 0, 200, 200, fill=Color.BLUE, stroke="none")
+        canvas.circle(310, 310, 40, fill=Color.GREEN)
+        canvas.ellipse(150, 300, 60, 30, fill=Color.GREEN)
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 3}
+        assert len(canvas.shapes) == 3
+
+    def test_undrawn_shapes_do_not_cover(self):
+        """Rects with no width or height and circles with no radius draw nothing."""
+        canvas = Canvas(400, 400)
+        canvas.circle(50, 50, 10, fill=Color.RED)
+        canvas.circle(250, 50, 10, fill=Color.RED)
+        canvas.circle(50, 250, 10, fill=Color.RED)
+        canvas.rect(100, 0, -100, 100, fill=Color.BLUE)
+        canvas.rect(200, 0, 100, 0, fill=Color.BLUE)
+        canvas.circle(50, 250, 0, fill=Color.BLUE)
+        canvas.ellipse(50, 250, -40, -40, fill=Color.BLUE)
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 0}
+        assert len(canvas.shapes) == 7
+
+    def test_partly_covered_and_see_through_covers_are_kept(self):
+        """Occluders must hide the whole shape with a solid opaque fill."""
+        canvas = Canvas(400, 400)
+        canvas.linear_gradient("sky", colors=["#000000", "#FFFFFF"])
+        canvas.circle(100, 100, 30, fill=Color.RED)
+        canvas.circle(300, 100, 30, fill=Color.RED)
+        canvas.circle(100, 300, 30, fill=Color.RED)
+        canvas.circle(300, 300, 30, fill=Color.RED, stroke_width=20)  # Stroke pokes out
+        canvas.rect(75, 75, 50, 50, fill=Color.BLUE)                  # Too small
+        canvas.circle(300, 100, 60, fill=Color.BLUE, opacity=0.9)
+        canvas.rect(50, 250, 100, 100, fill="gradient:sky")
+        canvas.rect(265, 265, 70, 70, fill=Color.BLUE)
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 0}
+
+    def test_groups_only_hide_their_own_shapes(self):
+        """A group cannot hide ungrouped shapes, which a later move would uncover."""
+        canvas = Canvas(400, 400)
+        canvas.circle(100, 100, 10)
+        with canvas.group("wall"):
+            canvas.circle(100, 100, 10)
+            canvas.rect(0, 0, 200, 200, fill=Color.BLUE)
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 1}
+        assert len(canvas.shapes) == 1
+        assert [s.tag for s in canvas.groups["wall"]] == ['rect']
+
+    def test_batches_shrink_and_output_matches(self):
+        """Removing part of a batch keeps the rest batched; the picture is unchanged."""
+        canvas = Canvas(400, 400)
+        canvas.circles([20, 100, 300], [20, 100, 300], 5, fill=Color.RED)
+        canvas.rect(50, 50, 100, 100, fill=Color.BLUE, stroke=None)
+        before = canvas.to_svg()
+        assert canvas.optimize() == {'duplicates': 0, 'covered': 1}
+        assert canvas.shapes[0].count == 2
+        assert canvas.to_svg() == before.replace(
+            '<circle cx="100" cy="100" r="5" fill="#FF0000" stroke="#000000" stroke-width="1"/>', '')
+        assert canvas.shapes_at(100, 100) == [(None, 2)]
+
+
+class TestTransforms:
+    """Test group transforms stored as matrices and baking them."""
+
+    def _canvas(self) -> Canvas:
+        canvas = Canvas(400, 400)
+        with canvas.group("box"):
+            canvas.rect(10, 20, 50, 30, fill=Color.BLUE, stroke_width=2)
+            canvas.ellipse(100, 100, 30, 10, fill=Color.RED)
+        return canvas
+
+    def test_moves_and_rotations_compose_into_one_matrix(self):
+        """A group carries one transform whatever was applied to it."""
+        canvas = self._canvas().move_group("box", 10, 0).rotate_group("box", 90)
+        assert '<g id="box" transform="matrix(0 1 -1 0 10 0)">' in canvas.to_svg()
+
+    def test_repeated_moves_do_not_grow_the_transform(self):
+        """Each move replaces the previous offset."""
+        canvas = self._canvas().rotate_group("box", 90)
+        for x in range(100):
+            canvas.move_group("box", x, 2 * x)
+        assert canvas.group_transforms["box"] == pytest.approx((0, 1, -1, 0, 99, 198))
+        canvas.move_group("box", 0, 0)
+        assert '<g id="box" transform="matrix(0 1 -1 0 0 0)">' in canvas.to_svg()
+
+    def test_bake_moves_and_quarter_turns(self):
+        """Coordinates take the transform; rects and ellipses keep their tag."""
+        canvas = self._canvas().move_group("box", 100, 50)
+        svg = canvas.to_svg(bake_transforms=True)
+        assert '<g id="box"><rect x="110" y="70" width="50" height="30"' in svg
+        assert '<ellipse cx="200" cy="150" rx="30" ry="10"' in svg
+        assert 'transform' not in svg
+
+        canvas.move_group("box", 0, 0).rotate_group("box", 90, 200, 200)
+        svg = canvas.to_svg(bake_transforms=True)
+        assert '<rect x="350" y="10" width="30" height="50"' in svg
+        assert '<ellipse cx="300" cy="100" rx="10" ry="30"' in svg
+        assert 'transform="matrix' in canvas.to_svg()  # Unbaked output is cached separately
+
+    def test_bake_rotation_and_scale(self):
+        """Turned rects become polygons, turned ellipses paths; strokes scale."""
+        canvas = self._canvas()
+        canvas.group_transforms["box"] = (0, 2, -2, 0, 0, 0)
+        canvas.rotate_group("box", -45)
+        svg = canvas.to_svg(bake_transforms=True)
+        assert '<polygon points="' in svg and 'stroke-width="4"' in svg
+        assert '<path d="M' in svg and '<ellipse' not in svg
+
+    def test_groups_that_cannot_be_baked_keep_their_transform(self):
+        """Rotated text, uneven scaling and animated groups are left alone."""
+        canvas = self._canvas()
+        with canvas.group("label"):
+            canvas.text(10, 10, "hi")
+        canvas.rotate_group("label", 30)
+        canvas.group_transforms["box"] = (2, 0, 0, 1, 0, 0)
+        with canvas.group("spinner"):
+            canvas.circle(10, 10, 5)
+        canvas.move_group("spinner", 5, 0).animate_group("spinner", angle=360)
+        svg = canvas.to_svg(bake_transforms=True)
+        assert '<g id="label" transform="matrix(' in svg
+        assert '<g id="box" transform="matrix(2 0 0 1 0 0)">' in svg
+        assert '<g id="spinner" transform="translate(5, 0)"><animateTransform' in svg
+
+    def test_bake_with_culling(self):
+        """Only the shapes culling keeps are baked."""
+        canvas = self._canvas().move_group("box", -95, 0)
+        svg = canvas.to_svg(cull=True, bake_transforms=True)
+        assert '<g id="box"><ellipse cx="5" cy="100"' in svg
+        assert '<rect' not in svg.split('<g id="box">')[1]
+
+
+class TestNestedGroups:
+    """Test groups nested in groups."""
+
+    def _canvas(self) -> Canvas:
+        canvas = Canvas(400, 400)
+        with canvas.group("traffic"):
+            canvas.rect(0, 0, 400, 20, fill=Color.GRAY)
+            with canvas.group("bus"):
+                canvas.rect(10, 30, 40, 20, fill=Color.YELLOW)
+            canvas.circle(300, 10, 5)  # Back in "traffic"
+            with canvas.group("car"):
+                canvas.circle(100, 40, 10, fill=Color.RED)
+        return canvas
+
+    def test_children_render_inside_their_parent(self):
+        """A group's shapes come first, then its child groups in creation order."""
+        canvas = self._canvas()
+        assert canvas.group_parents == {"traffic": None, "bus": "traffic", "car": "traffic"}
+        assert canvas.current_group is None
+        svg = canvas.to_svg()
+        body = svg[svg.index('<g id="traffic">'):]
+        assert body.startswith('<g id="traffic"><rect x="0" y="0" width="400" height="20"')
+        assert body.index('<circle cx="300"') < body.index('<g id="bus">') < body.index('<g id="car">')
+        assert body.endswith('/></g></g></svg>')
+        assert svg == "".join(canvas.iter_svg())
+
+    def test_transforms_and_visibility_apply_to_children(self):
+        """Children move and hide with their parent; removing takes them along."""
+        canvas = self._canvas().move_group("traffic", dx=100).move_group("car", dy=100)
+        assert canvas.shapes_at(200, 140) == [("car", 0)]
+        assert canvas.bounds("traffic") == (99.5, -0.5, 500.5, 150.5)
+
+        canvas.hide_group("traffic")
+        assert 'id="car"' not in canvas.to_svg()
+        canvas.show_group("traffic").remove_group("traffic")
+        assert canvas.groups == {} and canvas.group_parents == {}
+        assert canvas._shape_count == 0
+
+    def test_moving_a_parent_reuses_the_subtree(self):
+        """Only the parent's <g> tag is rendered again."""
+        canvas = self._canvas()
+        canvas.to_svg()
+        canvas._iter_shapes = lambda *args: pytest.fail("shapes rendered again")
+        canvas.move_group("traffic", dx=5).rotate_group("bus", 10).hide_group("car")
+        svg = canvas.to_svg()
+        assert '<g id="traffic" transform="translate(5, 0)">' in svg
+        assert 'id="car"' not in svg
+
+    def test_bake_combines_nested_transforms(self):
+        """Baked children use the combined transform; others take it as their attribute."""
+        canvas = self._canvas()
+        with canvas.group("traffic"):
+            with canvas.group("sign"):
+                canvas.text(0, 0, "STOP")
+        canvas.move_group("traffic", dx=100).move_group("car", dy=10).rotate_group("sign", 90)
+        svg = canvas.to_svg(bake_transforms=True)
+        assert '<g id="car"><circle cx="200" cy="50" r="10"' in svg
+        assert '<g id="sign" transform="matrix(0 1 -1 0 100 0)"><text' in svg
+
+    def test_diff_adds_nested_groups_and_resets_on_reparenting(self):
+        """New groups are added to their parent; moving one between parents resets."""
+        old = self._canvas()
+        new = self._canvas()
+        with new.group("car"):
+            with new.group("wheels"):
+                new.circle(95, 50, 3)
+        assert new.diff(old) == [['add_group', '<g id="wheels"><circle cx="95" cy="50" r="3" '
+                                  'fill="#000000" stroke="#000000" stroke-width="1"/></g>', 'car']]
+
+        moved = Canvas(400, 400)
+        with moved.group("traffic"):
+            moved.rect(0, 0, 400, 20, fill=Color.GRAY)
+        with moved.group("bus"):
+            moved.rect(10, 30, 40, 20, fill=Color.YELLOW)
+        assert moved.diff(old)[0][0] == 'reset'
+
+
+class TestDumps:
+    """Test Canvas.dumps() and Canvas.loads()."""
+
+    def _canvas(self):
+        canvas = Canvas(300, 200, background="#F0F0F0", precision=2, css_classes=True,
+                        tolerance=0.5)
+        canvas.linear_gradient("sky", colors=["#87CEEB", "#FFFFFF"])
+        canvas.define_symbol("dot", lambda c: c.circle(0, 0, 3, fill=Color.RED))
+        canvas.rect(0, 0, 300, 200, fill="gradient:sky", stroke=None)
+        canvas.circles([10, 20.1, 30], [40, 50, 60], [5, 6, 7], opacity=0.5)
+        canvas.text(10, 190, "Hi <there>", size=14)
+        canvas.curve(0, 0, 50.3, 80.7, 100, 0)
+        with canvas.group("scene"):
+            canvas.stamp("dot", 100, 100, angle=45)
+            with canvas.group("car"):
+                canvas.polygon([(0, 0), (10, 0.1), (5, 8)])
+        canvas.move_group("car", dx=5).rotate_group("scene", 30, 150, 100)
+        canvas.hide_group("car").animate_group("scene", duration=3, dx=20)
+        return canvas
+
+    def test_round_trip_is_identical(self):
+        """A loaded canvas renders and serializes exactly like the original."""
+        canvas = self._canvas()
+        data = canvas.dumps()
+        loaded = Canvas.loads(data)
+        assert loaded.to_svg() == canvas.to_svg()
+        assert loaded.dumps() == data
+        assert loaded.diff(canvas) == []
+        assert loaded._shape_count == canvas._shape_count
+        assert loaded.group_parents == canvas.group_parents
+        assert loaded.tolerance == 0.5
+
+    def test_loads_accepts_memoryview(self):
+        """Any buffer works, e.g. a slice of a larger shared buffer."""
+        canvas = self._canvas()
+        buffer = bytearray(b"xx" + canvas.dumps())
+        assert Canvas.loads(memoryview(buffer)[2:]).to_svg() == canvas.to_svg()
+
+    def test_loaded_canvas_stays_editable(self):
+        """Shapes, groups and symbols keep working after loading."""
+        loaded = Canvas.loads(self._canvas().dumps())
+        with loaded.group("car"):
+            loaded.stamp("dot", 0, 0)
+        loaded.show_group("car")
+        assert loaded.to_svg().count('<use href="#sym_dot"') == 2
+
+    def test_exact_values_use_float32(self):
+        """Coordinates float32 holds exactly take 4 bytes, others keep full precision."""
+        small = Canvas(100, 100).polygon([(i, i / 2) for i in range(50)]).dumps()
+        precise = Canvas(100, 100).polygon([(i / 3, i / 7) for i in range(50)]).dumps()
+        assert len(precise) - len(small) == 400
+
+    def test_invalid_data(self):
+        """Garbage, truncated or newer data raises ValueError."""
+        data = self._canvas().dumps()
+        for bad in (b"", b"<svg></svg>" * 3, data[:-4], data[:4] + b"\x63" + data[5:]):
+            with pytest.raises(ValueError):
+                Canvas.loads(bad)
+
+
+class TestLayers:
+    """Test Canvas.layer() and Canvas.compose()."""
+
+    def test_layers_draw_in_z_order(self):
+        """Layers stack by z, not by creation order; ties keep creation order."""
+        canvas = Canvas(200, 200)
+        canvas.circle(1, 1, 1)
+        with canvas.layer("text", z=2):
+            canvas.text(10, 20, "Hi")
+        with canvas.group("fish"):
+            canvas.circle(50, 50, 5)
+        with canvas.layer("sea", z=-1):
+            canvas.rect(0, 0, 200, 200)
+        svg = canvas.to_svg()
+        assert svg.index('<circle cx="1"') < svg.index('id="sea"') < svg.index('id="fish"') \
+            < svg.index('id="text"')
+
+    def test_changing_z_reorders(self):
+        """Re-entering a layer with a new z moves it; without z it stays put."""
+        canvas = Canvas(200, 200)
+        with canvas.layer("a"):
+            canvas.circle(10, 10, 5)
+        with canvas.layer("b"):
+            canvas.circle(20, 20, 5)
+        with canvas.layer("a", z=1):
+            pass
+        with canvas.layer("a"):
+            canvas.circle(30, 30, 5)
+        svg = canvas.to_svg()
+        assert svg.index('id="b"') < svg.index('id="a"')
+        assert canvas.layer_z == {"a": 1, "b": 0}
+
+    def test_layers_must_be_top_level(self):
+        """Layers cannot be created inside a group."""
+        canvas = Canvas(200, 200)
+        with canvas.group("outer"):
+            with pytest.raises(ValueError):
+                canvas.layer("inner")
+            with canvas.group("nested"):
+                pass
+        with pytest.raises(ValueError):
+            canvas.layer("nested")
+
+    def test_compose_stacks_canvases(self):
+        """Each canvas becomes a layer over the previous ones, groups nested inside."""
+        background = Canvas(300, 200, background="#000080")
+        background.linear_gradient("sky", colors=["#87CEEB", "#FFFFFF"])
+        background.rect(0, 0, 300, 100, fill="gradient:sky")
+        foreground = Canvas(300, 200)
+        foreground.circle(50, 50, 10)
+        with foreground.group("fish"):
+            foreground.ellipse(100, 100, 20, 10)
+        foreground.move_group("fish", dx=5)
+
+        composed = Canvas.compose(background, foreground)
+        svg = composed.to_svg()
+        assert svg.count('fill="#000080"') == 1 and 'fill="#FFFFFF"' not in svg.split('</defs>')[1]
+        assert svg.index('<g id="layer1">') < svg.index('<g id="layer2"><circle') \
+            < svg.index('<g id="fish" transform="translate(5, 0)">')
+        assert composed.group_parents["fish"] == "layer2"
+        assert composed._shape_count == 3
+        assert Canvas.loads(composed.dumps()).to_svg() == svg
+
+    def test_compose_reuses_rendered_markup(self):
+        """Segments rendered once for an input canvas are not rendered again."""
+        background = Canvas(300, 200)
+        background.rect(0, 0, 300, 200, fill="#0000FF")
+        expected = Canvas.compose(background, Canvas(300, 200).circle(5, 5, 5)).to_svg()
+        background._iter_shapes = lambda *args: pytest.fail("background rendered again")
+        assert Canvas.compose(background, Canvas(300, 200).circle(5, 5, 5)).to_svg() == expected
+
+    def test_compose_rejects_conflicts(self):
+        """Shared group names and differing gradients raise ValueError."""
+        a, b = Canvas(100, 100), Canvas(100, 100)
+        with a.group("fish"):
+            a.circle(10, 10, 5)
+        with b.group("fish"):
+            b.circle(20, 20, 5)
+        with pytest.raises(ValueError, match="fish"):
+            Canvas.compose(a, b)
+        with pytest.raises(ValueError):
+            Canvas.compose()
+
+        c, d = Canvas(100, 100), Canvas(100, 100)
+        c.linear_gradient("sky", colors=["#000000", "#FFFFFF"])
+        d.linear_gradient("sky", colors=["#FFFFFF", "#000000"])
+        with pytest.raises(ValueError, match="sky"):
+            Canvas.compose(c, d)
+
+    def test_compose_composed_canvases(self):
+        """A composed canvas can be composed again."""
+        a, b, c = (Canvas(100, 100).circle(r, r, r) for r in (10, 20, 30))
+        composed = Canvas.compose(Canvas.compose(a, b), c)
+        assert list(composed.layer_z) == ["layer3", "layer1", "layer2", "layer4"]
+        svg = composed.to_svg()
+        assert svg.index('r="10"') < svg.index('r="20"') < svg.index('r="30"')
+
+
+class TestPathBuilder:
+    """Test Canvas.path() and the chainable PathBuilder."""
+
+    def test_builds_one_path_shape(self):
+        """Every segment goes into a single <path> that counts as one shape."""
+        canvas = Canvas(400, 400)
+        path = canvas.path(fill=Color.GREEN).move_to(100, 200)
+        for i in range(1, 300):
+            path.line_to(100 + i, 200 + i % 2)
+        path.quad_to(300, 100, 200, 50).cubic_to(150, 50, 100, 100, 100, 150).close()
+        svg = canvas.to_svg()
+
+        assert svg.count('<path') == 1
+        assert canvas._shape_count == 1
+        assert canvas.shapes[0].extra == "M" + "L" * 299 + "QCZ"
+        assert f'fill="{Color.GREEN}"' in svg
+
+    def test_relative_coordinates_where_shorter(self):
+        """Short numbers are written relative, with h/v for level and upright lines."""
+        canvas = Canvas(400, 400)
+        canvas.path().move_to(100, 200).line_to(150, 200).line_to(150, 120) \
+            .quad_to(200, 100, 250, 120).line_to(253.7, 121.25).close()
+
+        assert 'd="M100 200h50v-80q50-20 100 0L253.7 121.25Z"' in canvas.to_svg()
+        assert 'd="M100 200h50v-80q50-20 100 0l4 1Z"' in canvas.to_svg(precision=0)
+
+    def test_relative_offsets_never_drift(self):
+        """Summing the written offsets gives back every written coordinate."""
+        canvas = Canvas(400, 400, precision=1)
+        path = canvas.path().move_to(0.04, 0.04)
+        for i in range(1, 500):
+            path.line_to(i * 0.73, (i * 0.37) % 5)
+        d = canvas.to_svg().split(' d="')[1].split('"')[0]
+        x = y = 0.0
+        for command, numbers in re.findall(r"([MLlhv])([^MLlhv]*)", d):
+            values = [float(v) for v in numbers.replace("-", " -").split()]
+            if command in "ML":
+                x, y = values
+            elif command == "l":
+                x, y = x + values[0], y + values[1]
+            elif command == "h":
+                x += values[0]
+            else:
+                y += values[0]
+
+        assert d.count("l") > 300
+        assert (x, y) == pytest.approx((round(499 * 0.73, 1), round(499 * 0.37 % 5, 1)), abs=1e-9)
+
+    def test_arc_to(self):
+        """Arcs are stored as cubic curves on the circle through both ends."""
+        canvas = Canvas(400, 400)
+        canvas.path().move_to(100, 200).arc_to(300, 200, 100).arc_to(100, 200, 10, large=True)
+        record = canvas.shapes[0]
+
+        assert record.extra == "MCCCC"  # Two half circles, two quarters each
+        xs, ys = record.geom[0::2], record.geom[1::2]
+        # Clockwise from left to right goes over the top (y points down)
+        assert (xs[3], ys[3]) == pytest.approx((200, 100))
+        # Too small a radius grows to a half circle, back under the bottom
+        assert (xs[9], ys[9]) == pytest.approx((200, 300))
+        assert (xs[-1], ys[-1]) == (100, 200)
+        assert min(ys) == pytest.approx(100) and max(ys) == pytest.approx(300)
+
+    def test_must_start_with_move_to(self):
+        """Drawing before move_to() raises ValueError and adds nothing."""
+        canvas = Canvas(400, 400)
+        with pytest.raises(ValueError, match="move_to"):
+            canvas.path().line_to(10, 10)
+        assert canvas.shapes == []
+
+    def test_growing_path_updates_render_cache(self):
+        """Adding to a path after other shapes were drawn re-renders it."""
+        canvas = Canvas(400, 400)
+        path = canvas.path().move_to(10, 10).line_to(50, 10)
+        canvas.circle(200, 200, 5)
+        first = canvas.to_svg()
+        path.line_to(50, 50)
+        svg = canvas.to_svg()
+
+        assert svg != first
+        assert 'd="M10 10h40v40"' in svg
+        assert canvas.shapes_at(50, 30) == [(None, 0)]
+
+    def test_path_gone_from_canvas(self):
+        """Drawing more of a path after clear() or remove_group() raises ValueError."""
+        canvas = Canvas(400, 400)
+        path = canvas.path().move_to(10, 10).line_to(50, 10)
+        canvas.clear()
+        with pytest.raises(ValueError, match="no longer on the canvas"):
+            path.line_to(50, 50)
+        assert canvas.shapes == []
+
+        with canvas.group("tab"):
+            path = canvas.path().move_to(10, 10)
+        canvas.remove_group("tab")
+        with canvas.group("tab"):
+            canvas.circle(5, 5, 5)
+        with pytest.raises(ValueError, match="no longer on the canvas"):
+            path.close()
+        assert [shape.tag for shape in canvas.groups["tab"]] == ['circle']
+
+    def test_path_survives_optimize(self):
+        """A path kept by optimize() can still be drawn on; one it removed raises."""
+        canvas = Canvas(400, 400)
+        canvas.circle(20, 20, 5, fill=Color.RED)
+        canvas.circle(20, 20, 5, fill=Color.RED)
+        with canvas.group("tab"):
+            hidden = canvas.path(fill=Color.RED).move_to(10, 10).line_to(20, 10).line_to(20, 20)
+            canvas.rect(0, 0, 100, 100, fill=Color.BLUE)
+        path = canvas.path().move_to(200, 200).line_to(250, 200)
+        assert canvas.optimize() == {'duplicates': 1, 'covered': 1}
+
+        path.line_to(250, 250)
+        assert 'd="M200 200h50v50"' in canvas.to_svg()
+        with pytest.raises(ValueError, match="no longer on the canvas"):
+            hidden.close()
+
+    def test_transforms_and_png(self):
+        """Path records move with their group and rasterize like other paths."""
+        canvas = Canvas(100, 100, background="#FFFFFF")
+        with canvas.group("tab"):
+            canvas.path(fill="#FF0000", stroke=None).move_to(10, 60).line_to(10, 30) \
+                .arc_to(50, 30, 20).line_to(50, 60).close()
+        canvas.move_group("tab", dx=20)
+
+        assert canvas.bounds() == pytest.approx((30, 10, 70, 60))
+        assert 'translate(20, 0)' in canvas.to_svg()
+        assert canvas.to_png()[:8] == b"\x89PNG\r\n\x1a\n"
+
+
+class TestRandomSeed:
+    """Test Canvas(seed=...) and the canvas's own random numbers."""
+
+    def _blobs(self, canvas):
+        for i in range(5):
+            canvas.blob(50 + i * 60, 100, radius=25, wobble=0.5)
+        return canvas.to_svg()
+
+    def test_same_seed_same_drawing(self):
+        """A seeded canvas draws the same blobs every time; another seed differs."""
+        first = self._blobs(Canvas(400, 200, seed=7))
+
+        assert self._blobs(Canvas(400, 200, seed=7)) == first
+        assert self._blobs(Canvas(400, 200, seed="reef")) == self._blobs(Canvas(400, 200, seed="reef"))
+        assert self._blobs(Canvas(400, 200, seed=8)) != first
+
+    def test_leaves_global_random_alone(self):
+        """Creating canvases and drawing does not consume or reseed the random module."""
+        import random
+
+        random.seed(42)
+        expected = [random.random() for _ in range(3)]
+        random.seed(42)
+        self._blobs(Canvas(400, 200, seed=1))
+        self._blobs(Canvas(400, 200))
+
+        assert [random.random() for _ in range(3)] == expected
+
+    def test_unseeded_canvases_draw_the_same(self):
+        """Without a seed every canvas starts from Canvas.SEED."""
+        first = self._blobs(Canvas(400, 200))
+
+        assert Canvas(400, 200).seed == Canvas.SEED
+        assert self._blobs(Canvas(400, 200)) == first
+        assert self._blobs(Canvas(400, 200, seed=Canvas.SEED)) == first
+
+    def test_clear_restarts_random_numbers(self):
+        """clear() restarts canvas.random, so redrawing gives the same picture."""
+        canvas = Canvas(400, 200, seed=11)
+        first = self._blobs(canvas)
+        numbers = [canvas.random.random() for _ in range(3)]
+        canvas.clear()
+
+        assert self._blobs(canvas) == first
+        assert [canvas.random.random() for _ in range(3)] == numbers
+
+    def test_seed_survives_dumps_and_compose(self):
+        """Loaded and composed canvases keep the seed."""
+        canvas = Canvas(400, 200, seed=5)
+        canvas.blob(100, 100, radius=30)
+
+        assert Canvas.loads(canvas.dumps()).seed == 5
+        assert Canvas.compose(canvas, Canvas(400, 200)).seed == 5
+
+    def test_invalid_seed(self):
+        """Seeds must be ints or strings."""
+        with pytest.raises(ValueError, match="seed"):
+            Canvas(seed=1.5)
+        with pytest.raises(ValueError, match="seed"):
+            Canvas(seed=[1, 2])
@@ -168,3 +168,17 @@ def test_lesson_generates_valid_svg(starter_file):
     assert svg.endswith('</svg>'), f"Lesson {lesson_name} SVG doesn't end with </svg>"
     assert 'width=' in svg, f"Lesson {lesson_name} SVG missing width attribute"
     assert 'height=' in svg, f"Lesson {lesson_name} SVG missing height attribute"
+
+
+def test_css_classes_shrink_lesson_corpus():
+    """Byte size: css_classes output is smaller than inline styles over all lessons."""
+    inline_total = 0
+    classes_total = 0
+    for starter_file in get_lesson_starter_files():
+        namespace = create_pyodide_namespace()
+        exec(extract_main_function_body(starter_file.read_text()), namespace)
+        canvas = namespace['can']
+        inline_total += len(canvas.to_svg().encode())
+        classes_total += len(canvas.to_svg(css_classes=True).encode())
+
+    assert classes_total < inline_total * 0.95
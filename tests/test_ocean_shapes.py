@@ -10,8 +10,9 @@ def test_wave_basic():
     can.wave(50, 100, 350, 100, height=20, waves=2)
     svg = can.to_svg()
 
-    # Should contain polyline
-    assert 'polyline' in svg
+    # Should be a single open Bézier path
+    assert svg.count('<path') == 1
+    assert 'polyline' not in svg
     assert 'fill="none"' in svg  # Waves are strokes only, no fill
 
 
@@ -21,7 +22,7 @@ def test_wave_diagonal():
     can.wave(50, 50, 350, 350, height=30, waves=3, stroke=Color.BLUE)
     svg = can.to_svg()
 
-    assert 'polyline' in svg
+    assert '<path' in svg
     assert Color.BLUE in svg
 
 
@@ -38,8 +39,11 @@ def test_blob_basic():
     can.blob(100, 100, radius=50, wobble=0.2, points=12)
     svg = can.to_svg()
 
-    # Should contain polygon
-    assert 'polygon' in svg
+    # Should be a closed path of quadratic segments, one per point
+    assert '<path' in svg
+    d = svg.split(' d="')[1].split('"')[0]
+    assert d.count('Q') == 12
+    assert d.endswith('Z')
 
 
 def test_blob_wobble_zero():
@@ -48,8 +52,8 @@ def test_blob_wobble_zero():
     can.blob(100, 100, radius=50, wobble=0, points=12)
     svg = can.to_svg()
 
-    # Still creates a polygon (though very regular)
-    assert 'polygon' in svg
+    # Still creates a path (though very regular)
+    assert '<path' in svg
 
 
 def test_blob_with_custom_colors():
@@ -69,8 +73,8 @@ def test_tentacle_straight():
     can.tentacle(200, 100, 200, 300, curl=0, thickness=20, taper=0.3)
     svg = can.to_svg()
 
-    # Should contain polygon (filled shape)
-    assert 'polygon' in svg
+    # Should contain a filled path outline
+    assert '<path' in svg
 
 
 def test_tentacle_curl_positive():
@@ -80,7 +84,7 @@ def test_tentacle_curl_positive():
                 fill=OceanPalette.PURPLE_CORAL)
     svg = can.to_svg()
 
-    assert 'polygon' in svg
+    assert '<path' in svg
     assert OceanPalette.PURPLE_CORAL in svg
 
 
@@ -90,7 +94,7 @@ def test_tentacle_curl_negative():
     can.tentacle(200, 100, 200, 300, curl=-0.5, thickness=20, taper=0.3)
     svg = can.to_svg()
 
-    assert 'polygon' in svg
+    assert '<path' in svg
 
 
 def test_tentacle_taper():
@@ -103,8 +107,7 @@ def test_tentacle_taper():
     svg = can.to_svg()
 
     # Should have two tentacles
-    polygon_count = svg.count('<polygon')
-    assert polygon_count == 2
+    assert svg.count('<path') == 2
 
 
 def test_tentacle_twist():
@@ -117,8 +120,7 @@ def test_tentacle_twist():
     svg = can.to_svg()
 
     # Should have two tentacles
-    polygon_count = svg.count('<polygon')
-    assert polygon_count == 2
+    assert svg.count('<path') == 2
 
 
 def test_tentacle_twist_maximum():
@@ -127,7 +129,217 @@ def test_tentacle_twist_maximum():
     can.tentacle(200, 100, 200, 300, curl=0.5, twist=1.0, thickness=25)
     svg = can.to_svg()
 
-    assert 'polygon' in svg
+    assert '<path' in svg
+
+
+def test_tentacle_outline_is_compact():
+    """Tentacle outline uses a few cubic segments instead of 100 sampled points."""
+    can = Canvas(400, 400)
+    can.tentacle(200, 100, 200, 300, curl=0.5, twist=0.5, thickness=20)
+    d = can.to_svg().split(' d="')[1].split('"')[0]
+
+    assert d.startswith('M')
+    assert d.endswith('Z')
+    assert d.count('C') <= 16
+
+
+def test_tentacle_falls_back_when_too_thick_to_offset():
+    """A curl tighter than the tentacle is wide is sampled into a polygon."""
+    can = Canvas(400, 400)
+    can.tentacle(200, 100, 210, 110, curl=1.0, thickness=200)
+    svg = can.to_svg()
+
+    assert '<polygon' in svg
+    assert '<path' not in svg
+
+
+TENTACLES = [
+    (100 + 20 * i, 100, 60 + 35 * i, 300 - 10 * i, 0.8 - 0.1 * i, 0.3 * (i % 3), 10 + 20 * (i % 5))
+    for i in range(16)
+] + [(200, 100, 210, 110, 1.0, 0, 200)]  # Falls back to a polygon
+
+
+def test_tentacles_match_tentacle_loop():
+    """tentacles() draws the same shapes as calling tentacle() for each one."""
+    looped = Canvas(800, 600)
+    for x1, y1, x2, y2, curl, twist, thickness in TENTACLES:
+        looped.tentacle(x1, y1, x2, y2, curl=curl, twist=twist, thickness=thickness,
+                        taper=0.2, fill=Color.PURPLE)
+    batched = Canvas(800, 600)
+    x1s, y1s, x2s, y2s, curls, twists, thicknesses = zip(*TENTACLES)
+    batched.tentacles(x1s, y1s, x2s, y2s, curl=curls, twist=twists, thickness=thicknesses,
+                      taper=0.2, fill=Color.PURPLE)
+
+    assert batched.to_svg() == looped.to_svg()
+    assert batched._shape_count == len(TENTACLES)
+
+
+def test_tentacles_broadcast_scalars():
+    """Scalar arguments are shared by every tentacle; lengths must match."""
+    can = Canvas(400, 400)
+    can.tentacles([100, 200, 300], 100, [100, 200, 300], 300, curl=[0.3, 0, -0.3],
+                  fill=["#FF0000", "#00FF00", "#0000FF"])
+    svg = can.to_svg()
+
+    assert svg.count('<path') == 3
+    assert 'fill="#00FF00" stroke="#00FF00"' in svg
+    with pytest.raises(ValueError, match="curl"):
+        can.tentacles([100, 200], 100, [100, 200], 300, curl=[0.3])
+
+
+def test_geometry_backends_agree():
+    """The NumPy kernel computes exactly the same outlines as plain Python."""
+    pytest.importorskip("numpy")
+    from sketchpy.canvas import _offset_outlines_np, _offset_outlines_py, _tentacle_ctrl
+
+    ctrls = [_tentacle_ctrl(*args[:6]) for args in TENTACLES]
+    widths = [args[6] for args in TENTACLES]
+    tips = [w * 0.2 for w in widths]
+    expected = _offset_outlines_py(ctrls, widths, tips, 0.25)
+    actual = _offset_outlines_np(ctrls, widths, tips, 0.25)
+
+    assert expected[-1] is None
+    assert [None if o is None else (o[0], list(o[1])) for o in actual] == expected
+
+
+def segments(can: Canvas) -> list:
+    """Cubic segments in each path of a drawing."""
+    return [d.split('"')[0].count('C') for d in can.to_svg().split(' d="')[1:]]
+
+
+def test_tentacle_detail_scales_with_size():
+    """Small tentacles get fewer outline segments than large ones."""
+    can = Canvas(800, 800)
+    can.tentacle(100, 100, 105, 108, curl=0.6, twist=0.5, thickness=2)
+    can.tentacle(100, 100, 500, 700, curl=0.6, twist=0.5, thickness=80)
+    small, large = segments(can)
+
+    assert small == 2  # One cubic per side
+    assert large >= 4 * small
+
+
+def test_tolerance_per_canvas_and_per_call():
+    """A coarser tolerance gives fewer segments; a call can override the canvas."""
+    fine = Canvas(800, 800)
+    coarse = Canvas(800, 800, tolerance=4)
+    for can in (fine, coarse):
+        can.tentacle(100, 100, 500, 700, curl=0.6, twist=0.5, thickness=80)
+    coarse.tentacle(100, 100, 500, 700, curl=0.6, twist=0.5, thickness=80, tolerance=0.25)
+
+    assert coarse.tolerance == 4
+    assert segments(coarse)[0] < segments(fine)[0] == segments(coarse)[1]
+
+
+def test_invalid_tolerance():
+    """Tolerance must be a positive number."""
+    with pytest.raises(ValueError, match="tolerance"):
+        Canvas(tolerance=0)
+    with pytest.raises(ValueError, match="tolerance"):
+        Canvas().pear(100, 100, tolerance=-1)
+
+
+def test_pear_points_scale_with_size():
+    """Pear outlines are flattened to fewer points when small."""
+    can = Canvas(800, 800)
+    can.pear(100, 100, width=8, height=10)
+    can.pear(400, 100, width=400, height=500)
+    small, large = (len(shape.geom) // 2 for shape in can.shapes)
+
+    assert small < 10
+    assert large > 3 * small
+    # Symmetric: the left side mirrors the right about x
+    xs = can.shapes[1].geom[0::2]
+    assert sorted(round(x - 400, 6) for x in xs) == sorted(round(400 - x, 6) for x in xs)
+
+
+def test_brush_is_one_polygon():
+    """A brush stroke is a single filled outline, whatever the width."""
+    points = [(50, 100), (150, 80), (250, 120), (350, 100)]
+    can = Canvas(400, 200)
+    can.brush(points, width=12, fill=Color.BLUE)
+    can.brush(points, width=[2, 10, 20, 2])
+    can.brush(points, width=lambda u: 20 * (1 - u))
+    svg = can.to_svg()
+
+    assert len(can.shapes) == 3
+    assert svg.count('<polygon') == 3
+    assert Color.BLUE in svg
+    # Straight segments: one point per side at each centerline point
+    assert len(can.shapes[0].geom) == 2 * 2 * len(points)
+
+
+def test_brush_width_profile():
+    """The outline follows the width at each point."""
+    can = Canvas(400, 200)
+    can.brush([(0, 100), (100, 100), (200, 100)], width=[10, 30, 0])
+    ys = can.shapes[0].geom[1::2]
+
+    assert sorted(ys) == [85, 95, 100, 100, 105, 115]
+
+
+def test_brush_sharp_turn_stays_close():
+    """A hairpin turn gets a bevel instead of a long miter spike."""
+    points = [(100, 300), (150, 50), (200, 300)]
+    can = Canvas(400, 400)
+    can.brush(points, width=20)
+    geom = can.shapes[0].geom
+    reach = max(((x - 150)**2 + (y - 50)**2) ** 0.5
+                for x, y in zip(geom[0::2], geom[1::2]) if y < 100)
+
+    assert reach <= 10 * 2.0  # Half width times the miter limit
+
+
+def test_brush_smooth_detail_follows_tolerance():
+    """Smooth strokes are flattened to the canvas tolerance."""
+    points = [(50, 300), (200, 100), (350, 300), (500, 100)]
+    fine = Canvas(600, 400)
+    coarse = Canvas(600, 400, tolerance=4)
+    fine.brush(points, width=10, smooth=True)
+    coarse.brush(points, width=10, smooth=True)
+    coarse.brush(points, width=10, smooth=True, tolerance=0.25)
+
+    assert len(coarse.shapes[0].geom) < len(fine.shapes[0].geom)
+    assert list(coarse.shapes[1].geom) == list(fine.shapes[0].geom)
+
+
+def test_brush_invalid():
+    """Brush needs 2 different points and one width of 0 or more per point."""
+    can = Canvas()
+    with pytest.raises(ValueError, match="2 points"):
+        can.brush([(10, 10)])
+    with pytest.raises(ValueError, match="width"):
+        can.brush([(10, 10), (50, 50), (90, 10)], width=[5, 5])
+    with pytest.raises(ValueError, match="2 different points"):
+        can.brush([(10, 10), (10, 10), (10, 10)])
+    with pytest.raises(ValueError, match="negative"):
+        can.brush([(10, 10), (50, 50)], width=-4)
+    with pytest.raises(ValueError, match="negative"):
+        can.brush([(10, 10), (50, 50), (90, 10)], width=[5, -1, 5])
+    with pytest.raises(ValueError, match="negative"):
+        can.brush([(10, 10), (50, 50)], width=lambda u: 10 - 20 * u)
+    assert can.shapes == []
+
+
+def test_curve_quadratic():
+    """curve() emits a single quadratic path with the given control point."""
+    can = Canvas(200, 200)
+    result = can.curve(10, 20, 50, 80, 90, 20, stroke=Color.RED, stroke_width=3)
+    svg = can.to_svg()
+
+    assert result is can
+    assert '<path d="M10 20q40 60 80 0"' in svg
+    assert 'fill="none"' in svg
+    assert Color.RED in svg
+
+
+def test_bezier_cubic_with_fill():
+    """bezier() emits a cubic path and accepts an optional fill."""
+    can = Canvas(200, 200)
+    can.bezier(0, 0, 10, 50, 90, 50, 100, 0, fill=Color.BLUE)
+    svg = can.to_svg()
+
+    assert 'd="M0 0C10 50 90 50 100 0"' in svg
+    assert f'fill="{Color.BLUE}"' in svg
 
 
 def test_ocean_shapes_octopus():
@@ -138,8 +350,8 @@ def test_ocean_shapes_octopus():
     svg = can.to_svg()
 
     # Should contain blob (head) + 8 tentacles + eyes
-    # At minimum: 1 head + 8 tentacles = 9 polygons
-    polygon_count = svg.count('<polygon')
+    # At minimum: 1 head + 8 tentacles = 9 filled shapes
+    polygon_count = svg.count('<polygon') + svg.count('<path')
     assert polygon_count >= 9
 
     # Should have circles for eyes
@@ -167,8 +379,8 @@ def test_ocean_shapes_jellyfish():
     ocean.jellyfish(300, 200, size=80, tentacle_count=6)
     svg = can.to_svg()
 
-    # Should contain bell + 6 tentacles = 7 polygons minimum
-    polygon_count = svg.count('<polygon')
+    # Should contain bell + 6 tentacles = 7 filled shapes minimum
+    polygon_count = svg.count('<polygon') + svg.count('<path')
     assert polygon_count >= 7
 
 
@@ -180,7 +392,7 @@ def test_ocean_shapes_seaweed():
     svg = can.to_svg()
 
     # Should contain main stem + leaf blobs
-    polygon_count = svg.count('<polygon')
+    polygon_count = svg.count('<polygon') + svg.count('<path')
     assert polygon_count >= 4  # 1 stem + at least 3 leaves
 
 
@@ -197,6 +409,30 @@ def test_ocean_shapes_chaining():
     assert result is ocean
 
 
+def test_seeded_canvas_draws_same_creatures():
+    """OceanShapes draws from the canvas's random numbers, not the clock."""
+    import random
+
+    def scene(seed):
+        can = Canvas(800, 600, seed=seed)
+        ocean = OceanShapes(can)
+        ocean.octopus(150, 150, size=80)
+        ocean.octopus_realistic(400, 150, size=80)
+        ocean.octopus_cartoon(650, 150, size=80)
+        ocean.jellyfish(200, 400, size=50)
+        ocean.seaweed(500, 590, height=120)
+        return can.to_svg()
+
+    random.seed(42)
+    expected = random.random()
+    random.seed(42)
+    first = scene(1)
+
+    assert random.random() == expected  # The student's own seed is untouched
+    assert scene(1) == first
+    assert scene(2) != first
+
+
 def test_ocean_palette_exists():
     """OceanPalette has expected colors."""
     assert hasattr(OceanPalette, 'DEEP_OCEAN')
@@ -233,8 +469,8 @@ def test_complete_ocean_scene():
     assert len(svg) > 1000  # Should be a rich SVG
     assert OceanPalette.PURPLE_CORAL in svg
     assert OceanPalette.SEAFOAM in svg
-    assert 'polygon' in svg
-    assert 'polyline' in svg
+    assert 'polygon' in svg  # pear head
+    assert '<path' in svg
 
 
 def test_ocean_gradients_registered():
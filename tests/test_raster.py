@@ -0,0 +1,150 @@
+"""Tests for PNG output (Canvas.to_png())."""
+
+import struct
+import zlib
+
+import pytest
+from sketchpy import Canvas
+
+
+def decode(png: bytes):
+    """Width, height, channels and rows of pixel tuples from a to_png() image."""
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    pos, data = 8, b''
+    while pos < len(png):
+        length, kind = struct.unpack('>I4s', png[pos:pos + 8])
+        body = png[pos + 8:pos + 8 + length]
+        assert zlib.crc32(kind + body) == struct.unpack('>I', png[pos + 8 + length:pos + 12 + length])[0]
+        if kind == b'IHDR':
+            width, height, depth, color_type = struct.unpack('>IIBB', body[:10])
+            assert depth == 8
+        elif kind == b'IDAT':
+            data += body
+        pos += 12 + length
+    channels = 4 if color_type == 6 else 3
+    raw = zlib.decompress(data)
+    stride = width * channels + 1
+    rows = []
+    for y in range(height):
+        line = raw[y * stride:(y + 1) * stride]
+        assert line[0] == 0  # No filter
+        rows.append([tuple(line[1 + x * channels:1 + (x + 1) * channels]) for x in range(width)])
+    return width, height, channels, rows
+
+
+def pixel(can: Canvas, x: int, y: int, **kwargs):
+    return decode(can.to_png(**kwargs))[3][y][x]
+
+
+class TestPng:
+    """Test Canvas.to_png()."""
+
+    def test_background_and_fill(self):
+        """Shapes are drawn over the canvas background."""
+        can = Canvas(40, 30, background="#102030")
+        can.rect(10, 10, 20, 10, fill="#FF0000", stroke="none")
+        width, height, channels, rows = decode(can.to_png())
+
+        assert (width, height, channels) == (40, 30, 3)
+        assert rows[2][2] == (0x10, 0x20, 0x30)
+        assert rows[15][20] == (255, 0, 0)
+
+    def test_edges_are_antialiased(self):
+        """A pixel half covered by a shape gets half its color."""
+        can = Canvas(20, 20)
+        can.rect(0, 0, 10.5, 20, fill="#000000", stroke="none")
+
+        assert pixel(can, 5, 5) == (0, 0, 0)
+        assert pixel(can, 10, 5) == (128, 128, 128)
+        assert pixel(can, 11, 5) == (255, 255, 255)
+
+    def test_circle_and_stroke(self):
+        """Circles are filled inside and stroked along their edge."""
+        can = Canvas(60, 60)
+        can.circle(30, 30, 20, fill="#0000FF", stroke="#000000", stroke_width=4)
+
+        assert pixel(can, 30, 30) == (0, 0, 255)
+        assert pixel(can, 30, 10) == (0, 0, 0)
+        assert pixel(can, 2, 2) == (255, 255, 255)
+
+    def test_opacity_blends(self):
+        """Opacity mixes the shape with what is under it."""
+        can = Canvas(10, 10)
+        can.circle(5, 5, 20, fill="#000000", stroke="none", opacity=0.5)
+
+        assert pixel(can, 5, 5) == (128, 128, 128)
+
+    def test_opacity_fades_fill_and_stroke_together(self):
+        """Like SVG, the fill doesn't show through a translucent shape's stroke."""
+        can = Canvas(60, 60)
+        can.circle(30, 30, 20, fill="#FF0000", stroke="#0000FF", stroke_width=6, opacity=0.5)
+
+        assert pixel(can, 30, 12) == (128, 128, 255)  # Inner half of the stroke
+        assert pixel(can, 30, 8) == (128, 128, 255)   # Outer half
+        assert pixel(can, 30, 30) == (255, 128, 128)
+
+    def test_linear_gradient(self):
+        """Gradient colors run from start to end across the shape."""
+        can = Canvas(100, 10)
+        can.linear_gradient("fade", colors=["#000000", "#FFFFFF"], start=(0, 0), end=(100, 0))
+        can.rect(0, 0, 100, 10, fill="gradient:fade", stroke="none")
+        row = decode(can.to_png())[3][5]
+
+        assert row[0][0] < 5
+        assert row[99][0] > 250
+        assert abs(row[50][0] - 128) < 5
+
+    def test_group_transform_and_hidden_group(self):
+        """Group transforms apply; hidden groups are not drawn."""
+        can = Canvas(50, 50)
+        with can.group("moved"):
+            can.rect(0, 0, 10, 10, fill="#FF0000", stroke="none")
+        with can.group("hidden"):
+            can.rect(30, 30, 10, 10, fill="#00FF00", stroke="none")
+        can.move_group("moved", 20, 0)
+        can.hide_group("hidden")
+
+        assert pixel(can, 25, 5) == (255, 0, 0)
+        assert pixel(can, 5, 5) == (255, 255, 255)
+        assert pixel(can, 35, 35) == (255, 255, 255)
+
+    def test_scale(self):
+        """scale sets the image size and scales the drawing with it."""
+        can = Canvas(80, 40)
+        can.rect(40, 0, 40, 40, fill="#000000", stroke="none")
+        width, height, _, rows = decode(can.to_png(scale=0.25))
+
+        assert (width, height) == (20, 10)
+        assert rows[5][15] == (0, 0, 0)
+        assert rows[5][5] == (255, 255, 255)
+
+    def test_transparent_background(self):
+        """A transparent background gives an RGBA image."""
+        can = Canvas(10, 10, background="none")
+        can.rect(0, 0, 5, 10, fill="#FF0000", stroke="none")
+        _, _, channels, rows = decode(can.to_png())
+
+        assert channels == 4
+        assert rows[5][2] == (255, 0, 0, 255)
+        assert rows[5][7][3] == 0
+
+    def test_processes_match_single_process(self):
+        """Rendering bands in worker processes gives the same image."""
+        can = Canvas(60, 100)
+        for i in range(10):
+            can.circle(6 * i, 10 * i, 12, fill="#FF8C42", stroke="#000000", stroke_width=2)
+
+        assert can.to_png(processes=2) == can.to_png()
+
+    def test_invalid_scale(self):
+        """A scale that is not positive raises ValueError."""
+        with pytest.raises(ValueError, match="scale"):
+            Canvas(10, 10).to_png(scale=0)
+
+    def test_save_png(self, tmp_path):
+        """save_png() writes the to_png() bytes."""
+        can = Canvas(10, 10)
+        path = tmp_path / "drawing.png"
+        can.save_png(str(path))
+
+        assert path.read_bytes() == can.to_png()